@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import joblib
 import pandas as pd
@@ -8,87 +8,193 @@ import tempfile
 import json
 from PIL import Image
 from scipy import ndimage
-from datetime import datetime
+from datetime import datetime, timedelta
 from improved_voice_assistant import AgriVoiceAssistant
 import recommendation_engine
 import pest_engine
 import market_engine
-import market_engine
+import crop_loss_engine
+import bulk_io
+from serialization import FastJSONProvider, dumps as dumps_json
+from http_cache import ResponseCache, make_etag, etag_matches, choose_encoding
+import dashboards
+import llm_client
+from twin_store import TwinStore
+from price_snapshots import PriceSnapshotStore, TOP_DISTRICTS, parse_districts
+import threading
+import time
+from storage import Database, migrate_json_files
+from chat_log import ChatLog
+from event_bus import bus as event_bus
+from presence import create_tracker
+from shared_state import open_shared_state
+from gov_stats import GovStats
+from search_index import SearchIndex
+from matching_engine import MatchingEngine
+from yield_history import YieldHistory, YIELD_HISTORY_FILE
+from yield_inference import FastYieldModel, numeric_features, prediction_result, stream_predictions, DEFAULT_YEAR_RANGE
+from yield_surface import YieldSurface, uses_defaults
+from crop_loss_rollup import CropLossRollup, DIMENSIONS as ROLLUP_DIMENSIONS
+from llm_metrics import metrics as llm_metrics
 import base64
 import uuid
+import itertools
+
+# State shared by every worker process (shared_state.py): presence, twin cache, LLM counters.
+# In-process by default; gunicorn.conf.py switches it to SQLite for multi-worker runs.
+shared_state = open_shared_state()
+if shared_state.shared:
+    llm_metrics.bind(shared_state)
+
+# Persistent stores (SQLite, see storage.py). Legacy JSON files are imported once on first start.
+db = Database()
+migrate_json_files(db)
+listings_store = db.collection('listings')
+demands_store = db.collection('demands')
+posts_store = db.collection('posts')
+buyer_interactions_store = db.collection('buyer_interactions')
+crop_loss_store = db.collection('crop_loss_cases')
+
+# /gov/stats aggregates, maintained incrementally from store writes
+gov_stats = GovStats()
+gov_stats.rebuild(listings_store.all(), posts_store.all(), crop_loss_store.all())
+gov_stats.subscribe(listings_store, posts_store, crop_loss_store)
+
+# Crop-loss analytics cube, also maintained from store writes
+crop_loss_rollup = CropLossRollup()
+crop_loss_rollup.rebuild(crop_loss_store.all())
+crop_loss_store.subscribe(crop_loss_rollup.on_case)
+
+# Listing / post search (search_index.py), indexed oldest first
+search_index = SearchIndex()
+search_index.rebuild(reversed(listings_store.all()), reversed(posts_store.all()))
+listings_store.subscribe(search_index.on_listing)
+posts_store.subscribe(search_index.on_post)
+
+# Buyer demand <-> farmer listing matches (matching_engine.py)
+matching_engine = MatchingEngine()
+matching_engine.rebuild(listings_store.all(), demands_store.all())
+listings_store.subscribe(matching_engine.on_listing)
+demands_store.subscribe(matching_engine.on_demand)
+
+# Community chat: in-memory ring buffer + append-only log (seeded once from the old chat table)
+chat_store = ChatLog()
+chat_store.import_legacy(db.collection('chat').all())
+
+# Live events are published from the store listeners, so a worker also streams
+# posts, comments and chat written by the other workers once it has synced them
+def publish_post_events(old, new):
+    if new is None:
+        return
+    if old is None:
+        event_bus.publish('post', new)
+        return
+    for comment in (new.get('comments') or [])[len(old.get('comments') or []):]:
+        event_bus.publish('comment', {'postId': new['id'], 'comment': comment})
+
+posts_store.subscribe(publish_post_events)
+chat_store.on_message = lambda message: event_bus.publish('chat', message)
+
+SYNC_INTERVAL_SECONDS = 1.0
+
+def sync_shared_stores():
+    """Pick up writes made by other worker processes (one pragma + one stat when nothing changed)."""
+    db.sync()
+    chat_store.sync()
+
+def start_background_sync(interval=SYNC_INTERVAL_SECONDS):
+    """Keep an idle worker's indexes and event stream current (started per worker by gunicorn.conf.py)."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                sync_shared_stores()
+            except Exception as e:
+                print(f"Background store sync failed: {e}")
+
+    threading.Thread(target=loop, name="store-sync", daemon=True).start()
+
+MAX_PAGE_SIZE = 500
+
+# Bodies (and their gzip / br encodings) of polled GETs, keyed by data version (http_cache.py)
+response_cache = ResponseCache()
+
+def cached_json(version_key, build):
+    """
+    Conditional, compressed JSON response for data identified by version_key
+    (in-memory write counters). Same URL + version -> same ETag, so pollers get
+    a 304 without the data being read; otherwise the body is built once per
+    version. build() returns (payload, extra response headers).
+    """
+    etag = make_etag(request.full_path, *version_key)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers=headers)
+
+    def build_body():
+        payload, extra_headers = build()
+        return dumps_json(payload), extra_headers
+
+    body, extra_headers, encoding = response_cache.get(etag, build_body, choose_encoding(request.headers.get('Accept-Encoding')))
+    response = Response(body, mimetype='application/json', headers={**extra_headers, **headers})
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def parse_int_arg(name):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+    if value < 0:
+        raise ValueError(f"Invalid {name}: {value}")
+    return value
+
+def list_response(store, where=None):
+    """
+    GET handler body for list endpoints. Without query params the full list is
+    returned as before. Supports:
+      ?limit=N&after=<cursor>   cursor pagination (next cursor in X-Next-Cursor)
+      ?since=<token>            only records created/changed after a sync token
+      ?fields=id,title,...      field projection
+    The current sync token is always returned in X-Sync-Token. Responses carry
+    an ETag from the store's write version (If-None-Match -> 304).
+    """
+    try:
+        limit = parse_int_arg('limit')
+        after = parse_int_arg('after')
+        since = parse_int_arg('since')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
 
-MARKET_DATA_FILE = "market_data.json"
-LISTINGS_FILE = "listings.json"
-COMMUNITY_DATA_FILE = "community_data.json"
-CROP_LOSS_FILE = "crop_loss_data.json"
-DEMANDS_FILE = "demands.json"
+    fields = request.args.get('fields')
 
-def load_demands():
-    if os.path.exists(DEMANDS_FILE):
-        try:
-            with open(DEMANDS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
-
-def save_demands(data):
-    with open(DEMANDS_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
-
-def load_crop_loss_data():
-    if os.path.exists(CROP_LOSS_FILE):
-        try:
-            with open(CROP_LOSS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
-
-def save_crop_loss_data(data):
-    with open(CROP_LOSS_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
-
-def load_community_data():
-    if os.path.exists(COMMUNITY_DATA_FILE):
-        try:
-            with open(COMMUNITY_DATA_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {"posts": [], "chat": []}
-    return {"posts": [], "chat": []}
+    def build():
+        records, next_cursor, sync_token = store.page(limit=limit, after=after, since=since, where=where)
+        if fields:
+            wanted = {'id'} | {f.strip() for f in fields.split(',') if f.strip()}
+            records = [{k: v for k, v in record.items() if k in wanted} for record in records]
+        headers = {'X-Sync-Token': str(sync_token)}
+        if next_cursor is not None:
+            headers['X-Next-Cursor'] = str(next_cursor)
+        return records, headers
 
-def save_community_data(data):
-    with open(COMMUNITY_DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    return cached_json(('store', store.local_version()), build)
 
-# Online User Tracking (In-Memory)
-active_users = {} # { "User Name": "2024-01-01T12:00:00" }
+# Online User Tracking (see presence.py; shared across workers with a shared_state backend)
+presence = create_tracker(shared_state, on_change=lambda user, online: event_bus.publish('presence', {'user': user, 'online': online}))
 
 def update_user_status(username):
-    active_users[username] = datetime.now().isoformat()
+    presence.heartbeat(username)
 
 def get_active_users():
-    # Return users active in last 5 minutes
-    current_time = datetime.now()
-    active = []
-    to_remove = []
-    
-    for user, last_seen_str in active_users.items():
-        try:
-            last_seen = datetime.fromisoformat(last_seen_str)
-            if (current_time - last_seen).total_seconds() < 300: # 5 minutes
-                active.append(user)
-            else:
-                to_remove.append(user)
-        except:
-            to_remove.append(user)
-            
-    # Cleanup old users
-    for user in to_remove:
-        del active_users[user]
-        
-    return active
+    # Users active in last 5 minutes
+    return presence.online()
 
 def encode_image(image_path):
     with open(image_path, "rb") as image_file:
@@ -100,18 +206,18 @@ def verify_plant_with_groq(image_path):
     Returns: (is_plant: bool, message: str)
     """
     try:
-        from groq import Groq
-        api_key = os.getenv("GROQ_API_KEY") or os.getenv("VITE_GROQ_CHATBOT_API_KEY")
+        api_key = llm_client.get_api_key()
         if not api_key:
             print("Groq API Key missing for plant verification")
             return True, "Verification skipped (No API Key)"
 
-        client = Groq(api_key=api_key)
+        client = llm_client.get_client(api_key)
         base64_image = encode_image(image_path)
 
         prompt = "Strictly analyze this image. Is it a plant, crop, fruit, vegetable, leaf, or soil? Answer 'YES' only if it is clearly related to agriculture or nature. If it is a man-made object, animal, human, or random object (like candy, toy, car), answer 'NO'. Answer with just 'YES' or 'NO'."
 
-        completion = client.chat.completions.create(
+        completion = llm_client.chat_completion(
+            client, "plant_verification",
             model="meta-llama/llama-4-scout-17b-16e-instruct",
             messages=[
                 {
@@ -144,44 +250,97 @@ def verify_plant_with_groq(image_path):
         return True, f"Verification skipped (Error: {str(e)})" # Fail open on error
 
 app = Flask(__name__)
-CORS(app) # Enable CORS for all routes
-CORS(app)
+app.json = FastJSONProvider(app) # orjson-backed jsonify (serialization.py)
+
+@app.before_request
+def before_request_sync():
+    sync_shared_stores()
+CORS(app, expose_headers=['X-Next-Cursor', 'X-Sync-Token', 'X-Twin-Cache']) # Enable CORS for all routes
 
 # Initialize voice assistant
 voice_assistant = AgriVoiceAssistant()
 
+# Generated digital twins, shared by nearby / repeat farm requests
+twin_store = TwinStore(state=shared_state)
+
+# Dated mandi price snapshots behind /market-prices
+price_snapshots = PriceSnapshotStore()
+
 # Lazy loading for yield models (load only when needed)
 yield_models_loaded = False
 model = None
 scalers = None
 encoders = None
 feature_columns = None
-
-def load_yield_models():
-    """Lazy load yield models only when first requested"""
-    global yield_models_loaded, model, scalers, encoders, feature_columns
+yield_history = None # (crop, district, season) historical yields, see yield_history.py
+yield_model = None # pandas-free inference over model/encoders/feature_columns, see yield_inference.py
+yield_model_generation = 0 # bumped on every (re)load
+yield_surface = YieldSurface() # default-input predictions for the current/next year grid, see yield_surface.py
+
+# /predict/reload bumps a shared_state counter; every worker reloads once it sees a value newer than its own
+YIELD_RELOAD_CHECK_SECONDS = 1.0
+yield_reloads_seen = 0
+yield_reload_checked_at = 0.0
+
+def shared_yield_reloads():
+    return shared_state.counters('yield_models').get('reloads', 0)
+
+def yield_reload_pending():
+    """True when some worker's /predict/reload is newer than the models loaded here (polled at most once a second)."""
+    global yield_reload_checked_at
+    now = time.monotonic()
+    if now - yield_reload_checked_at < YIELD_RELOAD_CHECK_SECONDS:
+        return False
+    yield_reload_checked_at = now
+    return shared_yield_reloads() != yield_reloads_seen
+
+def load_yield_models(force=False):
+    """Lazy load yield models only when first requested (force=True reloads them from disk)"""
+    global yield_models_loaded, model, scalers, encoders, feature_columns, yield_history, yield_model, yield_model_generation, yield_reloads_seen
     print(f"load_yield_models called. Current state - yield_models_loaded: {yield_models_loaded}")
-    if not yield_models_loaded:
+    if yield_models_loaded and not force and yield_reload_pending():
+        print("Yield models were reloaded by another worker; reloading here")
+        force = True
+    if not yield_models_loaded or force:
+        reloads = shared_yield_reloads() # read first, so a reload requested while loading is not missed
         try:
+            # Loaded into locals first so a failed reload leaves the previous models serving
             print("Attempting to load yield prediction models...")
             print("Loading model...")
-            model = joblib.load('models/yield_prediction_model.pkl')
+            new_model = joblib.load('models/yield_prediction_model.pkl')
             print("Model loaded successfully")
             print("Loading scalers...")
-            scalers = joblib.load('models/scalers.pkl')
+            new_scalers = joblib.load('models/scalers.pkl')
             print("Scalers loaded successfully")
             print("Loading encoders...")
-            encoders = joblib.load('models/encoders.pkl')
+            new_encoders = joblib.load('models/encoders.pkl')
             print("Encoders loaded successfully")
             print("Loading feature columns...")
-            feature_columns = joblib.load('models/feature_columns.pkl')
+            new_feature_columns = joblib.load('models/feature_columns.pkl')
             print("Feature columns loaded successfully")
+            new_yield_model = FastYieldModel(new_model, new_encoders, new_feature_columns)
+            new_yield_history = None
+            try:
+                new_yield_history = YieldHistory.load(YIELD_HISTORY_FILE)
+                print("Historical yield index loaded successfully")
+            except Exception as e:
+                # Requests must then supply production_tonnes and the yield trends themselves
+                print(f"Historical yield index not available (run train_yield_model.py): {e}")
+            model, scalers, encoders, feature_columns = new_model, new_scalers, new_encoders, new_feature_columns
+            yield_model, yield_history = new_yield_model, new_yield_history
+            yield_model_generation += 1 # invalidates the previous yield surface
+            yield_reloads_seen = reloads
             yield_models_loaded = True
             print("Yield prediction models loaded successfully")
         except Exception as e:
             print(f"Yield prediction models not available: {e}")
             import traceback
             traceback.print_exc()
+            return yield_models_loaded
+        try:
+            yield_surface.build(yield_model, resolve_yield_row, yield_model_generation, year_range=yield_year_range())
+        except Exception as e:
+            print(f"Yield surface not built: {e}")
     print(f"load_yield_models returning: {yield_models_loaded}")
     return yield_models_loaded
 
@@ -312,6 +471,18 @@ def predict_disease(image_path, model_path="sklearn_model_output/model.pkl", lab
 
 @app.route('/predict', methods=['POST'])
 def predict_yield():
+    """
+    Yield prediction for {crop, district, season, year[, area_hectares,
+    production_tonnes, yield_trend_3yr, yield_trend_5yr]}.
+
+    Omitted area / production / trends come from the historical yield index
+    (models/yield_history_index.json, written by train_yield_model.py from
+    data/bihar_agricultural_data.csv). The index is not shipped; until it is
+    built, every one of those four fields is required: a request without
+    area_hectares gets 400 'Missing field: area_hectares', and one without
+    production_tonnes or a trend gets 400 'Historical yield index not
+    available'. 503 only means the models themselves failed to load.
+    """
     print("Attempting to load yield models...")
     models_loaded = load_yield_models()
     print(f"Models loaded: {models_loaded}")
@@ -321,45 +492,180 @@ def predict_yield():
 
     try:
         data = request.json
+        # Default area / trend inputs: answered from the precomputed surface
+        cached = surface_lookup(data)
+        if cached is not None:
+            return yield_response(cached)
+
+        inputs, error = resolve_yield_inputs(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        # Make prediction (float32 feature vector, no DataFrame)
+        numeric = numeric_features(
+            inputs['year'], inputs['area_hectares'], inputs['production_tonnes'],
+            inputs['yield_trend_3yr'], inputs['yield_trend_5yr'], yield_year_range()
+        )
+        prediction = yield_model.predict(inputs['crop'], inputs['district'], inputs['season'], numeric)
+        return yield_response({**inputs, **prediction_result(prediction)})
 
-        # Create input dataframe
-        # Use the same year normalization approach as in training
-        # Based on the dataset range (2010 to 2023)
-        year_min, year_max = 2010, 2023
-        
-        # Get historical average for better estimates
-        hist_avg = get_historical_average(data['crop'], data['district'])
-        
-        input_data = pd.DataFrame([{
-            'year_normalized': (data['year'] - year_min) / (year_max - year_min),
-            'crop_encoded': encoders['crop'].transform([data['crop']])[0],
-            'district_encoded': encoders['district'].transform([data['district']])[0],
-            'season_encoded': encoders['season'].transform([data['season']])[0],
-            'area_hectares': data['area_hectares'],
-            'production_tonnes': data.get('production_tonnes', data['area_hectares'] * (hist_avg / 1000)),  # Convert kg to tonnes
-            'area_log': np.log1p(data['area_hectares']),
-            'production_log': np.log1p(data.get('production_tonnes', data['area_hectares'] * (hist_avg / 1000))),
-            'yield_trend_3yr': data.get('yield_trend_3yr', hist_avg),
-            'yield_trend_5yr': data.get('yield_trend_5yr', hist_avg)
-        }])
-
-        # Make prediction
-        prediction = model.predict(input_data)[0]
-
-        # Calculate confidence interval (±15%)
-        lower = prediction * 0.85
-        upper = prediction * 1.15
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
 
-        return jsonify({
-            'predicted_yield': float(prediction),
-            'confidence_interval': {
-                'lower': float(lower),
-                'upper': float(upper)
-            }
-        })
+MAX_BATCH_PREDICTIONS = 100000
 
-    except Exception as e:
+def yield_response(result):
+    # Prediction with its confidence interval (±15%) plus the historical baseline used
+    return jsonify({
+        'predicted_yield': result['predicted_yield'],
+        'confidence_interval': result['confidence_interval'],
+        'historical_average': result['historical_average'],
+        'history_level': result['history_level']
+    })
+
+def surface_lookup(data):
+    """Precomputed result for a request that leaves area and trends to their defaults, else None."""
+    if not isinstance(data, dict) or not uses_defaults(data):
+        return None
+    try:
+        return yield_surface.get(data.get('crop'), data.get('district'), data.get('season'), data.get('year'), yield_model_generation)
+    except TypeError: # unhashable values; let validation report them
+        return None
+
+def yield_year_range():
+    # Same year normalization as in training (dataset year range)
+    return tuple(yield_history.years) if yield_history and yield_history.years else DEFAULT_YEAR_RANGE
+
+def resolve_yield_inputs(data):
+    """
+    Model inputs for one /predict-style request as (inputs, error). Values the
+    farmer doesn't know (area, production, yield trends) default to the
+    precomputed historical index (O(1); falls back to crop-only then
+    district-only averages).
+    """
+    for field in ('crop', 'district', 'season', 'year'):
+        if data.get(field) is None:
+            return None, f'Missing field: {field}'
+    for field in ('year', 'area_hectares', 'production_tonnes', 'yield_trend_3yr', 'yield_trend_5yr'):
+        value = data.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return None, f'{field} must be a number'
+    crop, district, season = data['crop'], data['district'], data['season']
+    for name, label in (('crop', crop), ('district', district), ('season', season)):
+        if label not in yield_model.codes[name]:
+            return None, f'Unknown {name}: {label}'
+
+    history, history_level = (None, None)
+    if yield_history is not None:
+        history, history_level = yield_history.lookup(crop, district, season)
+    hist_avg = history['mean_yield'] if history else None
+    area = data.get('area_hectares')
+    if area is None:
+        if not history:
+            return None, 'Missing field: area_hectares'
+        area = history['area_hectares']
+    if hist_avg is None and not all(data.get(k) is not None for k in ('production_tonnes', 'yield_trend_3yr', 'yield_trend_5yr')):
+        if yield_history is None:
+            return None, 'Historical yield index not available'
+        return None, f"No historical yield data for {crop} in {district}"
+
+    production = data.get('production_tonnes')
+    trend_3yr = data.get('yield_trend_3yr')
+    trend_5yr = data.get('yield_trend_5yr')
+    return {
+        'crop': crop,
+        'district': district,
+        'season': season,
+        'year': data['year'],
+        'area_hectares': area,
+        'production_tonnes': production if production is not None else area * (hist_avg / 1000), # kg -> tonnes
+        'yield_trend_3yr': trend_3yr if trend_3yr is not None else (history['trend_3yr'] if history else hist_avg),
+        'yield_trend_5yr': trend_5yr if trend_5yr is not None else (history['trend_5yr'] if history else hist_avg),
+        'historical_average': hist_avg,
+        'history_level': history_level
+    }, None
+
+def resolve_yield_row(row):
+    if not isinstance(row, dict):
+        return None, 'Each row must be an object'
+    try:
+        return resolve_yield_inputs(row)
+    except (TypeError, ValueError) as e:
+        return None, str(e)
+
+def prediction_stream(rows):
+    """NDJSON body: one prediction (or {'index', 'error'}) per row, scored a chunk at a time."""
+    for result in stream_predictions(yield_model, rows, resolve_yield_row, yield_year_range(), lookup=surface_lookup):
+        yield dumps_json(result) + b"\n"
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_yield_batch():
+    """
+    Many /predict requests at once: body is a JSON array of /predict bodies
+    (or {"rows": [...]}). Streams NDJSON, one line per row in input order.
+    """
+    if not load_yield_models():
+        return jsonify({'error': 'Yield prediction models not available'}), 503
+    data = request.get_json(silent=True)
+    rows = data.get('rows') if isinstance(data, dict) else data
+    if not isinstance(rows, list):
+        return jsonify({'error': 'Expected a JSON array of rows'}), 400
+    if len(rows) > MAX_BATCH_PREDICTIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_PREDICTIONS} rows per batch'}), 413
+    return Response(stream_with_context(prediction_stream(rows)), mimetype='application/x-ndjson')
+
+@app.route('/predict/sweep', methods=['POST'])
+def predict_yield_sweep():
+    """
+    Scenario sweep over the cartesian product of
+      crops, districts, seasons   (default: every value the model knows)
+      years                       (default: current year)
+      area_hectares               (default: historical area for each crop/district/season)
+    plus optional fixed production_tonnes / yield_trend_3yr / yield_trend_5yr.
+    Streams NDJSON like /predict/batch.
+    """
+    if not load_yield_models():
+        return jsonify({'error': 'Yield prediction models not available'}), 503
+    data = request.get_json(silent=True) or {}
+    try:
+        axes = [
+            data.get('crops') or list(yield_model.codes['crop']),
+            data.get('districts') or list(yield_model.codes['district']),
+            data.get('seasons') or list(yield_model.codes['season']),
+            data.get('years') or [datetime.now().year],
+            data.get('area_hectares') or [None]
+        ]
+        if not all(isinstance(axis, list) for axis in axes):
+            raise ValueError('Sweep axes must be arrays')
+    except (TypeError, ValueError) as e:
         return jsonify({'error': str(e)}), 400
+    total = 1
+    for axis in axes:
+        total *= len(axis)
+    if total > MAX_BATCH_PREDICTIONS:
+        return jsonify({'error': f'Sweep has {total} scenarios; at most {MAX_BATCH_PREDICTIONS} allowed'}), 413
+
+    fixed = {k: data[k] for k in ('production_tonnes', 'yield_trend_3yr', 'yield_trend_5yr') if data.get(k) is not None}
+    rows = (
+        {'crop': crop, 'district': district, 'season': season, 'year': year, 'area_hectares': area, **fixed}
+        for crop, district, season, year, area in itertools.product(*axes)
+    )
+    response = Response(stream_with_context(prediction_stream(rows)), mimetype='application/x-ndjson')
+    response.headers['X-Scenario-Count'] = str(total)
+    return response
+
+@app.route('/predict/reload', methods=['POST'])
+def reload_yield_models():
+    """
+    Reload the yield models from models/ (after retraining) and rebuild the
+    yield surface. Other workers pick the reload up within
+    YIELD_RELOAD_CHECK_SECONDS of their next yield request.
+    """
+    shared_state.incr_many('yield_models', {'reloads': 1})
+    generation = yield_model_generation
+    if not load_yield_models(force=True) or yield_model_generation == generation:
+        return jsonify({'error': 'Yield prediction models could not be reloaded'}), 500
+    return jsonify({'generation': yield_model_generation, 'surface': yield_surface.stats()})
 
 @app.route('/crops', methods=['GET'])
 def get_crops():
@@ -385,6 +691,14 @@ def get_districts():
 def health_check():
     return jsonify({'status': 'ok', 'message': 'API server is running'})
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """LLM latency/token/cache metrics (Prometheus text, or ?format=json)"""
+    if request.args.get('format') == 'json':
+        return jsonify({**llm_metrics.snapshot(), 'responseCache': response_cache.stats(), 'yieldSurface': yield_surface.stats(),
+                        'cropLossRollup': crop_loss_rollup.stats()})
+    return Response(llm_metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/detect-disease', methods=['POST'])
 def detect_disease():
     try:
@@ -594,7 +908,7 @@ def get_voice_examples():
 def handle_demands():
     print(f"Demands Endpoint Hit: {request.method}")
     if request.method == 'GET':
-        return jsonify(load_demands())
+        return list_response(demands_store)
     
     if request.method == 'POST':
         try:
@@ -603,15 +917,112 @@ def handle_demands():
             new_demand['id'] = str(uuid.uuid4())
             new_demand['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
-            demands = load_demands()
-            demands.append(new_demand)
-            save_demands(demands)
+            demands_store.insert(new_demand)
             
             return jsonify({"message": "Demand posted successfully", "demand": new_demand}), 201
         except Exception as e:
             print(f"Error saving demand: {e}")
             return jsonify({"error": str(e)}), 500
 
+def format_matches(matches, store):
+    results = []
+    for score, record_id, breakdown in matches:
+        record = store.get(record_id)
+        if record is not None:
+            results.append({'score': score, 'breakdown': breakdown, 'match': record})
+    return results
+
+def parse_match_k():
+    """?k= for the match endpoints: (k, None), or (None, error) unless it is an integer in 1..TOP_K."""
+    value = request.args.get('k')
+    if value is None or value == '':
+        return matching_engine.k, None
+    try:
+        k = int(value)
+    except ValueError:
+        k = None
+    if k is None or not 1 <= k <= matching_engine.k:
+        return None, f"k must be an integer between 1 and {matching_engine.k}"
+    return k, None
+
+@app.route('/demands/<demand_id>/matches', methods=['GET'])
+def get_demand_matches(demand_id):
+    """Best listings for a buyer demand (?k=1..10, default 10)."""
+    k, error = parse_match_k()
+    if error:
+        return jsonify({'error': error}), 400
+    matches = matching_engine.matches_for_demand(demand_id, k)
+    if matches is None:
+        return jsonify({'error': 'Demand not found'}), 404
+    return jsonify(format_matches(matches, listings_store))
+
+@app.route('/listings/<listing_id>/matches', methods=['GET'])
+def get_listing_matches(listing_id):
+    """Best open buyer demands for a listing (?k=1..10, default 10)."""
+    k, error = parse_match_k()
+    if error:
+        return jsonify({'error': error}), 400
+    matches = matching_engine.matches_for_listing(listing_id, k)
+    if matches is None:
+        return jsonify({'error': 'Listing not found'}), 404
+    return jsonify(format_matches(matches, demands_store))
+
+def build_fertilizer_request(data):
+    """Chat completion arguments for /recommend-fertilizer (shared by the Flask and ASGI servers)."""
+    prompt = f"""
+    You are an expert agricultural scientist following ICAR (Indian Council of Agricultural Research) and FAO standards.
+    Analyze the following field data and provide a precise fertilizer and irrigation plan.
+
+    Field Data:
+    - Crop: {data.get('crop')}
+    - Soil N-P-K: {data.get('soil_n')}-{data.get('soil_p')}-{data.get('soil_k')}
+    - Soil pH: {data.get('soil_ph')}
+    - Soil Moisture: {data.get('soil_moisture')}%
+    - Rainfall Forecast: {data.get('rainfall')} mm
+    - Growth Stage: {data.get('stage')}
+    - Soil Type: {data.get('soil_type')}
+
+    Task:
+    1. Calculate N-P-K recommendation in kg/ha based on crop needs and soil status.
+    2. Provide irrigation advice based on moisture and rainfall.
+    3. Suggest pH corrections if needed.
+    4. List 2-3 specific agronomic adjustments (e.g., split application).
+
+    Return ONLY valid JSON in this exact structure:
+    {{
+        "source": "AgriSphere AI (ICAR/FAO Standards)",
+        "fertilizer": {{
+            "nitrogen": "XX kg/ha",
+            "phosphorus": "XX kg/ha",
+            "potassium": "XX kg/ha",
+            "adjustments": ["Tip 1", "Tip 2"]
+        }},
+        "soil_health": {{
+            "ph_status": {data.get('soil_ph')},
+            "ph_recommendation": "Advice for pH correction or maintenance",
+            "recommendation": "General soil health tip"
+        }},
+        "irrigation": {{
+            "status": "Irrigate Immediately" OR "No Irrigation Needed",
+            "water_amount": "XX mm",
+            "schedule": {{
+                "next_3_days": "Rain Expected" OR "Clear"
+            }}
+        }}
+    }}
+    """
+
+    return {
+        'model': "llama-3.3-70b-versatile",
+        'messages': [
+            {"role": "system", "content": "You are a helpful agricultural AI. Output valid JSON only."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.2,
+        'max_tokens': 600,
+        'response_format': {"type": "json_object"}
+    }
+
 @app.route('/recommend-fertilizer', methods=['POST'])
 def recommend_fertilizer():
     """
@@ -625,70 +1036,16 @@ def recommend_fertilizer():
         print(f"Recommendation Request: {data}")
 
         # Initialize Groq client
-        from groq import Groq
-        api_key = os.getenv("GROQ_API_KEY") or os.getenv("VITE_GROQ_CHATBOT_API_KEY")
+        api_key = llm_client.get_api_key()
         if not api_key:
              return jsonify({'error': 'GROQ_API_KEY not found'}), 500
              
-        client = Groq(api_key=api_key)
-
-        # Construct Prompt
-        prompt = f"""
-        You are an expert agricultural scientist following ICAR (Indian Council of Agricultural Research) and FAO standards.
-        Analyze the following field data and provide a precise fertilizer and irrigation plan.
-
-        Field Data:
-        - Crop: {data.get('crop')}
-        - Soil N-P-K: {data.get('soil_n')}-{data.get('soil_p')}-{data.get('soil_k')}
-        - Soil pH: {data.get('soil_ph')}
-        - Soil Moisture: {data.get('soil_moisture')}%
-        - Rainfall Forecast: {data.get('rainfall')} mm
-        - Growth Stage: {data.get('stage')}
-        - Soil Type: {data.get('soil_type')}
-
-        Task:
-        1. Calculate N-P-K recommendation in kg/ha based on crop needs and soil status.
-        2. Provide irrigation advice based on moisture and rainfall.
-        3. Suggest pH corrections if needed.
-        4. List 2-3 specific agronomic adjustments (e.g., split application).
-
-        Return ONLY valid JSON in this exact structure:
-        {{
-            "source": "AgriSphere AI (ICAR/FAO Standards)",
-            "fertilizer": {{
-                "nitrogen": "XX kg/ha",
-                "phosphorus": "XX kg/ha",
-                "potassium": "XX kg/ha",
-                "adjustments": ["Tip 1", "Tip 2"]
-            }},
-            "soil_health": {{
-                "ph_status": {data.get('soil_ph')},
-                "ph_recommendation": "Advice for pH correction or maintenance",
-                "recommendation": "General soil health tip"
-            }},
-            "irrigation": {{
-                "status": "Irrigate Immediately" OR "No Irrigation Needed",
-                "water_amount": "XX mm",
-                "schedule": {{
-                    "next_3_days": "Rain Expected" OR "Clear"
-                }}
-            }}
-        }}
-        """
+        client = llm_client.get_client(api_key)
 
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a helpful agricultural AI. Output valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=600,
-            response_format={"type": "json_object"}
-        )
+        completion = llm_client.chat_completion(client, "fertilizer_recommendation", **build_fertilizer_request(data))
 
         response_content = completion.choices[0].message.content
-        recommendation = json.loads(response_content)
+        recommendation = llm_client.parse_json("fertilizer_recommendation", response_content)
         
         return jsonify(recommendation)
         
@@ -696,6 +1053,60 @@ def recommend_fertilizer():
         print(f"Groq Recommendation Error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def build_pest_request(data):
+    """Chat completion arguments for /predict-pest."""
+    # Get next 7 days for forecast labels
+    days = [(datetime.now() + timedelta(days=i)).strftime("%a") for i in range(7)]
+    days_str = ", ".join(days)
+
+    prompt = f"""
+    You are an expert agricultural entomologist following strictly ICAR (Indian Council of Agricultural Research) and FAO protocols.
+    Analyze the following environmental conditions and predict the pest attack risk for the specified crop.
+
+    Conditions:
+    - Crop: {data.get('crop')}
+    - Temperature: {data.get('temp')}°C
+    - Humidity: {data.get('humidity')}%
+    - Rainfall: {data.get('rainfall')} mm
+
+    Task:
+    1. Identify the most likely pest threat for this crop under these conditions according to Indian agricultural region standards.
+    2. Estimate the risk probability (0-100%).
+    3. Determine risk level (Low/Medium/High).
+    4. Provide a specific preventive or curative recommendation (ICAR approved).
+    5. Forecast risk trend for the next 7 days ({days_str}) based on simple weather assumptions (e.g., if high humidity persists).
+
+    Return ONLY valid JSON in this exact structure:
+    {{
+        "primary_pest": {{
+            "pest_name": "Name of Pest",
+            "risk_score": 85,
+            "risk_level": "High",
+            "recommendation": "Specific advice"
+        }},
+        "forecast_7_days": [
+            {{ "day": "{days[0]}", "risk_score": 80 }},
+            {{ "day": "{days[1]}", "risk_score": 82 }},
+            {{ "day": "{days[2]}", "risk_score": 75 }},
+            {{ "day": "{days[3]}", "risk_score": 70 }},
+            {{ "day": "{days[4]}", "risk_score": 65 }},
+            {{ "day": "{days[5]}", "risk_score": 60 }},
+            {{ "day": "{days[6]}", "risk_score": 55 }}
+        ]
+    }}
+    """
+
+    return {
+        'model': "llama-3.3-70b-versatile",
+        'messages': [
+            {"role": "system", "content": "You are a helpful agricultural AI. Output valid JSON only."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.2,
+        'max_tokens': 600,
+        'response_format': {"type": "json_object"}
+    }
+
 @app.route('/predict-pest', methods=['POST'])
 def predict_pest():
     """
@@ -709,68 +1120,16 @@ def predict_pest():
         print(f"Pest Prediction Request: {data}")
 
         # Initialize Groq client
-        from groq import Groq
-        api_key = os.getenv("GROQ_API_KEY") or os.getenv("VITE_GROQ_CHATBOT_API_KEY")
+        api_key = llm_client.get_api_key()
         if not api_key:
              return jsonify({'error': 'GROQ_API_KEY not found'}), 500
              
-        client = Groq(api_key=api_key)
-        
-        # Get next 7 days for forecast labels
-        from datetime import datetime, timedelta
-        days = [(datetime.now() + timedelta(days=i)).strftime("%a") for i in range(7)]
-        days_str = ", ".join(days)
-
-        prompt = f"""
-        You are an expert agricultural entomologist following strictly ICAR (Indian Council of Agricultural Research) and FAO protocols.
-        Analyze the following environmental conditions and predict the pest attack risk for the specified crop.
-
-        Conditions:
-        - Crop: {data.get('crop')}
-        - Temperature: {data.get('temp')}°C
-        - Humidity: {data.get('humidity')}%
-        - Rainfall: {data.get('rainfall')} mm
-
-        Task:
-        1. Identify the most likely pest threat for this crop under these conditions according to Indian agricultural region standards.
-        2. Estimate the risk probability (0-100%).
-        3. Determine risk level (Low/Medium/High).
-        4. Provide a specific preventive or curative recommendation (ICAR approved).
-        5. Forecast risk trend for the next 7 days ({days_str}) based on simple weather assumptions (e.g., if high humidity persists).
-
-        Return ONLY valid JSON in this exact structure:
-        {{
-            "primary_pest": {{
-                "pest_name": "Name of Pest",
-                "risk_score": 85,
-                "risk_level": "High",
-                "recommendation": "Specific advice"
-            }},
-            "forecast_7_days": [
-                {{ "day": "{days[0]}", "risk_score": 80 }},
-                {{ "day": "{days[1]}", "risk_score": 82 }},
-                {{ "day": "{days[2]}", "risk_score": 75 }},
-                {{ "day": "{days[3]}", "risk_score": 70 }},
-                {{ "day": "{days[4]}", "risk_score": 65 }},
-                {{ "day": "{days[5]}", "risk_score": 60 }},
-                {{ "day": "{days[6]}", "risk_score": 55 }}
-            ]
-        }}
-        """
+        client = llm_client.get_client(api_key)
 
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a helpful agricultural AI. Output valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=600,
-            response_format={"type": "json_object"}
-        )
+        completion = llm_client.chat_completion(client, "pest_prediction", **build_pest_request(data))
 
         response_content = completion.choices[0].message.content
-        result = json.loads(response_content)
+        result = llm_client.parse_json("pest_prediction", response_content)
         
         return jsonify(result)
         
@@ -813,33 +1172,61 @@ def market_prices():
         
         print(f"Fetching prices for: {state}, {district}, {market}")
         
-        prices = market_engine.get_market_prices(state, district, market, category)
+        # Same-day requests are served from the snapshot store
+        prices = price_snapshots.get_or_fetch(state, district, market, category, market_engine.get_market_prices)
         return jsonify(prices)
         
     except Exception as e:
         print(f"Market Prices Error: {e}")
         return jsonify({'error': str(e)}), 500
 
-LISTINGS_FILE = 'marketplace_listings.json'
+@app.route('/market-prices/history', methods=['GET'])
+def market_prices_history():
+    """
+    Stored price snapshots for a district between two dates (no LLM call).
+    Query: state, district, category (default All), from/to (YYYY-MM-DD)
+    """
+    state = request.args.get('state')
+    district = request.args.get('district')
+    if not state or not district:
+        return jsonify({'error': 'State and District are required'}), 400
 
-def load_listings():
-    if not os.path.exists(LISTINGS_FILE):
-        return []
     try:
-        with open(LISTINGS_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return []
+        start = request.args.get('from')
+        end = request.args.get('to')
+        snapshots = price_snapshots.history(
+            state, district, request.args.get('category', 'All'),
+            datetime.fromisoformat(start).date() if start else None,
+            datetime.fromisoformat(end).date() if end else None
+        )
+        return jsonify(snapshots)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date: {e}'}), 400
+
+@app.route('/market-prices/warm', methods=['POST'])
+def warm_market_prices():
+    """Start the bulk warm-up of today's snapshots in the background."""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    try:
+        districts = parse_districts(data['districts']) if 'districts' in data else TOP_DISTRICTS
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    category = data.get('category', 'All')
+    if not isinstance(category, str):
+        return jsonify({'error': 'category must be a string'}), 400
 
-def save_listings(listings):
-    with open(LISTINGS_FILE, 'w') as f:
-        json.dump(listings, f, indent=4)
+    threading.Thread(
+        target=price_snapshots.warm_up, args=(districts, category, market_engine.get_market_prices),
+        daemon=True
+    ).start()
+    return jsonify({'status': 'warming', 'districts': len(districts)}), 202
 
 @app.route('/listings', methods=['GET', 'POST'])
 def handle_listings():
     if request.method == 'GET':
-        listings = load_listings()
-        return jsonify(listings)
+        return list_response(listings_store)
     
     if request.method == 'POST':
         data = request.json
@@ -852,7 +1239,7 @@ def handle_listings():
                 return jsonify({'error': f'Missing field: {field}'}), 400
                 
         new_listing = {
-            'id': f"list_{int(datetime.now().timestamp())}",
+            'id': f"list_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:6]}",
             'farmerName': data['farmerName'],
             'contactNumber': data['contactNumber'],
             'cropName': data['cropName'],
@@ -865,12 +1252,38 @@ def handle_listings():
             'verified': True # Mock verification
         }
         
-        listings = load_listings()
-        listings.insert(0, new_listing) # Add to top
-        save_listings(listings)
+        listings_store.insert(new_listing) # Newest first on read
         
         return jsonify(new_listing), 201
 
+@app.route('/search', methods=['GET'])
+def handle_search():
+    """
+    Search listings and community posts (English / Hindi).
+    ?q=tomato patna&type=listing|post&minPrice=&maxPrice=&minQuantity=&maxQuantity=&limit=20
+    """
+    kind = request.args.get('type')
+    if kind not in (None, 'listing', 'post'):
+        return jsonify({'error': 'type must be listing or post'}), 400
+    try:
+        ranges = {
+            key: float(request.args[arg]) if request.args.get(arg) else None
+            for key, arg in (('min_price', 'minPrice'), ('max_price', 'maxPrice'),
+                             ('min_quantity', 'minQuantity'), ('max_quantity', 'maxQuantity'))
+        }
+    except ValueError:
+        return jsonify({'error': 'Price and quantity filters must be numbers'}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+    hits = search_index.search(request.args.get('q', ''), kind=kind, limit=limit, **ranges)
+    stores = {'listing': listings_store, 'post': posts_store}
+    results = []
+    for hit_kind, record_id in hits:
+        record = stores[hit_kind].get(record_id)
+        if record is not None:
+            results.append({'type': hit_kind, 'record': record})
+    return jsonify({'query': request.args.get('q', ''), 'results': results})
+
 # Online Status Endpoints
 @app.route('/community/heartbeat', methods=['POST'])
 def handle_heartbeat():
@@ -883,25 +1296,11 @@ def handle_heartbeat():
 
 @app.route('/community/online', methods=['GET'])
 def get_online_users():
-    users = get_active_users()
-    return jsonify(users)
+    # ETag follows the tracker's version, so an unchanged poll is a 304 without copying or hashing the list
+    users, version = presence.snapshot()
+    return cached_json(('online', version), lambda: (users, {}))
 
 # Buyer Dashboard Models & Routes
-BUYER_INTERACTIONS_FILE = "buyer_interactions.json"
-
-def load_buyer_interactions():
-    if os.path.exists(BUYER_INTERACTIONS_FILE):
-        try:
-            with open(BUYER_INTERACTIONS_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
-
-def save_buyer_interactions(data):
-    with open(BUYER_INTERACTIONS_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
-
 @app.route('/buyer/insights', methods=['POST'])
 def get_buyer_insights_api():
     data = request.json
@@ -920,14 +1319,10 @@ def handle_buyer_interactions():
     if request.method == 'GET':
         # Filter by buyerId if provided query param
         buyer_id = request.args.get('buyerId')
-        interactions = load_buyer_interactions()
-        if buyer_id:
-            interactions = [i for i in interactions if i.get('buyerId') == buyer_id]
-        return jsonify(interactions)
+        return list_response(buyer_interactions_store, where=('buyerId', buyer_id) if buyer_id else None)
         
     if request.method == 'POST':
         data = request.json
-        interactions = load_buyer_interactions()
         
         new_interaction = {
             'id': str(uuid.uuid4()),
@@ -939,17 +1334,14 @@ def handle_buyer_interactions():
             'timestamp': datetime.now().isoformat()
         }
         
-        interactions.insert(0, new_interaction)
-        save_buyer_interactions(interactions)
+        buyer_interactions_store.insert(new_interaction)
         return jsonify({'message': 'Interaction recorded', 'id': new_interaction['id']}), 201
 
 # Community Endpoints
 @app.route('/community/posts', methods=['GET', 'POST'])
 def handle_community_posts():
-    data = load_community_data()
     if request.method == 'GET':
-        posts = data.get('posts', [])
-        return jsonify(posts)
+        return list_response(posts_store)
     
     if request.method == 'POST':
         new_post = request.json
@@ -961,20 +1353,13 @@ def handle_community_posts():
         new_post['likes'] = 0
         new_post['comments'] = []
         
-        # Ensure posts list exists
-        if 'posts' not in data:
-            data['posts'] = []
-            
-        data['posts'].insert(0, new_post)
-        save_community_data(data)
+        posts_store.insert(new_post) # 'post' event via publish_post_events
         return jsonify({'message': 'Post created', 'id': new_post['id']}), 201
 
 @app.route('/community/chat', methods=['GET', 'POST'])
 def handle_community_chat():
-    data = load_community_data()
     if request.method == 'GET':
-        chat = data.get('chat', [])
-        return jsonify(chat)
+        return list_response(chat_store)
     
     if request.method == 'POST':
         msg = request.json
@@ -984,27 +1369,12 @@ def handle_community_chat():
         msg['id'] = str(uuid.uuid4())
         msg['timestamp'] = datetime.now().isoformat()
         
-        # Ensure chat list exists
-        if 'chat' not in data:
-            data['chat'] = []
-            
-        data['chat'].append(msg)
-        # Keep only last 100 messages
-        if len(data['chat']) > 100:
-            data['chat'] = data['chat'][-100:]
-            
-        save_community_data(data)
+        chat_store.append(msg) # Ring buffer keeps only the last 100 messages; publishes the 'chat' event
         return jsonify({'message': 'Message sent'}), 201
 
 @app.route('/community/posts/<post_id>/comments', methods=['POST'])
 def handle_post_comment(post_id):
-    data = load_community_data()
-    posts = data.get('posts', [])
-    
-    # Find post
-    post_index = next((index for (index, d) in enumerate(posts) if d["id"] == post_id), None)
-    
-    if post_index is None:
+    if posts_store.get(post_id) is None:
         return jsonify({'error': 'Post not found'}), 404
         
     comment_data = request.json
@@ -1018,16 +1388,42 @@ def handle_post_comment(post_id):
         'timestamp': datetime.now().isoformat()
     }
     
-    # Initialize comments is it doesn't exist (legacy data support)
-    if 'comments' not in posts[post_index]:
-        posts[post_index]['comments'] = []
+    # Initialize comments if it doesn't exist (legacy data support)
+    def add_comment(post):
+        post.setdefault('comments', []).append(new_comment)
         
-    posts[post_index]['comments'].append(new_comment)
-    data['posts'] = posts # Update data structure
+    if posts_store.modify(post_id, add_comment) is None:
+        return jsonify({'error': 'Post not found'}), 404
     
-    save_community_data(data)
     return jsonify({'message': 'Comment added', 'comment': new_comment}), 201
 
+@app.route('/community/events', methods=['GET'])
+def community_events():
+    """
+    Server-Sent Events stream of post / comment / chat / presence events.
+    Holds a thread per subscriber; multi-worker deployments serve this route
+    from asgi_server.py instead (see gunicorn.conf.py).
+    Resumes after Last-Event-ID; ?username= keeps that user online while connected.
+    """
+    last_id = event_bus.resolve_last_id(request.headers.get('Last-Event-ID') or request.args.get('lastEventId'))
+    username = request.args.get('username')
+    on_tick = (lambda: update_user_status(username)) if username else None
+
+    return Response(
+        stream_with_context(event_bus.stream(last_id, on_tick)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/community/events/poll', methods=['GET'])
+def community_events_poll():
+    """Long-poll fallback: waits up to ?timeout= seconds for events after ?after=."""
+    if request.args.get('after') is None:
+        return jsonify(event_bus.poll_payload(event_bus.last_id, []))
+    last_id = event_bus.resolve_last_id(request.args.get('after'))
+    timeout = max(0, min(request.args.get('timeout', 25, type=float), 60))
+    return jsonify(event_bus.poll_payload(last_id, event_bus.wait(last_id, timeout)))
+
 @app.route('/generate-digital-twin', methods=['POST'])
 def generate_digital_twin():
     try:
@@ -1037,11 +1433,13 @@ def generate_digital_twin():
 
         print(f"Generating Digital Twin for: {data}")
         
-        # Call Groq to generate realistic farm data
-        success, result = generate_digital_twin_with_groq(data)
+        # Serve from the twin store; Groq is only called inline on a miss
+        success, result, cache_outcome = twin_store.get_or_generate(data, generate_digital_twin_with_groq)
         
         if success:
-            return jsonify(result)
+            response = jsonify(result)
+            response.headers['X-Twin-Cache'] = cache_outcome
+            return response
         else:
             return jsonify({'error': result}), 500
 
@@ -1049,96 +1447,138 @@ def generate_digital_twin():
         print(f"Error in digital twin generation: {e}")
         return jsonify({'error': str(e)}), 500
 
+def build_digital_twin_request(farm_data):
+    """Chat completion arguments for /generate-digital-twin."""
+    # Calculate hectares from acres (approx)
+    acres = float(farm_data.get('size', 10))
+    hectares = round(acres * 0.404686, 2)
+    
+    # Construct Location Context
+    lat = farm_data.get('latitude')
+    lng = farm_data.get('longitude')
+    location_text = ""
+    
+    if farm_data.get('town') and farm_data.get('district'):
+        location_text = f"{farm_data.get('town')}, {farm_data.get('district')}, {farm_data.get('state')}"
+    
+    prompt = f"""
+    Generate a realistic 'Digital Twin' dataset for a farm.
+    
+    INPUTS:
+    - Name: {farm_data.get('farmName')}
+    - Owner: {farm_data.get('ownerName')}
+    - Size: {acres} Acres ({hectares} Hectares)
+    - Location Coordinates: Lat {lat}, Lng {lng}
+    - Location Name: {location_text}
+    
+    Task:
+    1. **Location Resolution**: 
+       - If 'Location Name' is provided but Coordinates are missing/zero, ESTIMATE the Lat/Lng for that town/village.
+       - If Coordinates are provided, use them to identify the micro-region.
+       
+    2. **Agricultural Profiling (DIVERSITY IS CRITICAL)**:
+       - Create a UNIQUE profile specific to this exact location.
+       - **CRITICAL**: Generate AT LEAST 3-4 *DISTINCT* items for Pests and Crops. Do NOT repeat the same pest/crop 4 times.
+       - Example: If Pest 1 is "Stem Borer", Pest 2 MUST be different (e.g., "Leaf Folder").
+       - Example: Include variety in Crop Stages (e.g., one field "vegetative", another "flowering").
+
+    OUTPUT JSON format ONLY. Structure:
+    {{
+        "location": {{ "lat": 22.123, "lng": 88.123 }}, 
+        "farmBoundary": {{ "area": {hectares} }},
+        "visual_summary": "Located in [Town], [District]. The soil is [Type], suitable for [Crops].",
+        "soilZones": [
+            {{ "id": "zone-1", "soilType": "loamy", "ph": 6.5, "nutrients": {{ "nitrogen": 40, "phosphorus": 30, "potassium": 20 }}, "organicMatter": 3.5, "fertility": "high", "recommendations": ["specific advice"] }},
+            {{ "id": "zone-2", "soilType": "sandy loam", "ph": 7.0, "nutrients": {{ "nitrogen": 35, "phosphorus": 25, "potassium": 15 }}, "organicMatter": 3.0, "fertility": "medium", "recommendations": ["different advice"] }}
+        ],
+        "irrigationZones": [
+            {{ "id": "irrig-1", "type": "drip", "efficiency": 92, "status": "active" }}
+        ],
+        "pestProneAreas": [
+             {{ "id": "pest-1", "pestType": "Specific Pest A", "riskLevel": "high", "preventiveMeasures": ["measure A"] }},
+             {{ "id": "pest-2", "pestType": "Specific Pest B", "riskLevel": "medium", "preventiveMeasures": ["measure B"] }},
+             {{ "id": "pest-3", "pestType": "Specific Pest C", "riskLevel": "low", "preventiveMeasures": ["measure C"] }}
+        ],
+        "cropGrowthStages": [
+             {{ "id": "crop-1", "cropType": "Crop A", "stage": "vegetative", "health": 85, "plantingDate": "2024-11-01" }},
+             {{ "id": "crop-2", "cropType": "Crop B", "stage": "flowering", "health": 90, "plantingDate": "2024-10-15" }},
+             {{ "id": "crop-3", "cropType": "Crop C", "stage": "harvesting", "health": 80, "plantingDate": "2024-09-01" }}
+        ],
+        "weatherData": {{ "temperature": 28, "humidity": 60, "rainfall": 12, "windSpeed": 5 }}
+    }}
+    """
+
+    return {
+        'model': "llama-3.3-70b-versatile",
+        'messages': [
+            {"role": "system", "content": "You are an agricultural data scientist. Provide specific, variable, and diverse data. Never repeat the same item in a list."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.8,
+        'max_tokens': 2500,
+        'response_format': {"type": "json_object"}
+    }
+
 def generate_digital_twin_with_groq(farm_data):
     """
     Generate realistic digital twin data using Groq based on location (Lat/Lng OR Text) and size.
     """
     try:
-        from groq import Groq
-        api_key = os.getenv("GROQ_API_KEY") or os.getenv("VITE_GROQ_CHATBOT_API_KEY")
+        api_key = llm_client.get_api_key()
         if not api_key:
             return False, "Groq API Key missing"
 
-        client = Groq(api_key=api_key)
-        
-        # Calculate hectares from acres (approx)
-        acres = float(farm_data.get('size', 10))
-        hectares = round(acres * 0.404686, 2)
-        
-        # Construct Location Context
-        lat = farm_data.get('latitude')
-        lng = farm_data.get('longitude')
-        location_text = ""
-        
-        if farm_data.get('town') and farm_data.get('district'):
-            location_text = f"{farm_data.get('town')}, {farm_data.get('district')}, {farm_data.get('state')}"
-        
-        prompt = f"""
-        Generate a realistic 'Digital Twin' dataset for a farm.
-        
-        INPUTS:
-        - Name: {farm_data.get('farmName')}
-        - Owner: {farm_data.get('ownerName')}
-        - Size: {acres} Acres ({hectares} Hectares)
-        - Location Coordinates: Lat {lat}, Lng {lng}
-        - Location Name: {location_text}
-        
-        Task:
-        1. **Location Resolution**: 
-           - If 'Location Name' is provided but Coordinates are missing/zero, ESTIMATE the Lat/Lng for that town/village.
-           - If Coordinates are provided, use them to identify the micro-region.
-           
-        2. **Agricultural Profiling (DIVERSITY IS CRITICAL)**:
-           - Create a UNIQUE profile specific to this exact location.
-           - **CRITICAL**: Generate AT LEAST 3-4 *DISTINCT* items for Pests and Crops. Do NOT repeat the same pest/crop 4 times.
-           - Example: If Pest 1 is "Stem Borer", Pest 2 MUST be different (e.g., "Leaf Folder").
-           - Example: Include variety in Crop Stages (e.g., one field "vegetative", another "flowering").
-
-        OUTPUT JSON format ONLY. Structure:
-        {{
-            "location": {{ "lat": 22.123, "lng": 88.123 }}, 
-            "farmBoundary": {{ "area": {hectares} }},
-            "visual_summary": "Located in [Town], [District]. The soil is [Type], suitable for [Crops].",
-            "soilZones": [
-                {{ "id": "zone-1", "soilType": "loamy", "ph": 6.5, "nutrients": {{ "nitrogen": 40, "phosphorus": 30, "potassium": 20 }}, "organicMatter": 3.5, "fertility": "high", "recommendations": ["specific advice"] }},
-                {{ "id": "zone-2", "soilType": "sandy loam", "ph": 7.0, "nutrients": {{ "nitrogen": 35, "phosphorus": 25, "potassium": 15 }}, "organicMatter": 3.0, "fertility": "medium", "recommendations": ["different advice"] }}
-            ],
-            "irrigationZones": [
-                {{ "id": "irrig-1", "type": "drip", "efficiency": 92, "status": "active" }}
-            ],
-            "pestProneAreas": [
-                 {{ "id": "pest-1", "pestType": "Specific Pest A", "riskLevel": "high", "preventiveMeasures": ["measure A"] }},
-                 {{ "id": "pest-2", "pestType": "Specific Pest B", "riskLevel": "medium", "preventiveMeasures": ["measure B"] }},
-                 {{ "id": "pest-3", "pestType": "Specific Pest C", "riskLevel": "low", "preventiveMeasures": ["measure C"] }}
-            ],
-            "cropGrowthStages": [
-                 {{ "id": "crop-1", "cropType": "Crop A", "stage": "vegetative", "health": 85, "plantingDate": "2024-11-01" }},
-                 {{ "id": "crop-2", "cropType": "Crop B", "stage": "flowering", "health": 90, "plantingDate": "2024-10-15" }},
-                 {{ "id": "crop-3", "cropType": "Crop C", "stage": "harvesting", "health": 80, "plantingDate": "2024-09-01" }}
-            ],
-            "weatherData": {{ "temperature": 28, "humidity": 60, "rainfall": 12, "windSpeed": 5 }}
-        }}
-        """
+        client = llm_client.get_client(api_key)
+        completion = llm_client.chat_completion(client, "digital_twin", **build_digital_twin_request(farm_data))
 
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are an agricultural data scientist. Provide specific, variable, and diverse data. Never repeat the same item in a list."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.8,
-            max_tokens=2500,
-            response_format={"type": "json_object"}
-        )
-        
         response_content = completion.choices[0].message.content
-        result = json.loads(response_content)
+        result = llm_client.parse_json("digital_twin", response_content)
         return True, result
 
     except Exception as e:
         print(f"Groq generation error: {e}")
         return False, str(e)
 
+def build_health_request(data):
+    """Chat completion arguments for /analyze-health."""
+    prompt = f"""
+    You are an expert agricultural scientist. Analyze the following plant health findings and provide a summary assessment.
+    
+    Findings:
+    - Diseases: {json.dumps(data.get('diseases', []), indent=2)}
+    - Pests: {json.dumps(data.get('pests', []), indent=2)}
+    - Nutrient Deficiencies: {json.dumps(data.get('nutrients', []), indent=2)}
+    - Soil Analysis: {json.dumps(data.get('soil', {}), indent=2)}
+    
+    Task:
+    1. Determine an overall Health Score (0-100). 100 is perfect health, 0 is dead. Be realistic based on severity.
+    2. Assign a Health Status (one of: 'excellent', 'good', 'fair', 'poor', 'critical').
+    3. Provide 3 specific, high-priority, actionable recommendations for the farmer. Focus on the most critical issues first.
+       - Recommendations should be concise instructions (e.g., "Apply copper fungicide immediately").
+       
+    Return ONLY valid JSON in this exact structure:
+    {{
+        "score": 75,
+        "status": "fair",
+        "recommendations": [
+            "Recommendation 1",
+            "Recommendation 2",
+            "Recommendation 3"
+        ]
+    }}
+    """
+
+    return {
+        'model': "llama-3.3-70b-versatile",
+        'messages': [
+            {"role": "system", "content": "You are a helpful agricultural AI. Output valid JSON only."},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.3,
+        'max_tokens': 300,
+        'response_format': {"type": "json_object"}
+    }
+
 @app.route('/analyze-health', methods=['POST'])
 def analyze_health():
     """
@@ -1152,53 +1592,16 @@ def analyze_health():
         print(f"Health Analysis Request: {data}")
 
         # Initialize Groq client
-        from groq import Groq
-        api_key = os.getenv("GROQ_API_KEY") or os.getenv("VITE_GROQ_CHATBOT_API_KEY")
+        api_key = llm_client.get_api_key()
         if not api_key:
              return jsonify({'error': 'GROQ_API_KEY not found'}), 500
              
-        client = Groq(api_key=api_key)
+        client = llm_client.get_client(api_key)
 
-        prompt = f"""
-        You are an expert agricultural scientist. Analyze the following plant health findings and provide a summary assessment.
-        
-        Findings:
-        - Diseases: {json.dumps(data.get('diseases', []), indent=2)}
-        - Pests: {json.dumps(data.get('pests', []), indent=2)}
-        - Nutrient Deficiencies: {json.dumps(data.get('nutrients', []), indent=2)}
-        - Soil Analysis: {json.dumps(data.get('soil', {}), indent=2)}
-        
-        Task:
-        1. Determine an overall Health Score (0-100). 100 is perfect health, 0 is dead. Be realistic based on severity.
-        2. Assign a Health Status (one of: 'excellent', 'good', 'fair', 'poor', 'critical').
-        3. Provide 3 specific, high-priority, actionable recommendations for the farmer. Focus on the most critical issues first.
-           - Recommendations should be concise instructions (e.g., "Apply copper fungicide immediately").
-           
-        Return ONLY valid JSON in this exact structure:
-        {{
-            "score": 75,
-            "status": "fair",
-            "recommendations": [
-                "Recommendation 1",
-                "Recommendation 2",
-                "Recommendation 3"
-            ]
-        }}
-        """
-
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a helpful agricultural AI. Output valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=300,
-            response_format={"type": "json_object"}
-        )
+        completion = llm_client.chat_completion(client, "health_analysis", **build_health_request(data))
 
         response_content = completion.choices[0].message.content
-        result = json.loads(response_content)
+        result = llm_client.parse_json("health_analysis", response_content)
         
         return jsonify(result)
 
@@ -1209,27 +1612,19 @@ def analyze_health():
 # Government Dashboard Endpoints
 @app.route('/gov/stats', methods=['GET'])
 def get_gov_stats():
-    # Aggregate data for dashboard
-    listings = load_listings()
-    community = load_community_data()
-    crop_loss_cases = load_crop_loss_data()
+    # Aggregates are kept up to date on every write (gov_stats.py); gov_stats.version covers them all
+    return cached_json(('gov-stats', gov_stats.version), lambda: (build_gov_stats(), {}))
+
+def build_gov_stats():
+    totals, recent_listing_ids, recent_post_ids = gov_stats.snapshot()
+    listings = [l for l in map(listings_store.get, recent_listing_ids) if l]
+    posts = [p for p in map(posts_store.get, recent_post_ids) if p]
     
     # Calculate stats
     total_farmers = 1250 # Mock base
-    active_farmers = 850 + len(community.get('posts', []))
+    active_farmers = 850 + totals['totalIssues']
     
-    # Market stats
-    total_listings = len(listings)
-    total_volume = sum([float(l.get('quantity', 0)) for l in listings])
-    
-    # Community stats
-    total_issues = len(community.get('posts', []))
-    resolved_issues = len([p for p in community.get('posts', []) if len(p.get('comments', [])) > 0])
-    
-    # Pending cases
-    pending_cases = len([c for c in crop_loss_cases if c.get('status') == 'Pending'])
-    
-    return jsonify({
+    return {
         'overview': {
             'totalFarmers': total_farmers,
             'activeFarmers': active_farmers,
@@ -1238,13 +1633,13 @@ def get_gov_stats():
             'fieldsMapped': 560
         },
         'market': {
-            'totalListings': total_listings,
-            'totalVolume': total_volume,
-            'listings': listings[:5] # Top 5 recent
+            'totalListings': totals['totalListings'],
+            'totalVolume': totals['totalVolume'],
+            'listings': listings # Top 5 recent
         },
         'community': {
-            'totalIssues': total_issues,
-            'resolvedIssues': resolved_issues,
+            'totalIssues': totals['totalIssues'],
+            'resolvedIssues': totals['resolvedIssues'],
             'recenttopics': [{
                 'id': p.get('id'),
                 'title': p.get('title'),
@@ -1253,101 +1648,248 @@ def get_gov_stats():
                 'timestamp': p.get('timestamp'),
                 'likes': p.get('likes', 0),
                 'replies': len(p.get('comments', []))
-            } for p in community.get('posts', [])[:5]]
+            } for p in posts]
         },
         'cropLoss': {
-            'pendingCases': pending_cases,
+            'pendingCases': totals['pendingCases'],
             'totalDisbursed': 4500000 # Mock ₹
         }
-    })
+    }
+
+@app.route('/gov/stats/check', methods=['GET'])
+def check_gov_stats():
+    """Recompute the dashboard aggregates from scratch and compare (?repair=1 resets them on drift)."""
+    repair = request.args.get('repair') in ('1', 'true')
+    report = gov_stats.check(listings_store.all(), posts_store.all(), crop_loss_store.all(), repair=repair)
+    return jsonify(report)
 
 @app.route('/gov/crop-loss', methods=['GET', 'POST'])
 def handle_crop_loss():
-    cases = load_crop_loss_data()
-    
     if request.method == 'GET':
-        return jsonify(cases)
+        return list_response(crop_loss_store)
         
     if request.method == 'POST':
         data = request.json
         if not data:
             return jsonify({'error': 'No data provided'}), 400
             
-        # Parse detailed fields
-        damage_percentage = float(data.get('damagePercentage', 0))
-        cause = data.get('causeOfLoss', 'Unknown')
-        affected_area = float(data.get('affectedArea', 0))
-        crop_name = data.get('cropName', 'Unknown Crop')
-        
-        # Calculate Estimated Loss (Mock Logic)
-        # Avg Yield (Qt/Acre) * Avg Price (Rs/Qt) * Impact Area * Damage %
-        # Mock Yields & Prices
-        yields = {'Wheat': 20, 'Rice': 25, 'Cotton': 10, 'Maize': 30, 'Potato': 100}
-        prices = {'Wheat': 2275, 'Rice': 2200, 'Cotton': 6000, 'Maize': 2090, 'Potato': 1000}
-        
-        avg_yield = yields.get(crop_name, 20)
-        avg_price = prices.get(crop_name, 2000)
+        claim, error = crop_loss_engine.validate_claim(data, check_ranges=False) # bulk imports alone are range-checked
+        if error:
+            return jsonify({'error': error}), 400
         
-        estimated_loss_calc = (avg_yield * affected_area) * avg_price * (damage_percentage / 100)
+        # Loss, eligibility, scheme and compensation (crop_loss_engine.py)
+        new_case = crop_loss_engine.build_cases([claim])[0]
         
-        # Rule-based Logic
-        is_eligible = damage_percentage >= 33 and cause in ['Drought', 'Flood', 'Pest', 'Disease', 'Hailstorm', 'Heatwave']
-        
-        suggested_scheme = 'None'
-        if is_eligible:
-            suggested_scheme = 'PMFBY' if data.get('insuranceStatus') == 'Yes' else 'State Disaster Relief Fund (SDRF)'
-        
-        suggested_compensation = (estimated_loss_calc * 0.70) if is_eligible else 0
-
-        new_case = {
-            'id': f"case_{str(uuid.uuid4())[:8]}",
-            'farmerName': data.get('farmerName', 'Unknown Farmer'),
-            'crop': crop_name,
-            'season': data.get('season', 'Kharif'),
-            'damagePercentage': damage_percentage,
-            'cause': cause,
-            'status': 'Under Verification', # Default to Under Verification for digital claims
-            'timestamp': datetime.now().isoformat(),
-            'location': data.get('location', 'Unknown'),
-            'estimatedLoss': int(estimated_loss_calc),
-            'suggestedCompensation': int(suggested_compensation),
-            'isEligible': is_eligible,
-            'suggestedScheme': suggested_scheme,
-            'advisoryCompliance': data.get('advisoryCompliance', {}),
-            'evidence': data.get('evidence', 'No files uploaded')
-        }
-        
-        cases.insert(0, new_case)
-        save_crop_loss_data(cases)
+        crop_loss_store.insert(new_case)
         return jsonify(new_case), 201
 
+MAX_BULK_UPLOAD_BYTES = 50 * 1024 * 1024
+
+@app.route('/gov/crop-loss/bulk', methods=['POST'])
+def bulk_import_crop_loss():
+    """
+    Bulk claim import (NDJSON, or CSV with a header row; ?format= or Content-Type).
+    Valid rows are assessed in one vectorised pass and committed in a single
+    transaction; invalid rows are reported individually and skipped.
+    """
+    if request.content_length and request.content_length > MAX_BULK_UPLOAD_BYTES:
+        return jsonify({'error': 'Upload too large'}), 413
+
+    fmt = request.args.get('format') or ('csv' if 'csv' in (request.content_type or '') else 'ndjson')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+
+    try:
+        body = request.get_data(as_text=True)
+        cases, errors, total_rows = crop_loss_engine.assess_bulk(body, fmt)
+        if cases:
+            crop_loss_store.insert_many(cases)
+    except Exception as e:
+        print(f"Bulk crop-loss import error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'received': total_rows,
+        'imported': len(cases),
+        'rejected': len(errors),
+        'errors': errors,
+        'caseIds': [c['id'] for c in cases]
+    }), (201 if cases else 400)
+
+@app.route('/gov/crop-loss/rollup', methods=['GET'])
+def get_crop_loss_rollup():
+    """
+    Crop-loss breakdown, e.g. ?groupBy=location,crop&status=Pending&cause=Flood,Drought
+    Dimensions: location, crop, cause, season, status (filters take comma-separated values).
+    """
+    group_by = [d.strip() for d in request.args.get('groupBy', '').split(',') if d.strip()]
+    filters = {
+        dim: {v.strip() for v in request.args[dim].split(',') if v.strip()}
+        for dim in ROLLUP_DIMENSIONS if request.args.get(dim)
+    }
+    try:
+        return jsonify(crop_loss_rollup.query(group_by, filters))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/gov/crop-loss/<case_id>/action', methods=['POST'])
 def handle_crop_loss_action(case_id):
-    cases = load_crop_loss_data()
     action_data = request.json
     action = action_data.get('action') # 'approve', 'reject', 'verify'
     
-    case_index = next((index for (index, d) in enumerate(cases) if d["id"] == case_id), None)
+    def apply_action(case_to_update):
+        if action == 'approve':
+            case_to_update['status'] = 'Approved'
+        elif action == 'reject':
+            case_to_update['status'] = 'Rejected'
+        elif action == 'verify':
+            case_to_update['status'] = 'Under Verification'
+            case_to_update['verificationRequestedAt'] = datetime.now().isoformat()
+        # No else for invalid action to keep it simple or add check if needed, but existing code had basic check
     
-    if case_index is None:
+    case_to_update = crop_loss_store.modify(case_id, apply_action)
+    if case_to_update is None:
         return jsonify({'error': 'Case not found'}), 404
-        
-    case_to_update = cases[case_index]
-    
-    if action == 'approve':
-        case_to_update['status'] = 'Approved'
-    elif action == 'reject':
-        case_to_update['status'] = 'Rejected'
-    elif action == 'verify':
-        case_to_update['status'] = 'Under Verification'
-        case_to_update['verificationRequestedAt'] = datetime.now().isoformat()
-    # No else for invalid action to keep it simple or add check if needed, but existing code had basic check
-        
-    cases[case_index] = case_to_update
-    save_crop_loss_data(cases)
     
     return jsonify(case_to_update), 200
 
+# Composite dashboard endpoints: one round trip per page load, sections gathered in parallel (dashboards.py)
+BUYER_INSIGHTS_TTL = 15 * 60 # seconds
+
+def cached_buyer_insights(crop, state, district=''):
+    """Buyer insights through the shared_state cache: {'insights': ..., 'generatedAt': ...}."""
+    key = f"{crop}|{state}|{district}".lower()
+    entry = shared_state.get('buyer_insights', key)
+    llm_metrics.record_cache('buyer_insights', 'miss' if entry is None else 'hit')
+    if entry is None:
+        insights = market_engine.get_buyer_insights(crop, state, district)
+        entry = {'insights': insights, 'generatedAt': dashboards.now_iso()}
+        if insights != market_engine.BUYER_INSIGHTS_FALLBACK: # don't pin an LLM failure for the whole TTL
+            shared_state.set('buyer_insights', key, entry, ttl=BUYER_INSIGHTS_TTL)
+    return entry
+
+def store_section(store, limit=None, where=None):
+    records, _, sync_token = store.page(limit=limit, where=where)
+    return dashboards.section(records, sync_token)
+
+def dashboard_limit():
+    limit = parse_int_arg('limit')
+    return max(1, min(limit, MAX_PAGE_SIZE)) if limit is not None else None
+
+@app.route('/dashboard/gov', methods=['GET'])
+def get_gov_dashboard():
+    """/gov/stats + /gov/crop-loss in one payload (?limit=N caps the case list)."""
+    try:
+        limit = dashboard_limit()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return cached_json(('dashboard-gov', gov_stats.version, crop_loss_store.local_version()), lambda: (dashboards.gather({
+        'stats': lambda: dashboards.section(build_gov_stats(), gov_stats.version),
+        'cropLoss': lambda: store_section(crop_loss_store, limit)
+    }), {}))
+
+@app.route('/dashboard/marketplace', methods=['GET'])
+def get_marketplace_dashboard():
+    """/listings + /demands in one payload (?limit=N caps each list)."""
+    try:
+        limit = dashboard_limit()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return cached_json(('dashboard-marketplace', listings_store.local_version(), demands_store.local_version()), lambda: (dashboards.gather({
+        'listings': lambda: store_section(listings_store, limit),
+        'demands': lambda: store_section(demands_store, limit)
+    }), {}))
+
+@app.route('/dashboard/buyer', methods=['GET'])
+def get_buyer_dashboard():
+    """
+    /listings + /buyer/interactions (+ /buyer/insights) in one payload.
+    ?buyerId=  interactions of one buyer
+    ?crop=&state=&district=  adds the insights section (cached for BUYER_INSIGHTS_TTL)
+    ?limit=N   caps each list
+    """
+    try:
+        limit = dashboard_limit()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    buyer_id = request.args.get('buyerId')
+    crop = request.args.get('crop')
+    state = request.args.get('state')
+    district = request.args.get('district', '')
+
+    def build():
+        builders = {
+            'listings': lambda: store_section(listings_store, limit),
+            'interactions': lambda: store_section(buyer_interactions_store, limit, where=('buyerId', buyer_id) if buyer_id else None)
+        }
+        if crop and state:
+            def insights_section():
+                entry = cached_buyer_insights(crop, state, district)
+                return dashboards.section(entry['insights'], updated_at=entry['generatedAt'])
+            builders['insights'] = insights_section
+        return dashboards.gather(builders), {}
+
+    if crop and state:
+        # Insights come from a TTL cache with no write version, so no ETag for this variant
+        payload, _ = build()
+        return jsonify(payload)
+    return cached_json(('dashboard-buyer', listings_store.local_version(), buyer_interactions_store.local_version()), build)
+
+# Stores available to the NDJSON bulk endpoints (bulk_io.py)
+BULK_STORES = {
+    'listings': listings_store,
+    'demands': demands_store,
+    'posts': posts_store,
+    'buyer_interactions': buyer_interactions_store,
+    'crop_loss_cases': crop_loss_store,
+    'chat': chat_store
+}
+
+@app.route('/export/<store_name>', methods=['GET'])
+def export_store(store_name):
+    """Stream a whole store as NDJSON (oldest first), batch by batch."""
+    store = BULK_STORES.get(store_name)
+    if store is None:
+        return jsonify({'error': f'Unknown store: {store_name}'}), 404
+    try:
+        batch_size = max(1, min(parse_int_arg('batchSize') or bulk_io.DEFAULT_BATCH_SIZE, 10000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = Response(stream_with_context(bulk_io.export_ndjson(store, batch_size)), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename={store_name}.ndjson'
+    response.headers['X-Sync-Token'] = str(store.version())
+    return response
+
+@app.route('/import/<store_name>', methods=['POST'])
+def import_store(store_name):
+    """
+    Load an NDJSON upload into a store (?mode=insert|upsert, ?batchSize=N).
+    The body is read from the socket one batch at a time, each batch is
+    committed before the next is read, so uploads of any size use constant memory.
+    """
+    store = BULK_STORES.get(store_name)
+    if store is None:
+        return jsonify({'error': f'Unknown store: {store_name}'}), 404
+    mode = request.args.get('mode', 'insert')
+    if mode not in ('insert', 'upsert'):
+        return jsonify({'error': f'Invalid mode: {mode}'}), 400
+    if mode == 'upsert' and not bulk_io.supports_upsert(store):
+        return jsonify({'error': f'mode=upsert is not supported for {store_name}; use mode=insert'}), 400
+    try:
+        batch_size = max(1, min(parse_int_arg('batchSize') or bulk_io.DEFAULT_BATCH_SIZE, 10000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        report = bulk_io.import_ndjson(store, request.stream, mode, batch_size)
+    except Exception as e:
+        print(f"Bulk import error ({store_name}): {e}")
+        return jsonify({'error': str(e)}), 500
+
+    print(f"Imported into {store_name}: {report['inserted']} new, {report['updated']} updated, {report['rejected']} rejected")
+    return jsonify(report), (201 if report['inserted'] or report['updated'] else 400)
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("AgriSphere AI API Server Starting...")
@@ -1356,10 +1898,13 @@ if __name__ == '__main__':
     print("Health check: http://localhost:5000/health")
     print("Disease detection: POST to /detect-disease")
     print("Yield prediction: POST to /predict")
+    print("Batch yield prediction: POST to /predict/batch, /predict/sweep (NDJSON)")
     print("Voice assistant: POST to /voice-query")
     print("Fertilizer Recommendation: POST to /recommend-fertilizer")
     print("Pest Prediction: POST to /predict-pest")
     print("Market Advisory: POST to /market-advisory")
     print("Voice examples: GET /voice-examples")
+    print("LLM metrics: GET /metrics")
+    print("Dashboards: GET /dashboard/gov, /dashboard/buyer, /dashboard/marketplace")
     print("="*50 + "\n")
     app.run(debug=True, port=5000, threaded=True)
@@ -0,0 +1,193 @@
+"""
+ASGI serving mode for AgriSphere AI.
+
+The LLM-bound routes are served as native async views on top of the shared
+AsyncGroq client (llm_client.async_chat_completion), so a request waiting on
+Groq parks a coroutine instead of pinning a Flask thread. Every other route is
+delegated to the existing Flask app through a WSGI adapter, so clients see the
+same API surface on the same port.
+
+The community event stream (/community/events and its long-poll fallback) is
+also served here, so thousands of idle subscribers cost one coroutine each.
+
+Run with:
+    uvicorn asgi_server:app --port 5000
+
+Upstream concurrency and connection pooling are controlled by
+LLM_MAX_CONCURRENCY / LLM_MAX_KEEPALIVE (see llm_client.py).
+"""
+
+import contextlib
+from datetime import datetime
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route, Mount
+from a2wsgi import WSGIMiddleware
+
+import api_server
+import llm_client
+import market_engine
+from event_bus import bus as event_bus
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except Exception:
+        return None
+
+async def llm_json_view(request, template, build_request, label, empty_error='No input data provided'):
+    """Shared body of the prompt-in/JSON-out routes (mirrors the Flask handlers)."""
+    data = await read_json(request)
+    if not data:
+        return JSONResponse({'error': empty_error}, status_code=400)
+
+    print(f"{label} Request: {data}")
+    if not llm_client.get_api_key():
+        return JSONResponse({'error': 'GROQ_API_KEY not found'}, status_code=500)
+
+    try:
+        completion = await llm_client.async_chat_completion(template, **build_request(data))
+        return JSONResponse(llm_client.parse_json(template, completion.choices[0].message.content))
+    except Exception as e:
+        print(f"{label} Error: {e}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+async def recommend_fertilizer(request):
+    return await llm_json_view(request, "fertilizer_recommendation", api_server.build_fertilizer_request, "Recommendation")
+
+async def predict_pest(request):
+    return await llm_json_view(request, "pest_prediction", api_server.build_pest_request, "Pest Prediction")
+
+async def analyze_health(request):
+    return await llm_json_view(request, "health_analysis", api_server.build_health_request, "Health Analysis")
+
+async def generate_twin_with_groq_async(farm_data):
+    """Async generate_digital_twin_with_groq: (success, twin_or_error)."""
+    if not llm_client.get_api_key():
+        return False, 'Groq API Key missing'
+    try:
+        completion = await llm_client.async_chat_completion("digital_twin", **api_server.build_digital_twin_request(farm_data))
+        return True, llm_client.parse_json("digital_twin", completion.choices[0].message.content)
+    except Exception as e:
+        print(f"Groq generation error: {e}")
+        return False, str(e)
+
+async def generate_digital_twin(request):
+    data = await read_json(request)
+    if not data:
+        return JSONResponse({'error': 'No data provided'}, status_code=400)
+
+    success, result, outcome = await api_server.twin_store.get_or_generate_async(
+        data, generate_twin_with_groq_async, api_server.generate_digital_twin_with_groq
+    )
+    if not success:
+        return JSONResponse({'error': result}, status_code=500)
+    return JSONResponse(result, headers={'X-Twin-Cache': outcome})
+
+async def voice_query(request):
+    data = await read_json(request) or {}
+    query_text = data.get('text', '')
+    language_code = data.get('language', 'en-IN')
+
+    if not query_text:
+        return JSONResponse({'error': 'No query text provided'}, status_code=400)
+
+    try:
+        response = await api_server.voice_assistant.process_voice_input_async(query_text, language_code)
+        return JSONResponse({
+            'success': True,
+            'response': response,
+            'timestamp': str(datetime.now())
+        })
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+async def market_advisory(request):
+    data = await read_json(request)
+    if not data:
+        return JSONResponse({'error': 'No input data provided'}, status_code=400)
+
+    try:
+        return JSONResponse(await market_engine.analyze_market_async(data))
+    except Exception as e:
+        print(f"Market Advisory Error: {e}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+async def market_prices(request):
+    data = await read_json(request)
+    if not data:
+        return JSONResponse({'error': 'No input data provided'}, status_code=400)
+
+    state = data.get('state')
+    district = data.get('district')
+    category = data.get('category', 'All')
+
+    try:
+        prices = await api_server.price_snapshots.get_or_fetch_async(
+            state, district, data.get('market', 'General'), category, market_engine.get_market_prices_async
+        )
+        return JSONResponse(prices)
+    except Exception as e:
+        print(f"Market Prices Error: {e}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+async def buyer_insights(request):
+    data = await read_json(request) or {}
+    crop = data.get('crop')
+    state = data.get('state')
+
+    if not crop or not state:
+        return JSONResponse({'error': 'Crop and State are required'}, status_code=400)
+
+    return JSONResponse(await market_engine.get_buyer_insights_async(crop, state, data.get('district', '')))
+
+async def community_events(request):
+    """SSE stream (see api_server.community_events); an idle client is one parked coroutine."""
+    last_id = event_bus.resolve_last_id(request.headers.get('last-event-id') or request.query_params.get('lastEventId'))
+    username = request.query_params.get('username')
+    on_tick = (lambda: api_server.update_user_status(username)) if username else None
+
+    return StreamingResponse(
+        event_bus.stream_async(last_id, on_tick),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+async def community_events_poll(request):
+    after = request.query_params.get('after')
+    if after is None:
+        return JSONResponse(event_bus.poll_payload(event_bus.last_id, []))
+    last_id = event_bus.resolve_last_id(after)
+    try:
+        timeout = max(0, min(float(request.query_params.get('timeout', 25)), 60))
+    except ValueError:
+        timeout = 25
+    return JSONResponse(event_bus.poll_payload(last_id, await event_bus.wait_async(last_id, timeout)))
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    await llm_client.aclose_async_client()
+
+routes = [
+    Route('/voice-query', voice_query, methods=['POST']),
+    Route('/predict-pest', predict_pest, methods=['POST']),
+    Route('/recommend-fertilizer', recommend_fertilizer, methods=['POST']),
+    Route('/market-advisory', market_advisory, methods=['POST']),
+    Route('/market-prices', market_prices, methods=['POST']),
+    Route('/buyer/insights', buyer_insights, methods=['POST']),
+    Route('/generate-digital-twin', generate_digital_twin, methods=['POST']),
+    Route('/analyze-health', analyze_health, methods=['POST']),
+    Route('/community/events', community_events, methods=['GET']),
+    Route('/community/events/poll', community_events_poll, methods=['GET']),
+    # Everything else is served by the existing Flask app
+    Mount('/', app=WSGIMiddleware(api_server.app)),
+]
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
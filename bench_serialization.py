@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: stdlib json (what jsonify / the old save_* helpers
+used) vs. the serialization.py encoder, on synthetic /listings and
+/gov/crop-loss payloads.
+
+    python bench_serialization.py [--records 10000] [--repeat 5]
+"""
+
+import json
+import time
+import random
+import argparse
+
+import serialization
+
+CROPS = ['Wheat', 'Rice', 'Maize', 'Potato', 'Cotton', 'गेहूं', 'धान']
+DISTRICTS = ['Patna', 'Gaya', 'Muzaffarpur', 'Bhagalpur', 'Darbhanga', 'Purnia']
+
+def make_listings(n):
+    return [{
+        'id': f"list_{1700000000 + i}_{i:06x}",
+        'farmerName': f"Farmer {i}",
+        'contactNumber': f"98{i:08d}",
+        'cropName': random.choice(CROPS),
+        'quantity': random.randint(1, 500),
+        'price': random.randint(1500, 6000),
+        'location': f"{random.choice(DISTRICTS)}, Bihar",
+        'harvestDate': '2024-11-15',
+        'quality': 'Standard',
+        'timestamp': '2024-10-01 10:00:00',
+        'verified': True
+    } for i in range(n)]
+
+def make_cases(n):
+    return [{
+        'id': f"case_{i:012x}",
+        'farmerName': f"Farmer {i}",
+        'crop': random.choice(CROPS),
+        'season': random.choice(['Kharif', 'Rabi']),
+        'damagePercentage': random.uniform(0, 100),
+        'cause': random.choice(['Flood', 'Drought', 'Pest']),
+        'status': random.choice(['Pending', 'Approved', 'Under Verification']),
+        'timestamp': '2024-10-01T10:00:00',
+        'location': random.choice(DISTRICTS),
+        'estimatedLoss': random.randint(0, 200000),
+        'suggestedCompensation': random.randint(0, 140000),
+        'isEligible': random.random() > 0.5,
+        'suggestedScheme': 'PMFBY',
+        'advisoryCompliance': {'followedAdvisory': True, 'sowingDate': '2024-06-20'},
+        'evidence': 'No files uploaded'
+    } for i in range(n)]
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def report(label, before, after):
+    print(f"  {label:<34} {before:9.2f} ms {after:9.2f} ms {before / after:6.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    random.seed(42)
+
+    print(f"encoder: {'orjson' if serialization.orjson else 'stdlib json (orjson not installed)'}, {args.records} records")
+    print(f"  {'':<34} {'stdlib':>12} {'fast':>12}")
+    for name, records in (('listings', make_listings(args.records)), ('crop-loss', make_cases(args.records))):
+        print(name)
+        # jsonify() with Flask's default provider: sorted keys, ASCII-escaped, compact
+        report(
+            "response body (jsonify)",
+            best_of(args.repeat, lambda: json.dumps(records, sort_keys=True, separators=(',', ':')).encode('utf-8')),
+            best_of(args.repeat, lambda: serialization.dumps(records))
+        )
+        # Old save_* helpers rewrote the whole file pretty-printed
+        report(
+            "whole-store save (indent=4)",
+            best_of(args.repeat, lambda: json.dumps(records, indent=4)),
+            best_of(args.repeat, lambda: [serialization.dumps_text(r) for r in records])
+        )
+        rows = [json.dumps(r) for r in records]
+        report(
+            "store rows encode (per record)",
+            best_of(args.repeat, lambda: [json.dumps(r) for r in records]),
+            best_of(args.repeat, lambda: [serialization.dumps_text(r) for r in records])
+        )
+        report(
+            "store rows decode (per record)",
+            best_of(args.repeat, lambda: [json.loads(r) for r in rows]),
+            best_of(args.repeat, lambda: [serialization.loads(r) for r in rows])
+        )
+        stdlib_size = sum(len(r.encode('utf-8')) for r in rows)
+        compact_size = sum(len(serialization.dumps(r)) for r in records)
+        print(f"  {'stored bytes':<34} {stdlib_size:>12,} {compact_size:>12,}")
+
+if __name__ == '__main__':
+    main()
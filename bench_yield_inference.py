@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Single-row yield inference benchmark: the previous /predict path (one-row
+DataFrame + LabelEncoder.transform) vs. yield_inference.FastYieldModel, on
+the trained models in models/.
+
+    python bench_yield_inference.py [--requests 2000] [--repeat 5]
+"""
+
+import time
+import random
+import argparse
+
+import joblib
+
+from yield_inference import FastYieldModel, numeric_features, reference_predict
+
+def make_requests(encoders, n):
+    requests = []
+    for _ in range(n):
+        area = random.uniform(1, 5000)
+        hist_avg = random.uniform(1500, 4000)
+        requests.append((
+            random.choice(list(encoders['crop'].classes_)),
+            random.choice(list(encoders['district'].classes_)),
+            random.choice(list(encoders['season'].classes_)),
+            numeric_features(random.randint(2010, 2025), area, area * hist_avg / 1000, hist_avg, hist_avg)
+        ))
+    return requests
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='models/yield_prediction_model.pkl')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    random.seed(42)
+
+    model = joblib.load(args.model)
+    encoders = joblib.load('models/encoders.pkl')
+    feature_columns = joblib.load('models/feature_columns.pkl')
+    fast = FastYieldModel(model, encoders, feature_columns)
+    requests = make_requests(encoders, args.requests)
+
+    reference = best_of(args.repeat, lambda: [reference_predict(model, encoders, feature_columns, *r) for r in requests])
+    fast_time = best_of(args.repeat, lambda: [fast.predict(*r) for r in requests])
+    drift = max(abs(reference_predict(model, encoders, feature_columns, *r) - fast.predict(*r)) for r in requests)
+
+    print(f"model: {type(model).__name__}, {args.requests} requests")
+    print(f"  {'DataFrame + LabelEncoder':<28} {reference / args.requests * 1e6:9.1f} us/request")
+    print(f"  {'float32 fast path':<28} {fast_time / args.requests * 1e6:9.1f} us/request  ({reference / fast_time:.1f}x)")
+    print(f"  max |difference|: {drift:.6f} kg/ha")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Streaming NDJSON export / import for the AgriSphere stores.
+
+Exports page through a store in fixed-size batches and emit one JSON record
+per line, so memory stays constant however large the store is. Imports read
+NDJSON line by line and commit every `batch_size` records in one
+transaction; the next batch is not read until the previous one is committed,
+which gives natural back-pressure on the uploading client.
+
+Over HTTP (api_server.py):
+    GET  /export/<store>
+    POST /import/<store>?mode=insert|upsert&batchSize=1000
+
+CLI (the running API picks the new rows up on its next request, see
+storage.Database.sync):
+    python bulk_io.py export listings listings.ndjson
+    python bulk_io.py import crop_loss_cases partner_cases.ndjson --mode upsert
+
+'chat' goes through the chat log (chat_log.py) as it does over HTTP, not the
+legacy chat table. The chat log is append-only, so it accepts mode=insert only.
+"""
+
+import sys
+import json
+import uuid
+import sqlite3
+import argparse
+
+from serialization import dumps_text, loads, check_record
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+def export_ndjson(store, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield NDJSON text, one chunk per batch of records (oldest first)."""
+    if hasattr(store, 'iter_batches'):
+        batches = store.iter_batches(batch_size)
+    else:
+        batches = [store.all()] # chat log: at most CHAT_HISTORY_LIMIT messages
+    for batch in batches:
+        yield "".join(dumps_text(record) + "\n" for record in batch)
+
+def supports_upsert(store):
+    """Whether records can be updated by id (collections yes, the append-only chat log no)."""
+    return hasattr(store, 'upsert_many')
+
+def _write_batch(store, batch, mode):
+    """Commit one batch. Returns (inserted, updated)."""
+    if not hasattr(store, 'insert_many'):
+        for record in batch:
+            store.append(record)
+        return len(batch), 0
+    if mode == 'upsert':
+        return store.upsert_many(batch)
+    store.insert_many(batch)
+    return len(batch), 0
+
+def import_ndjson(store, lines, mode='insert', batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Load NDJSON lines into a store in batches. Records without an id get one;
+    records that do not match the store's schema (serialization.py) are rejected.
+    In 'insert' mode a batch that collides with existing ids is retried row by
+    row so only the duplicates are rejected.
+    'upsert' on a store without supports_upsert() raises ValueError.
+    """
+    if mode == 'upsert' and not supports_upsert(store):
+        raise ValueError(f"mode=upsert is not supported for {getattr(store, 'name', 'chat')}; use mode=insert")
+    report = {'inserted': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+
+    def reject(line_number, error):
+        report['rejected'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'line': line_number, 'error': error})
+
+    def flush(batch):
+        try:
+            inserted, updated = _write_batch(store, [record for _, record in batch], mode)
+        except sqlite3.IntegrityError:
+            inserted, updated = 0, 0
+            for line_number, record in batch:
+                try:
+                    _write_batch(store, [record], mode)
+                    inserted += 1
+                except sqlite3.IntegrityError:
+                    reject(line_number, f"Duplicate id: {record['id']}")
+        report['inserted'] += inserted
+        report['updated'] += updated
+
+    batch = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except ValueError as e:
+            reject(line_number, f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            reject(line_number, "Record must be a JSON object")
+            continue
+        record['id'] = str(record.get('id') or uuid.uuid4())
+        error = check_record(getattr(store, 'name', None), record)
+        if error:
+            reject(line_number, error)
+            continue
+        batch.append((line_number, record))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return report
+
+def open_store(name, db, chat_path=None):
+    """The store api_server.BULK_STORES serves under name: the chat log for 'chat', else the collection."""
+    if name != 'chat':
+        return db.collection(name)
+    from chat_log import ChatLog, CHAT_LOG_FILE
+    chat = ChatLog(chat_path or CHAT_LOG_FILE)
+    chat.import_legacy(db.collection('chat').all()) # same seeding as api_server, so it is not skipped later
+    return chat
+
+def main():
+    from storage import Database, COLLECTIONS
+
+    parser = argparse.ArgumentParser(description="Streaming NDJSON export/import for AgriSphere stores")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    exp = sub.add_parser('export')
+    exp.add_argument('store', choices=list(COLLECTIONS))
+    exp.add_argument('output', nargs='?', help="Output file (default: stdout)")
+    exp.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    imp = sub.add_parser('import')
+    imp.add_argument('store', choices=list(COLLECTIONS))
+    imp.add_argument('input', nargs='?', help="Input file (default: stdin)")
+    imp.add_argument('--mode', choices=['insert', 'upsert'], default='insert')
+    imp.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    args = parser.parse_args()
+    if args.command == 'import' and args.mode == 'upsert' and args.store == 'chat':
+        parser.error("--mode upsert is not supported for chat (append-only log)")
+    store = open_store(args.store, Database())
+
+    if args.command == 'export':
+        out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            for chunk in export_ndjson(store, args.batch_size):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+    else:
+        source = open(args.input, 'r', encoding='utf-8') if args.input else sys.stdin
+        try:
+            report = import_ndjson(store, source, args.mode, args.batch_size)
+        finally:
+            if args.input:
+                source.close()
+        print(json.dumps(report, indent=2), file=sys.stderr)
+    if args.store == 'chat':
+        store.close()
+
+if __name__ == '__main__':
+    main()
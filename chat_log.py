@@ -0,0 +1,220 @@
+"""
+Community chat log.
+
+The last CHAT_HISTORY_LIMIT messages live in an in-memory ring buffer; every
+message is also appended as one NDJSON line ([seq, message]) to an on-disk
+log. Sending a message therefore costs one small append. The log is
+compacted back down to the buffer contents once it has grown by
+COMPACT_EVERY lines, and on start.
+
+Messages are immutable, so seq doubles as the write version: page() has the
+same limit/after/since contract as storage.Collection.page().
+
+Several worker processes can share one log: appends and compaction hold an
+exclusive flock on it, and sync() tails lines other processes appended (or
+reloads a log they compacted) into this process's buffer.
+"""
+
+import os
+import json
+import weakref
+import threading
+import contextlib
+from collections import deque
+
+try:
+    import fcntl
+except ImportError: # Windows: single-process only
+    fcntl = None
+
+CHAT_LOG_FILE = os.environ.get("CHAT_LOG_FILE", "community_chat.ndjson")
+CHAT_HISTORY_LIMIT = 100
+COMPACT_EVERY = 1000
+
+_open_logs = weakref.WeakSet()
+
+def _reopen_after_fork():
+    for log in list(_open_logs):
+        log._reopen()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
+
+def _encode(entry):
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+
+class ChatLog:
+    def __init__(self, path=CHAT_LOG_FILE, capacity=CHAT_HISTORY_LIMIT, compact_every=COMPACT_EVERY, on_message=None):
+        self.path = path
+        self.capacity = capacity
+        self.compact_every = compact_every
+        self.on_message = on_message # on_message(message) for every message added, local or from another process
+        self.lock = threading.Lock()
+        self.buffer = deque(maxlen=capacity) # (seq, message), oldest first
+        self.last_seq = 0
+        self.appended_since_compaction = 0
+        self.exists = os.path.exists(path)
+        self.offset = 0 # bytes of the log already read into the buffer
+        self._reopen()
+        with self.lock, self._file_lock():
+            self._read_new_locked(notify=False)
+            self._compact_locked()
+        _open_logs.add(self)
+
+    def _reopen(self):
+        """Own file description per process, so flock excludes the other workers."""
+        self.file = open(self.path, 'ab')
+        inode = os.fstat(self.file.fileno()).st_ino
+        if inode != getattr(self, 'inode', None):
+            self.offset = 0 # compacted elsewhere: re-read it all, seq skips what we already have
+        self.inode = inode
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Exclusive flock on the current log file (no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        while True:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+            if os.stat(self.path).st_ino == self.inode:
+                break
+            # Another process compacted (replaced) the log; lock the new file instead
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self._reopen()
+        try:
+            yield
+        finally:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+
+    def _read_new_locked(self, notify=True):
+        """Pick up complete lines appended since the last read (re-reading a log compacted by another process)."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self.inode:
+            self.file.close()
+            self._reopen()
+        elif stat.st_size < self.offset:
+            self.offset = 0
+        if stat.st_size == self.offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1 # a line still being written (or torn by a crash) waits
+        added = []
+        for line in data[:complete].splitlines():
+            try:
+                seq, message = json.loads(line)
+            except ValueError:
+                continue # torn line after a crash
+            if seq > self.last_seq:
+                self.buffer.append((seq, message))
+                self.last_seq = seq
+                added.append(message)
+        self.offset += complete
+        if notify and self.on_message:
+            for message in added:
+                self.on_message(message)
+
+    def sync(self):
+        """Catch up with messages appended by other processes."""
+        with self.lock:
+            self._read_new_locked()
+
+    def import_legacy(self, messages):
+        """Seed a brand-new log from the previous chat store (oldest first). No-op once a log exists."""
+        if self.exists or self.buffer:
+            return 0
+        for message in messages:
+            self.append(message)
+        self.exists = True
+        return len(messages)
+
+    def append(self, message):
+        with self.lock:
+            with self._file_lock():
+                self._read_new_locked()
+                size = os.fstat(self.file.fileno()).st_size
+                if size > self.offset:
+                    # Unterminated line left by a crashed writer; keep ours on a line of its own
+                    self.file.write(b"\n")
+                    self.offset = size + 1
+                self.last_seq += 1
+                entry = (self.last_seq, message)
+                self.buffer.append(entry)
+                line = _encode(entry)
+                self.file.write(line)
+                self.file.flush()
+                self.offset += len(line)
+                self.appended_since_compaction += 1
+                if self.appended_since_compaction >= self.compact_every:
+                    self._compact_locked()
+        if self.on_message:
+            self.on_message(message)
+        return message
+
+    def compact(self):
+        with self.lock, self._file_lock():
+            self._read_new_locked()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Rewrite the log with just the buffered messages (atomic replace). Caller holds the file lock."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for entry in self.buffer:
+                f.write(_encode(entry))
+        os.replace(tmp_path, self.path)
+        old_file = self.file
+        self._reopen()
+        if fcntl is not None:
+            # Hold the lock on the new file until the caller releases; other processes re-check the inode
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+            fcntl.flock(old_file, fcntl.LOCK_UN)
+        old_file.close()
+        self.offset = os.fstat(self.file.fileno()).st_size
+        self.appended_since_compaction = 0
+
+    def all(self):
+        with self.lock:
+            return [message for _, message in self.buffer]
+
+    def count(self):
+        return len(self.buffer)
+
+    def version(self):
+        return self.last_seq
+
+    def local_version(self):
+        return self.last_seq # already in memory; same contract as storage.Collection.local_version
+
+    def page(self, limit=None, after=None, since=None, where=None):
+        """Returns (messages, next_cursor, sync_token), oldest first."""
+        with self.lock:
+            entries = list(self.buffer)
+            sync_token = self.last_seq
+
+        start = since if since is not None else after
+        if start is not None:
+            entries = [entry for entry in entries if entry[0] > start]
+        if where:
+            entries = [entry for entry in entries if entry[1].get(where[0]) == where[1]]
+
+        next_cursor = None
+        if limit is not None and len(entries) > limit:
+            entries = entries[:limit]
+            if since is not None:
+                sync_token = entries[-1][0]
+            else:
+                next_cursor = entries[-1][0]
+        return [message for _, message in entries], next_cursor, sync_token
+
+    def close(self):
+        with self.lock:
+            _open_logs.discard(self)
+            self.file.close()
@@ -0,0 +1,129 @@
+"""
+Crop-loss rollup cube.
+
+Keeps a base cuboid over the crop-loss store: one cell per distinct
+(location, crop, cause, season, status) with the case count and the sums of
+estimatedLoss and suggestedCompensation. Cells are adjusted from the store
+listener on every insert / status change, so the cube never rescans cases.
+
+Any group-by + filter query is answered by rolling up the base cells. The
+number of cells is bounded by the distinct dimension values, not the number
+of cases, so queries stay in milliseconds at millions of cases. Query
+results are memoised until the next write.
+"""
+
+import threading
+
+DIMENSIONS = ('location', 'crop', 'cause', 'season', 'status')
+MEASURES = ('estimatedLoss', 'suggestedCompensation')
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+def cell_key(case):
+    return tuple(str(case.get(dim) or 'Unknown') for dim in DIMENSIONS)
+
+class CropLossRollup:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cells = {} # cell key -> [cases, estimatedLoss, suggestedCompensation]
+        self.version = 0
+        self.query_cache = {}
+        self.hits = 0
+        self.misses = 0
+        self.cells_scanned = 0 # base cells rolled up by query misses
+
+    def rebuild(self, cases):
+        with self.lock:
+            self.cells = {}
+            for case in cases:
+                self._add(case, 1)
+            self._invalidate()
+
+    def _add(self, case, sign):
+        key = cell_key(case)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0, 0.0, 0.0]
+        cell[0] += sign
+        for i, measure in enumerate(MEASURES, start=1):
+            cell[i] += sign * _number(case.get(measure))
+        if cell[0] == 0:
+            del self.cells[key]
+
+    def _invalidate(self):
+        self.version += 1
+        self.query_cache.clear()
+
+    def on_case(self, old, new):
+        """Storage listener for the crop_loss_cases collection."""
+        with self.lock:
+            if old is not None:
+                self._add(old, -1)
+            if new is not None:
+                self._add(new, 1)
+            self._invalidate()
+
+    def query(self, group_by=(), filters=None):
+        """
+        Roll the cube up to `group_by` dimensions, keeping only cells whose
+        dimension values are in `filters` ({dim: set of values}).
+        Returns rows sorted by estimatedLoss (desc) plus overall totals.
+        """
+        group_by = tuple(group_by)
+        filters = {dim: frozenset(values) for dim, values in (filters or {}).items() if values}
+        for dim in group_by + tuple(filters):
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension: {dim}. Use one of {', '.join(DIMENSIONS)}")
+
+        cache_key = (group_by, tuple(sorted(filters.items())))
+        with self.lock:
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            version = self.version
+            cells = list(self.cells.items())
+            self.cells_scanned += len(cells)
+
+        group_index = [DIMENSIONS.index(dim) for dim in group_by]
+        filter_index = [(DIMENSIONS.index(dim), values) for dim, values in filters.items()]
+
+        groups = {}
+        totals = [0, 0.0, 0.0]
+        for key, cell in cells:
+            if any(key[i] not in values for i, values in filter_index):
+                continue
+            group = tuple(key[i] for i in group_index)
+            acc = groups.get(group)
+            if acc is None:
+                acc = groups[group] = [0, 0.0, 0.0]
+            for i in range(3):
+                acc[i] += cell[i]
+                totals[i] += cell[i]
+
+        rows = [
+            dict(zip(group_by, group), cases=acc[0], estimatedLoss=round(acc[1], 2), suggestedCompensation=round(acc[2], 2))
+            for group, acc in groups.items()
+        ]
+        rows.sort(key=lambda row: row['estimatedLoss'], reverse=True)
+        result = {
+            'groupBy': list(group_by),
+            'filters': {dim: sorted(values) for dim, values in filters.items()},
+            'rows': rows,
+            'totals': {'cases': totals[0], 'estimatedLoss': round(totals[1], 2), 'suggestedCompensation': round(totals[2], 2)},
+            'cells': len(cells)
+        }
+
+        with self.lock:
+            if self.version == version:
+                self.query_cache[cache_key] = result
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {'cells': len(self.cells), 'hits': self.hits, 'misses': self.misses, 'cellsScanned': self.cells_scanned}
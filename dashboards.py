@@ -0,0 +1,56 @@
+"""
+Composite dashboard payloads.
+
+GovDashboard, BuyerDashboard and Marketplace used to fire several requests on
+load (/gov/stats + /gov/crop-loss, /listings + /demands + /buyer/interactions
++ /buyer/insights). The /dashboard/* endpoints gather those sections
+server-side instead: each section is a build() callable, gather() runs them
+concurrently on a shared thread pool and returns one payload
+
+    {'generatedAt': ..., 'sections': {name: section, ...}}
+
+where every section carries its own freshness:
+
+    {'data': ..., 'version': <store write version or None>, 'updatedAt': <ISO time>}
+
+updatedAt is when the data was read (live stores) or generated (cached LLM
+output). A section that raises or misses the deadline comes back as
+{'data': None, 'error': ...}; the other sections are still returned.
+"""
+
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+SECTION_TIMEOUT = 20 # seconds for the whole dashboard (LLM-backed sections are the slow ones)
+MAX_WORKERS = 8
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="dashboard")
+
+def now_iso():
+    return datetime.now().isoformat()
+
+def section(data, version=None, updated_at=None):
+    """Section envelope; updated_at defaults to now."""
+    return {'data': data, 'version': version, 'updatedAt': updated_at or now_iso()}
+
+def _build(name, build):
+    try:
+        return build()
+    except Exception as e:
+        print(f"Dashboard section {name} error: {e}")
+        return {'data': None, 'version': None, 'updatedAt': now_iso(), 'error': str(e)}
+
+def gather(builders, timeout=SECTION_TIMEOUT, pool=None):
+    """Run {name: build} concurrently; build() returns section(...). Returns the dashboard payload."""
+    pool = pool or executor
+    deadline = time.monotonic() + timeout
+    futures = {name: pool.submit(_build, name, build) for name, build in builders.items()}
+    sections = {}
+    for name, future in futures.items():
+        try:
+            sections[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeout:
+            print(f"Dashboard section {name} timed out")
+            sections[name] = {'data': None, 'version': None, 'updatedAt': now_iso(), 'error': 'Timed out'}
+    return {'generatedAt': now_iso(), 'sections': sections}
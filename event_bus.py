@@ -0,0 +1,156 @@
+"""
+Community event bus.
+
+Writes publish small events (new post, comment, chat message, presence
+change) here; /community/events streams them to clients as Server-Sent
+Events and /community/events/poll serves the same events as a long-poll.
+
+Events carry increasing ids and the last EVENT_HISTORY are kept, so a
+reconnecting client resumes from its Last-Event-ID. A client that is too far
+behind gets a 'reset' event and refetches.
+
+The counter is per process, so ids go out as "<epoch>-<n>" where the epoch
+is drawn when the process starts (and again in each forked worker). An id
+from another worker or from before a restart is unknown here and also gets
+a 'reset' rather than being compared with this worker's counter.
+
+Waiting is cheap in both servers: Flask threads block on a Condition, and the
+ASGI views await an asyncio.Event that publish() sets thread-safely.
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import weakref
+import threading
+from collections import deque
+
+EVENT_HISTORY = 1000
+KEEPALIVE_SECONDS = 15
+
+_buses = weakref.WeakSet()
+
+def _new_epochs_after_fork():
+    for bus in list(_buses):
+        bus.epoch = new_epoch()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_new_epochs_after_fork)
+
+def new_epoch():
+    return uuid.uuid4().hex[:8]
+
+class EventBus:
+    def __init__(self, history=EVENT_HISTORY):
+        self.events = deque(maxlen=history) # (id, type, data)
+        self.last_id = 0
+        self.epoch = new_epoch()
+        self.condition = threading.Condition()
+        self.async_waiters = set() # (loop, asyncio.Event)
+        _buses.add(self)
+
+    def publish(self, event_type, data):
+        with self.condition:
+            self.last_id += 1
+            event_id = self.last_id
+            self.events.append((event_id, event_type, data))
+            self.condition.notify_all()
+            waiters = list(self.async_waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass # loop already closed
+        return event_id
+
+    def since(self, last_id):
+        """Events after last_id, or None when the client has to resync (last_id None: unknown id)."""
+        with self.condition:
+            if last_id is None or last_id > self.last_id:
+                return None # id from before a restart
+            if self.events and last_id < self.events[0][0] - 1:
+                return None # fell out of the history window
+            return [event for event in self.events if event[0] > last_id]
+
+    def wait(self, last_id, timeout):
+        """Block until there is something after last_id (or timeout)."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.last_id != last_id, timeout)
+            return self.since(last_id)
+
+    async def wait_async(self, last_id, timeout):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self.condition:
+            if self.last_id != last_id:
+                return self.since(last_id)
+            self.async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.condition:
+                self.async_waiters.discard(waiter)
+        return self.since(last_id)
+
+    def wire_id(self, event_id):
+        return f"{self.epoch}-{event_id}"
+
+    def resolve_last_id(self, value):
+        """
+        Parse a Last-Event-ID / after= value. Missing means 'from now'; an id
+        this process did not issue (other worker, restart, garbage) is None,
+        which since() answers with a reset.
+        """
+        if not value:
+            return self.last_id
+        epoch, _, number = value.partition('-')
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+
+    def poll_payload(self, last_id, events):
+        if events is None:
+            return {'events': [], 'lastEventId': self.wire_id(self.last_id), 'reset': True}
+        return {
+            'events': [{'id': self.wire_id(i), 'type': t, 'data': d} for i, t, d in events],
+            'lastEventId': self.wire_id(events[-1][0] if events else last_id),
+            'reset': False
+        }
+
+    def stream(self, last_id, on_tick=None, keepalive=KEEPALIVE_SECONDS):
+        """SSE body for a blocking (WSGI) server."""
+        yield "retry: 3000\n\n"
+        while True:
+            if on_tick:
+                on_tick()
+            events = self.wait(last_id, keepalive)
+            chunk, last_id = format_sse(self, last_id, events)
+            yield chunk
+
+    async def stream_async(self, last_id, on_tick=None, keepalive=KEEPALIVE_SECONDS):
+        """SSE body for the ASGI server."""
+        yield "retry: 3000\n\n"
+        while True:
+            if on_tick:
+                on_tick()
+            events = await self.wait_async(last_id, keepalive)
+            chunk, last_id = format_sse(self, last_id, events)
+            yield chunk
+
+def format_sse(bus, last_id, events):
+    """Render one wait() result as SSE text. Returns (chunk, new_last_id)."""
+    if events is None:
+        last_id = bus.last_id
+        return f"id: {bus.wire_id(last_id)}\nevent: reset\ndata: {{}}\n\n", last_id
+    if not events:
+        return ": keepalive\n\n", last_id
+
+    lines = []
+    for event_id, event_type, data in events:
+        lines.append(f"id: {bus.wire_id(event_id)}\nevent: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n")
+    return "".join(lines), events[-1][0]
+
+# Process-wide bus
+bus = EventBus()
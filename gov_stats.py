@@ -0,0 +1,97 @@
+"""
+Government dashboard aggregates.
+
+/gov/stats used to reload every store and recompute its totals on each
+30-second dashboard poll. GovStats keeps the totals in memory instead and
+adjusts them from the storage listeners on every listing, post, comment and
+crop-loss write, so reading them is O(1). check() recomputes everything from
+scratch and reports (optionally repairs) any drift.
+"""
+
+import math
+import threading
+from collections import deque
+
+RECENT_LIMIT = 5
+
+def listing_quantity(listing):
+    try:
+        return float(listing.get('quantity', 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+def is_resolved(post):
+    return len(post.get('comments', [])) > 0
+
+def is_pending(case):
+    return case.get('status') == 'Pending'
+
+def compute_totals(listings, posts, cases):
+    """Full recomputation (the pre-incremental /gov/stats logic)."""
+    return {
+        'totalListings': len(listings),
+        'totalVolume': sum(listing_quantity(l) for l in listings),
+        'totalIssues': len(posts),
+        'resolvedIssues': sum(1 for p in posts if is_resolved(p)),
+        'pendingCases': sum(1 for c in cases if is_pending(c))
+    }
+
+class GovStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = compute_totals([], [], [])
+        self.recent_listing_ids = deque(maxlen=RECENT_LIMIT)
+        self.recent_post_ids = deque(maxlen=RECENT_LIMIT)
+        self.version = 0 # bumped on every change (HTTP ETags)
+
+    def rebuild(self, listings, posts, cases):
+        """Reset from full record lists (newest first)."""
+        with self.lock:
+            self.totals = compute_totals(listings, posts, cases)
+            self.recent_listing_ids = deque((l['id'] for l in listings[:RECENT_LIMIT]), maxlen=RECENT_LIMIT)
+            self.recent_post_ids = deque((p['id'] for p in posts[:RECENT_LIMIT]), maxlen=RECENT_LIMIT)
+            self.version += 1
+
+    def _apply(self, old, new, key, measure):
+        self.version += 1
+        self.totals[key] += (measure(new) if new else 0) - (measure(old) if old else 0)
+
+    def on_listing(self, old, new):
+        with self.lock:
+            self._apply(old, new, 'totalListings', lambda l: 1)
+            self._apply(old, new, 'totalVolume', listing_quantity)
+            if old is None:
+                self.recent_listing_ids.appendleft(new['id'])
+
+    def on_post(self, old, new):
+        with self.lock:
+            self._apply(old, new, 'totalIssues', lambda p: 1)
+            self._apply(old, new, 'resolvedIssues', lambda p: int(is_resolved(p)))
+            if old is None:
+                self.recent_post_ids.appendleft(new['id'])
+
+    def on_case(self, old, new):
+        with self.lock:
+            self._apply(old, new, 'pendingCases', lambda c: int(is_pending(c)))
+
+    def subscribe(self, listings_store, posts_store, cases_store):
+        listings_store.subscribe(self.on_listing)
+        posts_store.subscribe(self.on_post)
+        cases_store.subscribe(self.on_case)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.totals), list(self.recent_listing_ids), list(self.recent_post_ids)
+
+    def check(self, listings, posts, cases, repair=False):
+        """Compare the incremental totals with a from-scratch recomputation."""
+        incremental, _, _ = self.snapshot()
+        recomputed = compute_totals(listings, posts, cases)
+        mismatches = {
+            key: {'incremental': incremental[key], 'recomputed': value}
+            for key, value in recomputed.items()
+            if not math.isclose(incremental[key], value, rel_tol=1e-9, abs_tol=1e-6)
+        }
+        if mismatches and repair:
+            self.rebuild(listings, posts, cases)
+        return {'consistent': not mismatches, 'mismatches': mismatches, 'repaired': bool(mismatches and repair)}
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Offline Groq/OpenAI-compatible stand-in server for load testing.
+
+Replays recorded chat completions per prompt template with configurable
+latency distributions and error rates, so caching, batching and timeout
+behaviour of the LLM-bound routes can be benchmarked without network access.
+
+Usage:
+    python groq_standin.py --port 8600 --seed 42
+    GROQ_BASE_URL=http://localhost:8600 python api_server.py
+
+Recordings live in llm_recordings/<template>.jsonl (one {"content", "usage"}
+object per line, the same format GROQ_RECORD_DIR produces). Latency and
+errors are configured in llm_recordings/standin_config.json:
+
+    {
+        "default": {"latency_ms": {"distribution": "lognormal", "median": 800, "sigma": 0.4},
+                    "error_rate": 0.0, "error_statuses": [503]},
+        "templates": {"digital_twin": {"latency_ms": {"distribution": "constant", "value": 2500}}}
+    }
+"""
+
+import os
+import json
+import time
+import math
+import uuid
+import random
+import argparse
+import threading
+from flask import Flask, request, jsonify
+
+from llm_client import TEMPLATE_HEADER
+
+RECORDINGS_DIR = "llm_recordings"
+CONFIG_FILE = "standin_config.json"
+
+DEFAULT_PROFILE = {
+    'latency_ms': {'distribution': 'constant', 'value': 0},
+    'error_rate': 0.0,
+    'error_statuses': [503]
+}
+
+def sample_latency_ms(spec, rng):
+    """Draw one latency sample (milliseconds) from a distribution spec."""
+    dist = spec.get('distribution', 'constant')
+    if dist == 'constant':
+        value = spec.get('value', 0)
+    elif dist == 'uniform':
+        value = rng.uniform(spec.get('min', 0), spec.get('max', 0))
+    elif dist == 'normal':
+        value = rng.gauss(spec.get('mean', 0), spec.get('stddev', 0))
+    elif dist == 'lognormal':
+        value = rng.lognormvariate(math.log(max(spec.get('median', 1), 1e-6)), spec.get('sigma', 0))
+    else:
+        raise ValueError(f"Unknown latency distribution: {dist}")
+    return max(0.0, min(value, spec.get('cap', float('inf'))))
+
+class ReplayLibrary:
+    """Recorded responses and latency/error profiles, keyed by prompt template."""
+
+    def __init__(self, recordings_dir=RECORDINGS_DIR, config=None, seed=None):
+        self.recordings_dir = recordings_dir
+        self.config = config if config is not None else self.load_config(recordings_dir)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recordings = self.load_recordings(recordings_dir)
+        self.cursors = {}
+        self.stats = {}
+
+    @staticmethod
+    def load_config(recordings_dir):
+        path = os.path.join(recordings_dir, CONFIG_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    @staticmethod
+    def load_recordings(recordings_dir):
+        recordings = {}
+        if not os.path.isdir(recordings_dir):
+            return recordings
+        for filename in sorted(os.listdir(recordings_dir)):
+            if not filename.endswith('.jsonl'):
+                continue
+            template = filename[:-len('.jsonl')]
+            with open(os.path.join(recordings_dir, filename), 'r', encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f if line.strip()]
+            if entries:
+                recordings[template] = entries
+        return recordings
+
+    def profile(self, template):
+        profile = dict(DEFAULT_PROFILE)
+        profile.update(self.config.get('default', {}))
+        profile.update(self.config.get('templates', {}).get(template, {}))
+        return profile
+
+    def plan(self, template):
+        """
+        Decide how to answer one call: returns (latency_ms, error_status, entry).
+        Decisions are drawn from a single seeded RNG so a run is reproducible.
+        """
+        profile = self.profile(template)
+        with self.lock:
+            latency = sample_latency_ms(profile['latency_ms'], self.rng)
+            error_status = None
+            if self.rng.random() < profile.get('error_rate', 0.0):
+                error_status = self.rng.choice(profile.get('error_statuses') or [503])
+
+            entries = self.recordings.get(template) or self.recordings.get('default')
+            entry = None
+            if entries:
+                index = self.cursors.get(template, 0)
+                entry = entries[index % len(entries)]
+                self.cursors[template] = index + 1
+
+            stats = self.stats.setdefault(template, {'requests': 0, 'errors': 0, 'latency_ms_total': 0.0})
+            stats['requests'] += 1
+            stats['latency_ms_total'] += latency
+            if error_status:
+                stats['errors'] += 1
+
+        return latency, error_status, entry
+
+    def reset(self, seed=None):
+        with self.lock:
+            self.rng = random.Random(seed)
+            self.cursors = {}
+            self.stats = {}
+
+def estimate_tokens(text):
+    # Rough heuristic (~4 characters per token) used when a recording has no usage block
+    return max(1, len(text or '') // 4)
+
+def build_completion(entry, model, messages):
+    content = entry.get('content', '{}') if entry else '{}'
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False)
+
+    usage = (entry or {}).get('usage') or {}
+    prompt_text = ''.join(m.get('content', '') if isinstance(m.get('content'), str) else json.dumps(m.get('content'))
+                          for m in messages)
+    prompt_tokens = usage.get('prompt_tokens') or estimate_tokens(prompt_text)
+    completion_tokens = usage.get('completion_tokens') or estimate_tokens(content)
+
+    return {
+        'id': f"chatcmpl-standin-{uuid.uuid4().hex[:12]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': 'stop'
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+    }
+
+def create_app(library):
+    app = Flask(__name__)
+
+    @app.route('/openai/v1/chat/completions', methods=['POST'])
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(silent=True) or {}
+        template = request.headers.get(TEMPLATE_HEADER, 'default')
+        latency_ms, error_status, entry = library.plan(template)
+
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+
+        if error_status:
+            return jsonify({'error': {
+                'message': f"Stand-in injected error for template '{template}'",
+                'type': 'standin_injected_error',
+                'code': error_status
+            }}), error_status
+
+        return jsonify(build_completion(entry, body.get('model', 'standin'), body.get('messages', [])))
+
+    @app.route('/standin/stats', methods=['GET'])
+    def standin_stats():
+        return jsonify(library.stats)
+
+    @app.route('/standin/reset', methods=['POST'])
+    def standin_reset():
+        data = request.get_json(silent=True) or {}
+        library.reset(seed=data.get('seed'))
+        return jsonify({'status': 'reset'})
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Groq stand-in server")
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--recordings', default=RECORDINGS_DIR)
+    parser.add_argument('--config', help="Latency/error config JSON (defaults to <recordings>/standin_config.json)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    config = None
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+    library = ReplayLibrary(args.recordings, config=config, seed=args.seed)
+    print(f"Loaded recordings for templates: {', '.join(sorted(library.recordings)) or 'none'}")
+    print(f"Groq stand-in listening on http://{args.host}:{args.port}")
+    create_app(library).run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Gunicorn settings for running the API as several worker processes:
+
+    gunicorn -c gunicorn.conf.py
+
+- Workers are uvicorn (ASGI) workers serving asgi_server:app, so
+  /community/events and its long-poll fallback are coroutines: an open tab
+  costs one parked coroutine, not one of a fixed pool of threads. All other
+  routes go to the Flask app through asgi_server's WSGI adapter.
+
+- preload_app imports api_server once in the master: stores, indexes, the
+  yield models and the precomputed yield surface are loaded before fork, so
+  workers share those pages copy-on-write instead of each holding its own
+  copy. gc.freeze() moves the preloaded objects out of the collector's
+  reach so collections in the workers do not touch (and copy) them.
+- AGRISPHERE_SHARED_STATE defaults to the SQLite backend here, so presence,
+  the digital-twin cache and /metrics counters are shared by all workers.
+- Each worker syncs store writes made by the others before every request and
+  once a second in the background (keeps idle event streams current).
+"""
+
+import gc
+import os
+
+bind = os.environ.get("AGRISPHERE_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+wsgi_app = "asgi_server:app"
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120 # LLM-backed routes can take a while
+preload_app = True
+
+os.environ.setdefault("AGRISPHERE_SHARED_STATE", "sqlite")
+
+def on_starting(server):
+    # Runs in the master after the preloaded app is imported, before any worker is forked
+    import api_server
+    api_server.load_yield_models()
+    gc.freeze()
+
+def post_fork(server, worker):
+    import api_server
+    api_server.start_background_sync()
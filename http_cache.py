@@ -0,0 +1,140 @@
+"""
+Conditional GET and compression for the polled endpoints.
+
+Dashboards poll /listings, /demands, /community/posts, /community/chat,
+/community/online and /gov/stats every few seconds and usually get the same
+body back. Each of those responses is identified by a version key built from
+in-memory write counters (store write versions, chat seq, aggregate
+versions) plus the query string, so:
+
+- a request whose If-None-Match matches the current ETag gets a 304 without
+  reading the store or serializing anything
+- the JSON body, and its gzip / brotli encodings, are built once per version
+  and served from an LRU cache until the next write changes the key
+
+brotli is used when the package is installed and the client accepts it;
+gzip otherwise. Bodies under MIN_COMPRESS_BYTES are sent as-is.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+MAX_CACHE_ENTRIES = 512
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def make_etag(*parts):
+    """Weak ETag for a version key (weak: gzip / br / identity bodies share it)."""
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match comparison (weak: the W/ prefix is ignored)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def choose_encoding(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header (q=0 excludes a coding)."""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', accepted.get('*', 0)) > 0:
+        return 'gzip'
+    return None
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+class ResponseCache:
+    """LRU of version key -> (body, headers, {encoding: compressed body})."""
+
+    def __init__(self, max_entries=MAX_CACHE_ENTRIES, max_bytes=MAX_CACHE_BYTES, min_compress=MIN_COMPRESS_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.min_compress = min_compress
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _store(self, etag, entry):
+        self.entries[etag] = entry
+        self.size += len(entry[0])
+        self._evict()
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            _, (body, _, encoded) = self.entries.popitem(last=False)
+            self.size -= len(body) + sum(len(v) for v in encoded.values())
+
+    def get(self, etag, build, encoding=None):
+        """
+        Body for a version key, building it on a miss. `build()` returns
+        (body bytes, headers dict). Returns (body, headers, content encoding or None).
+        """
+        with self.lock:
+            entry = self.entries.get(etag)
+            if entry is not None:
+                self.entries.move_to_end(etag)
+                self.hits += 1
+        if entry is None:
+            body, headers = build()
+            entry = (body, dict(headers), {})
+            with self.lock:
+                self.misses += 1
+                if etag not in self.entries:
+                    self._store(etag, entry)
+                else:
+                    entry = self.entries[etag]
+
+        body, headers, encoded = entry
+        if encoding is None or len(body) < self.min_compress:
+            return body, headers, None
+        compressed = encoded.get(encoding)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            with self.lock:
+                if self.entries.get(etag) is entry and encoding not in encoded:
+                    encoded[encoding] = compressed
+                    self.size += len(compressed)
+                    self._evict()
+        return compressed, headers, encoding
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
@@ -9,7 +9,7 @@ import re
 from datetime import datetime
 import os
 from dotenv import load_dotenv
-from groq import Groq
+import llm_client
 
 # Load environment variables
 load_dotenv()
@@ -22,7 +22,7 @@ GROQ_API_KEY = os.environ.get("GROQ_API_KEY") or os.environ.get("VITE_GROQ_CHATB
 class AgriVoiceAssistant:
     def __init__(self):
         try:
-            self.client = Groq(api_key=GROQ_API_KEY)
+            self.client = llm_client.get_client(GROQ_API_KEY)
             self.model = "llama-3.3-70b-versatile" # High quality model
             print(f"AgriVoiceAssistant initialized with Groq model: {self.model}")
         except Exception as e:
@@ -125,20 +125,29 @@ class AgriVoiceAssistant:
             }
         }
     
-    def process_voice_input(self, text):
+    def process_voice_input(self, text, language_code=None):
         """Process voice input and generate appropriate response"""
+        text, is_hindi = self.prepare_query(text)
+        
+        # Identify query type and generate response
+        response = self.generate_response(text, is_hindi)
+        
+        return response
+
+    async def process_voice_input_async(self, text, language_code=None):
+        """Async variant of process_voice_input used by the ASGI server"""
+        text, is_hindi = self.prepare_query(text)
+        return await self.call_groq_api_async(text, is_hindi)
+
+    def prepare_query(self, text):
+        """Lower-case, detect language and normalize a raw query"""
         text = text.lower().strip()
         
         # Detect language (simple heuristic)
         is_hindi = any(char in text for char in 'कखगघचछजझटठडढणतथदधनपफबभमयरलवशषसह')
         
         # Clean and normalize text
-        text = self.normalize_text(text)
-        
-        # Identify query type and generate response
-        response = self.generate_response(text, is_hindi)
-        
-        return response
+        return self.normalize_text(text), is_hindi
     
     def normalize_text(self, text):
         """Normalize text for better matching"""
@@ -244,57 +253,75 @@ class AgriVoiceAssistant:
         # If we detected "farming query" but didn't match a crop above, try Groq for specific answer
         return self.call_groq_api(text, is_hindi)
 
+    def build_groq_request(self, text):
+        """Chat completion arguments for a voice query"""
+        system_instruction = """You are AgriSphere AI, an expert agricultural assistant for Indian farmers. 
+        You provide accurate, practical farming advice strictly following ICAR (Indian Council of Agricultural Research) and FAO protocols.
+        
+        Analyze the following user query and provide a JSON response.
+        The user might ask in English or Hindi. You MUST reply in the SAME language as the query (English or Hindi).
+        
+        Required JSON Structure:
+        {
+            "text": "Detailed, helpful answer (2-3 sentences max).",
+            "audio_text": "A shorter, conversational version for text-to-speech (1 sentence).",
+            "solution": "Key action item or direct solution (very brief).",
+            "timing": "Best time to apply/do this (optional, string)."
+        }
+        
+        Do NOT use markdown code blocks. Just valid JSON string.
+        If the query is irrelevant to agriculture, politely steer back to farming.
+        """
+        
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": system_instruction},
+                {"role": "user", "content": text}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 300,
+            'top_p': 1,
+            'stream': False,
+            'stop': None,
+        }
+
+    def parse_groq_response(self, response_text):
+        """Strip optional markdown fences and parse the model's JSON answer"""
+        response_text = response_text.strip()
+        
+        # Clean up if the model wrapped it in markdown
+        if response_text.startswith("```json"):
+            response_text = response_text[7:]
+        if response_text.startswith("```"):
+            response_text = response_text[3:]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3]
+            
+        return llm_client.parse_json("voice_query", response_text)
+
     def call_groq_api(self, text, is_hindi):
         """Call Groq API for general queries with fallback"""
         if not self.client:
             return self.handle_general_fallback(text, is_hindi)
 
         try:
-             # Construct the prompt
-            system_instruction = """You are AgriSphere AI, an expert agricultural assistant for Indian farmers. 
-            You provide accurate, practical farming advice strictly following ICAR (Indian Council of Agricultural Research) and FAO protocols.
-            
-            Analyze the following user query and provide a JSON response.
-            The user might ask in English or Hindi. You MUST reply in the SAME language as the query (English or Hindi).
+            completion = llm_client.chat_completion(self.client, "voice_query", **self.build_groq_request(text))
+            return self.parse_groq_response(completion.choices[0].message.content)
             
-            Required JSON Structure:
-            {
-                "text": "Detailed, helpful answer (2-3 sentences max).",
-                "audio_text": "A shorter, conversational version for text-to-speech (1 sentence).",
-                "solution": "Key action item or direct solution (very brief).",
-                "timing": "Best time to apply/do this (optional, string)."
-            }
-            
-            Do NOT use markdown code blocks. Just valid JSON string.
-            If the query is irrelevant to agriculture, politely steer back to farming.
-            """
-            
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_instruction},
-                    {"role": "user", "content": text}
-                ],
-                temperature=0.7,
-                max_tokens=300,
-                top_p=1,
-                stream=False,
-                stop=None,
-            )
+        except Exception as e:
+            print(f"Groq API Error: {e}")
+            return self.handle_general_fallback(text, is_hindi)
+
+    async def call_groq_api_async(self, text, is_hindi):
+        """Async variant of call_groq_api using the shared AsyncGroq client"""
+        if not self.client:
+            return self.handle_general_fallback(text, is_hindi)
+
+        try:
+            completion = await llm_client.async_chat_completion("voice_query", **self.build_groq_request(text))
+            return self.parse_groq_response(completion.choices[0].message.content)
 
-            response_text = completion.choices[0].message.content.strip()
-            
-            # Clean up if the model wrapped it in markdown
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-                
-            response_data = json.loads(response_text)
-            return response_data
-            
         except Exception as e:
             print(f"Groq API Error: {e}")
             return self.handle_general_fallback(text, is_hindi)
@@ -0,0 +1,176 @@
+"""
+Shared Groq client helpers for AgriSphere AI.
+
+Every LLM call in api_server.py, market_engine.py and improved_voice_assistant.py
+goes through this module so the upstream endpoint can be switched with
+configuration only:
+
+- GROQ_BASE_URL     point all calls at an OpenAI/Groq-compatible server
+                    (e.g. groq_standin.py for offline load testing)
+- GROQ_TIMEOUT      per-request timeout in seconds
+- GROQ_MAX_RETRIES  SDK retry count (set to 0 when benchmarking error paths)
+- GROQ_RECORD_DIR   append every real response to <dir>/<template>.jsonl so
+                    it can later be replayed by the stand-in
+
+The async helpers (used by asgi_server.py) share one AsyncGroq client per
+process with a bounded connection pool:
+
+- LLM_MAX_CONCURRENCY   upstream calls allowed in flight at once (default 1000)
+- LLM_MAX_KEEPALIVE     idle keep-alive connections kept in the pool (default 100)
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from groq import Groq
+from dotenv import load_dotenv
+from llm_metrics import metrics
+
+load_dotenv()
+
+# Header used to tell the stand-in server which prompt template a call belongs to
+TEMPLATE_HEADER = "X-Prompt-Template"
+
+# Placeholder key used when talking to a local stand-in without a real key
+STANDIN_API_KEY = "standin-local-key"
+
+_record_lock = threading.Lock()
+
+# Shared async client state (created lazily inside the serving event loop)
+_async_client = None
+_async_semaphore = None
+
+def get_base_url():
+    return os.environ.get("GROQ_BASE_URL") or None
+
+def get_api_key():
+    """Return the configured Groq key (a placeholder when a stand-in base URL is set)."""
+    api_key = os.environ.get("GROQ_API_KEY") or os.environ.get("VITE_GROQ_CHATBOT_API_KEY")
+    if not api_key and get_base_url():
+        return STANDIN_API_KEY
+    return api_key
+
+def _client_kwargs(api_key=None):
+    kwargs = {'api_key': api_key or get_api_key()}
+    base_url = get_base_url()
+    if base_url:
+        kwargs['base_url'] = base_url
+    if os.environ.get("GROQ_TIMEOUT"):
+        kwargs['timeout'] = float(os.environ["GROQ_TIMEOUT"])
+    if os.environ.get("GROQ_MAX_RETRIES"):
+        kwargs['max_retries'] = int(os.environ["GROQ_MAX_RETRIES"])
+    return kwargs
+
+def get_client(api_key=None):
+    """Create a Groq client honouring GROQ_BASE_URL."""
+    return Groq(**_client_kwargs(api_key))
+
+def chat_completion(client, template, **kwargs):
+    """
+    Run a chat completion tagged with its prompt template id.
+    The template id travels as a request header so stand-in servers and proxies
+    can tell calls apart without parsing the prompt, and is the label under
+    which latency and token usage are recorded in llm_metrics.
+    """
+    headers = dict(kwargs.pop('extra_headers', None) or {})
+    headers[TEMPLATE_HEADER] = template
+
+    started = time.perf_counter()
+    try:
+        completion = client.chat.completions.create(extra_headers=headers, **kwargs)
+    except Exception as e:
+        metrics.record_call(template, time.perf_counter() - started, error=e)
+        raise
+    record_call_metrics(template, completion, time.perf_counter() - started)
+    record_response(template, completion)
+    return completion
+
+def record_call_metrics(template, completion, seconds):
+    usage = getattr(completion, 'usage', None)
+    metrics.record_call(
+        template, seconds,
+        prompt_tokens=getattr(usage, 'prompt_tokens', None),
+        completion_tokens=getattr(usage, 'completion_tokens', None)
+    )
+
+def parse_json(template, content):
+    """json.loads that counts parse failures per template before re-raising."""
+    try:
+        return json.loads(content)
+    except (TypeError, ValueError):
+        metrics.record_parse_failure(template)
+        raise
+
+def record_response(template, completion):
+    """Append a completion to the recording directory when GROQ_RECORD_DIR is set."""
+    record_dir = os.environ.get("GROQ_RECORD_DIR")
+    if not record_dir:
+        return
+
+    try:
+        usage = getattr(completion, 'usage', None)
+        entry = {
+            'content': completion.choices[0].message.content,
+            'usage': {
+                'prompt_tokens': getattr(usage, 'prompt_tokens', 0),
+                'completion_tokens': getattr(usage, 'completion_tokens', 0)
+            } if usage else None
+        }
+        os.makedirs(record_dir, exist_ok=True)
+        path = os.path.join(record_dir, f"{template}.jsonl")
+        with _record_lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Failed to record LLM response for {template}: {e}")
+
+def get_async_client():
+    """Return the process-wide AsyncGroq client, creating it on first use."""
+    global _async_client
+    if _async_client is None:
+        import httpx
+        from groq import AsyncGroq
+
+        limits = httpx.Limits(
+            max_connections=int(os.environ.get("LLM_MAX_CONCURRENCY", 1000)),
+            max_keepalive_connections=int(os.environ.get("LLM_MAX_KEEPALIVE", 100))
+        )
+        kwargs = _client_kwargs()
+        kwargs['http_client'] = httpx.AsyncClient(limits=limits)
+        _async_client = AsyncGroq(**kwargs)
+    return _async_client
+
+def _get_async_semaphore():
+    global _async_semaphore
+    if _async_semaphore is None:
+        _async_semaphore = asyncio.Semaphore(int(os.environ.get("LLM_MAX_CONCURRENCY", 1000)))
+    return _async_semaphore
+
+async def async_chat_completion(template, **kwargs):
+    """
+    Async counterpart of chat_completion. Calls beyond LLM_MAX_CONCURRENCY wait
+    on a semaphore (a parked coroutine) instead of opening more sockets, which
+    keeps memory bounded however many requests are waiting on Groq.
+    """
+    headers = dict(kwargs.pop('extra_headers', None) or {})
+    headers[TEMPLATE_HEADER] = template
+
+    async with _get_async_semaphore():
+        started = time.perf_counter()
+        try:
+            completion = await get_async_client().chat.completions.create(extra_headers=headers, **kwargs)
+        except Exception as e:
+            metrics.record_call(template, time.perf_counter() - started, error=e)
+            raise
+        record_call_metrics(template, completion, time.perf_counter() - started)
+    record_response(template, completion)
+    return completion
+
+async def aclose_async_client():
+    global _async_client, _async_semaphore
+    if _async_client is not None:
+        await _async_client.close()
+    _async_client = None
+    _async_semaphore = None
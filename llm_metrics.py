@@ -0,0 +1,241 @@
+"""
+LLM call instrumentation for AgriSphere AI.
+
+Every call made through llm_client is recorded here per prompt template:
+latency, prompt/completion tokens, request outcome, JSON-parse failures and
+cache outcome (hit/miss/stale, reported by the caching layers). Metrics are
+exposed on /metrics in Prometheus text format, or as JSON with estimated
+p50/p95/p99 per template via /metrics?format=json.
+
+Values are kept in this process unless the registry is bound to a
+cross-process shared_state backend (metrics.bind(state)), in which case every
+worker adds into the same counters and /metrics reports the totals.
+"""
+
+import bisect
+import threading
+
+from serialization import dumps_text, loads
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192)
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = ('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+        self.state = None
+
+    def bind(self, state):
+        self.state = state
+
+    def inc(self, *label_values, amount=1):
+        if self.state is not None:
+            self.state.incr_many(self.name, {dumps_text(label_values): amount})
+            return
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def items(self):
+        """{label values: value}"""
+        if self.state is not None:
+            return {tuple(loads(key)): value for key, value in self.state.counters(self.name).items()}
+        with self.lock:
+            return dict(self.values)
+
+    def get(self, *label_values):
+        return self.items().get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.items().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+    def snapshot(self):
+        return {'/'.join(k) or '_': v for k, v in sorted(self.items().items())}
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.series = {} # label values -> [bucket counts..., +Inf count], sum, count
+        self.lock = threading.Lock()
+        self.state = None
+
+    def bind(self, state):
+        self.state = state
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        if self.state is not None:
+            # One shared counter per bucket plus sum and count, keyed by [labels, field]
+            labels = list(label_values)
+            self.state.incr_many(self.name, {
+                dumps_text([labels, index]): 1, dumps_text([labels, 'sum']): value, dumps_text([labels, 'count']): 1
+            })
+            return
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = self._empty_series()
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def _empty_series(self):
+        return {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+
+    def all_series(self):
+        """{label values: {'counts', 'sum', 'count'}} (copies)"""
+        if self.state is None:
+            with self.lock:
+                return {k: dict(v, counts=list(v['counts'])) for k, v in self.series.items()}
+        all_series = {}
+        for key, value in self.state.counters(self.name).items():
+            labels, field = loads(key)
+            series = all_series.get(tuple(labels))
+            if series is None:
+                series = all_series[tuple(labels)] = self._empty_series()
+            if field in ('sum', 'count'):
+                series[field] = value
+            else:
+                series['counts'][field] = value
+        return all_series
+
+    def quantile(self, q, *label_values):
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        return self._quantile(q, self.all_series().get(label_values))
+
+    def _quantile(self, q, series):
+        if not series or not series['count']:
+            return None
+        counts = series['counts']
+        total = series['count']
+
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * ((rank - cumulative) / count)
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self.all_series().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series['counts']):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, ('le', le))} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {series['sum']}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+    def label_sets(self):
+        return list(self.all_series().keys())
+
+    def summary(self, *label_values):
+        series = self.all_series().get(label_values)
+        count, total = (series['count'], series['sum']) if series else (0, 0.0)
+        return {
+            'count': count,
+            'mean': (total / count) if count else None,
+            'p50': self._quantile(0.50, series),
+            'p95': self._quantile(0.95, series),
+            'p99': self._quantile(0.99, series)
+        }
+
+class LLMMetrics:
+    """Registry of all LLM metrics, keyed by prompt template id."""
+
+    def __init__(self):
+        self.latency = Histogram('agrisphere_llm_request_duration_seconds',
+                                 'Upstream LLM call latency', ('template',), LATENCY_BUCKETS)
+        self.prompt_tokens = Histogram('agrisphere_llm_prompt_tokens',
+                                       'Prompt tokens per LLM call', ('template',), TOKEN_BUCKETS)
+        self.completion_tokens = Histogram('agrisphere_llm_completion_tokens',
+                                           'Completion tokens per LLM call', ('template',), TOKEN_BUCKETS)
+        self.tokens_total = Counter('agrisphere_llm_tokens_total',
+                                    'Tokens consumed', ('template', 'kind'))
+        self.requests_total = Counter('agrisphere_llm_requests_total',
+                                      'LLM calls by outcome', ('template', 'outcome'))
+        self.json_parse_failures = Counter('agrisphere_llm_json_parse_failures_total',
+                                           'LLM responses that were not valid JSON', ('template',))
+        self.cache_total = Counter('agrisphere_llm_cache_total',
+                                   'Cache lookups in front of LLM calls', ('template', 'outcome'))
+
+    def bind(self, state):
+        """Keep all metrics in a shared_state backend (aggregated across worker processes)."""
+        for metric in self.all():
+            metric.bind(state)
+
+    def all(self):
+        return [self.latency, self.prompt_tokens, self.completion_tokens, self.tokens_total,
+                self.requests_total, self.json_parse_failures, self.cache_total]
+
+    def record_call(self, template, seconds, prompt_tokens=None, completion_tokens=None, error=None):
+        self.latency.observe(seconds, template)
+        self.requests_total.inc(template, 'error' if error else 'ok')
+        if prompt_tokens is not None:
+            self.prompt_tokens.observe(prompt_tokens, template)
+            self.tokens_total.inc(template, 'prompt', amount=prompt_tokens)
+        if completion_tokens is not None:
+            self.completion_tokens.observe(completion_tokens, template)
+            self.tokens_total.inc(template, 'completion', amount=completion_tokens)
+
+    def record_parse_failure(self, template):
+        self.json_parse_failures.inc(template)
+
+    def record_cache(self, template, outcome):
+        self.cache_total.inc(template, outcome)
+
+    def render_prometheus(self):
+        lines = []
+        for metric in self.all():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Per-template JSON view used by /metrics?format=json."""
+        templates = {}
+        for (template,) in self.latency.label_sets():
+            templates[template] = {
+                'latency_seconds': self.latency.summary(template),
+                'prompt_tokens': self.prompt_tokens.summary(template),
+                'completion_tokens': self.completion_tokens.summary(template),
+                'requests': {
+                    'ok': self.requests_total.get(template, 'ok'),
+                    'error': self.requests_total.get(template, 'error')
+                },
+                'json_parse_failures': self.json_parse_failures.get(template),
+            }
+        return {
+            'templates': templates,
+            'tokens_total': self.tokens_total.snapshot(),
+            'cache': self.cache_total.snapshot()
+        }
+
+# Process-wide registry
+metrics = LLMMetrics()
+
+def record_cache(template, outcome):
+    metrics.record_cache(template, outcome)
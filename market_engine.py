@@ -3,12 +3,11 @@ import datetime
 import random
 import os
 import json
-from groq import Groq
 from dotenv import load_dotenv
+import llm_client
 
 # Load environment variables
 load_dotenv()
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY") or os.environ.get("VITE_GROQ_CHATBOT_API_KEY")
 
 """
 Seed-to-Market Advisory Engine
@@ -19,16 +18,11 @@ Provides end-to-end intelligence:
 4. Market Forecast & Selling Options
 """
 
-def generate_ai_advisory(crop, sowing_date, acres, current_price, state="India"):
+def build_advisory_request(crop, sowing_date, acres, current_price, state="India"):
     """
-    Uses Groq API to generate detailed agronomic and market advice based on the specific state.
+    Chat completion arguments for the seed-to-market advisory prompt.
     """
-    try:
-        client = Groq(
-            api_key=GROQ_API_KEY,
-        )
-
-        prompt = f"""
+    prompt = f"""
     You are an expert agricultural consultant for farmers in {state}, India. 
     The farmer is growing {crop}. 
     Sowing date was {sowing_date}. 
@@ -95,28 +89,68 @@ def generate_ai_advisory(crop, sowing_date, acres, current_price, state="India")
     }}
     """
 
-        completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt,
-                }
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.5,
-            response_format={"type": "json_object"}
-        )
+    return {
+        'messages': [
+            {
+                "role": "user",
+                "content": prompt,
+            }
+        ],
+        'model': "llama-3.3-70b-versatile",
+        'temperature': 0.5,
+        'response_format': {"type": "json_object"}
+    }
 
-        return json.loads(completion.choices[0].message.content)
+def generate_ai_advisory(crop, sowing_date, acres, current_price, state="India"):
+    """
+    Uses Groq API to generate detailed agronomic and market advice based on the specific state.
+    """
+    try:
+        client = llm_client.get_client()
+        completion = llm_client.chat_completion(
+            client, "market_advisory",
+            **build_advisory_request(crop, sowing_date, acres, current_price, state)
+        )
+        return llm_client.parse_json("market_advisory", completion.choices[0].message.content)
 
     except Exception as e:
         print(f"Error generating AI advisory: {e}")
         return {} # Fallback to empty dict if AI fails
 
+async def generate_ai_advisory_async(crop, sowing_date, acres, current_price, state="India"):
+    """Async variant of generate_ai_advisory for the ASGI server."""
+    try:
+        completion = await llm_client.async_chat_completion(
+            "market_advisory",
+            **build_advisory_request(crop, sowing_date, acres, current_price, state)
+        )
+        return llm_client.parse_json("market_advisory", completion.choices[0].message.content)
+
+    except Exception as e:
+        print(f"Error generating AI advisory: {e}")
+        return {}
+
 def analyze_market(data):
     """
     Input: { "crop": "Rice", "sowing_date": "YYYY-MM-DD", "acres": 5, "state": "Punjab" }
     """
+    context = prepare_market_analysis(data)
+    
+    # 2. AI Advisory Generation (Qualitative)
+    # Use Groq to fill in specific agronomic advice
+    ai_advisory = generate_ai_advisory(context['crop'], context['sowing_date_str'], context['acres'],
+                                       context['market_data']['current_price'], context['state'])
+    return compose_market_analysis(context, ai_advisory)
+
+async def analyze_market_async(data):
+    """Async variant of analyze_market; the quantitative part is CPU-only and stays shared."""
+    context = prepare_market_analysis(data)
+    ai_advisory = await generate_ai_advisory_async(context['crop'], context['sowing_date_str'], context['acres'],
+                                                   context['market_data']['current_price'], context['state'])
+    return compose_market_analysis(context, ai_advisory)
+
+def prepare_market_analysis(data):
+    """Parse the advisory request and run the quantitative simulations."""
     crop = data.get('crop', 'rice').lower()
     sowing_date_str = data.get('sowing_date', datetime.date.today().strftime("%Y-%m-%d"))
     state = data.get('state', 'India')
@@ -135,10 +169,21 @@ def analyze_market(data):
     harvest_data = calculate_harvest_window(crop, sowing_date)
     market_data = simulate_market_prices(crop)
     
-    # 2. AI Advisory Generation (Qualitative)
-    # Use Groq to fill in specific agronomic advice
-    ai_advisory = generate_ai_advisory(crop, sowing_date_str, acres, market_data['current_price'], state)
-    
+    return {
+        'crop': crop, 'sowing_date': sowing_date, 'sowing_date_str': sowing_date_str,
+        'state': state, 'acres': acres,
+        'harvest_data': harvest_data, 'market_data': market_data
+    }
+
+def compose_market_analysis(context, ai_advisory):
+    """Merge the quantitative simulations with the (possibly empty) AI advisory."""
+    crop = context['crop']
+    sowing_date = context['sowing_date']
+    state = context['state']
+    acres = context['acres']
+    harvest_data = context['harvest_data']
+    market_data = context['market_data']
+
     # Merge Quantitative and Qualitative data into standard sections
     # Note: ai_advisory structure depends on the Prompt above (nested stage_X objects)
     return {
@@ -242,126 +287,159 @@ def calculate_revenue(crop, acres, price):
     estimated_yield = yields.get(crop, 20) * acres
     return f"₹{int(estimated_yield * price):,}"
 
+def build_market_prices_request(state, district, category="Use best judgement"):
+    """
+    Chat completion arguments for the mandi price prompt.
+    """
+    category_str = "vegetables and fruits" if not category or category == "All" else category
+    
+    prompt = f"""
+    You are a Real-Time Agriculture Market Price API for India (Agmarknet).
+    Provide the CURRENT market prices for '{category_str}' in:
+    State: {state}
+    District: {district}
+    (Focus on the primary mandi in this district)
+
+    Return a comprehensive list of at least 8-10 key commodities available in this market right now.
+    Include correct varieties (e.g., Tomato - Hybrid, Potato - Desi).
+    
+    CRITICAL: Prices must be in **₹ per kg** (Kilogram). Do NOT use Quintals.
+    
+    STRICT JSON FORMAT ONLY:
+    [
+        {{
+            "commodity": "Name",
+            "variety": "Variety",
+            "min_price": 20,
+            "max_price": 30,
+            "modal_price": 25,
+            "date": "{datetime.date.today().strftime('%d %b %Y')}"
+        }}
+    ]
+    """
+    
+    return {
+        'messages': [{"role": "user", "content": prompt}],
+        'model': "llama-3.3-70b-versatile",
+        'temperature': 0.3,
+        'response_format': {"type": "json_object"}
+    }
+
+def parse_market_prices(content):
+    # Parse response (Groq might return {"commodities": [...] } or just [...])
+    data = llm_client.parse_json("market_prices", content)
+    
+    if isinstance(data, list):
+        return data
+    elif isinstance(data, dict):
+        # Try to find the list inside
+        for key, val in data.items():
+            if isinstance(val, list):
+                return val
+        return []
+        
+    return []
+
 def get_market_prices(state, district, market, category="Use best judgement"):
     """
     Fetch/Simulate real-time market prices using Groq AI.
     """
     try:
-        from groq import Groq
-        client = Groq(api_key=GROQ_API_KEY)
-        
-        category_str = "vegetables and fruits" if not category or category == "All" else category
-        
-        prompt = f"""
-        You are a Real-Time Agriculture Market Price API for India (Agmarknet).
-        Provide the CURRENT market prices for '{category_str}' in:
-        State: {state}
-        District: {district}
-        (Focus on the primary mandi in this district)
-
-        Return a comprehensive list of at least 8-10 key commodities available in this market right now.
-        Include correct varieties (e.g., Tomato - Hybrid, Potato - Desi).
-        
-        CRITICAL: Prices must be in **₹ per kg** (Kilogram). Do NOT use Quintals.
-        
-        STRICT JSON FORMAT ONLY:
-        [
-            {{
-                "commodity": "Name",
-                "variety": "Variety",
-                "min_price": 20,
-                "max_price": 30,
-                "modal_price": 25,
-                "date": "{datetime.date.today().strftime('%d %b %Y')}"
-            }}
-        ]
-        """
-        
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            response_format={"type": "json_object"}
+        client = llm_client.get_client()
+        completion = llm_client.chat_completion(
+            client, "market_prices", **build_market_prices_request(state, district, category)
         )
-        
-        # Parse response (Groq might return {"commodities": [...] } or just [...])
-        content = completion.choices[0].message.content
-        data = json.loads(content)
-        
-        if isinstance(data, list):
-            return data
-        elif isinstance(data, dict):
-            # Try to find the list inside
-            for key, val in data.items():
-                if isinstance(val, list):
-                    return val
-            return []
-            
+        return parse_market_prices(completion.choices[0].message.content)
+
+    except Exception as e:
+        print(f"Error fetching market prices: {e}")
         return []
 
+async def get_market_prices_async(state, district, market, category="Use best judgement"):
+    """Async variant of get_market_prices for the ASGI server."""
+    try:
+        completion = await llm_client.async_chat_completion(
+            "market_prices", **build_market_prices_request(state, district, category)
+        )
+        return parse_market_prices(completion.choices[0].message.content)
+
     except Exception as e:
         print(f"Error fetching market prices: {e}")
         return []
 
+def build_buyer_insights_request(crop, state, district, current_price):
+    """
+    Chat completion arguments for the buyer procurement prompt.
+    """
+    prompt = f"""
+    You are a Strategic Agricultural Procurement Advisor for a bulk buyer.
+    Provide market intelligence for:
+    Crop: {crop}
+    Location: {district}, {state}, India
+    Current Market Price: ₹{current_price}/Quintal
+    
+    Analyze current trends and provide 3 strategic insights aimed at a BUYER (trader/retailer).
+    
+    Insights should cover:
+    1. Price Trend (Rising/Falling and why)
+    2. Best Procurement Strategy (Buy now vs Wait)
+    3. Quality/Logistics Advice (e.g., "Sourcing from X district is better due to low moisture")
+    
+    RETURN JSON Structure:
+    {{
+        "analysis_brief": "Short summary of the market situation (max 2 sentences).",
+        "demand_indicator": "High" | "Medium" | "Low",
+        "price_forecast": "Likely to Rise" | "Stable" | "Likely to Drop",
+        "msp_comparison": "Above MSP" | "Below MSP" | "Near MSP",
+        "current_price": {current_price}, 
+        "insights": [
+            {{
+                "type": "Trend",
+                "text": "..."
+            }},
+            {{
+                "type": "Strategy",
+                "text": "..."
+            }},
+            {{
+                "type": "Logistics",
+                "text": "..."
+            }}
+        ]
+    }}
+    """
+    
+    return {
+        'messages': [{"role": "user", "content": prompt}],
+        'model': "llama-3.3-70b-versatile",
+        'temperature': 0.4,
+        'response_format': {"type": "json_object"}
+    }
+
+BUYER_INSIGHTS_FALLBACK = {
+    "analysis_brief": "Unable to generate insights at the moment.",
+    "demand_indicator": "Medium",
+    "current_price": "N/A",
+    "insights": []
+}
+
 def get_buyer_insights(crop, state, district=""):
     """
     Generate AI-driven buying insights for a specific crop/location.
     """
     try:
-        from groq import Groq
-        client = Groq(api_key=GROQ_API_KEY)
+        client = llm_client.get_client()
 
         # Get simulated/real price to ground the AI's analysis
         price_data = simulate_market_prices(crop)
         current_price = price_data.get('current_price', 'N/A')
         
-        prompt = f"""
-        You are a Strategic Agricultural Procurement Advisor for a bulk buyer.
-        Provide market intelligence for:
-        Crop: {crop}
-        Location: {district}, {state}, India
-        Current Market Price: ₹{current_price}/Quintal
-        
-        Analyze current trends and provide 3 strategic insights aimed at a BUYER (trader/retailer).
-        
-        Insights should cover:
-        1. Price Trend (Rising/Falling and why)
-        2. Best Procurement Strategy (Buy now vs Wait)
-        3. Quality/Logistics Advice (e.g., "Sourcing from X district is better due to low moisture")
-        
-        RETURN JSON Structure:
-        {{
-            "analysis_brief": "Short summary of the market situation (max 2 sentences).",
-            "demand_indicator": "High" | "Medium" | "Low",
-            "price_forecast": "Likely to Rise" | "Stable" | "Likely to Drop",
-            "msp_comparison": "Above MSP" | "Below MSP" | "Near MSP",
-            "current_price": {current_price}, 
-            "insights": [
-                {{
-                    "type": "Trend",
-                    "text": "..."
-                }},
-                {{
-                    "type": "Strategy",
-                    "text": "..."
-                }},
-                {{
-                    "type": "Logistics",
-                    "text": "..."
-                }}
-            ]
-        }}
-        """
-        
-        completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.4,
-            response_format={"type": "json_object"}
+        completion = llm_client.chat_completion(
+            client, "buyer_insights", **build_buyer_insights_request(crop, state, district, current_price)
         )
         
         content = completion.choices[0].message.content
-        result = json.loads(content)
+        result = llm_client.parse_json("buyer_insights", content)
         # Ensure price is passed through even if AI misses it
         result['current_price'] = current_price
         return result
@@ -370,12 +448,22 @@ def get_buyer_insights(crop, state, district=""):
         print(f"Error generating buyer insights: {e}")
         import traceback
         traceback.print_exc()
-        return {
-            "analysis_brief": "Unable to generate insights at the moment.",
-            "demand_indicator": "Medium",
-            "current_price": "N/A",
-            "insights": []
-        }
+        return dict(BUYER_INSIGHTS_FALLBACK)
+
+async def get_buyer_insights_async(crop, state, district=""):
+    """Async variant of get_buyer_insights for the ASGI server."""
+    try:
+        current_price = simulate_market_prices(crop).get('current_price', 'N/A')
+        completion = await llm_client.async_chat_completion(
+            "buyer_insights", **build_buyer_insights_request(crop, state, district, current_price)
+        )
+        result = llm_client.parse_json("buyer_insights", completion.choices[0].message.content)
+        result['current_price'] = current_price
+        return result
+
+    except Exception as e:
+        print(f"Error generating buyer insights: {e}")
+        return dict(BUYER_INSIGHTS_FALLBACK)
 
 if __name__ == "__main__":
     # Test
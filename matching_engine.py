@@ -0,0 +1,213 @@
+"""
+Demand <-> Listing Matching Engine
+Connects buyer demands with farmer listings of the same crop and ranks each
+pair on:
+
+- quantity fit   how closely the listed quantity covers the demanded quantity
+- price gap      asking price vs. the buyer's offer
+- harvest date   produce that is ready (or ready by the buyer's date) ranks higher
+- location       same district/state as the demand (no preference if blank)
+
+Listings and demands are bucketed by normalised crop. A record's top-K is
+computed the first time it is asked for and then kept up to date: a new
+listing is scored only against the already-ranked demands for its crop (and
+vice versa), so posting either side is incremental and repeat reads are a
+dictionary lookup. Start-up only parses features, however many demands
+are open.
+
+The harvest term depends on today's date, so the cached rankings are
+dropped when the date changes and recomputed on their next read.
+"""
+
+import heapq
+import threading
+from datetime import datetime, date
+
+from search_index import tokenize
+
+TOP_K = 10
+WEIGHTS = {'quantity': 0.35, 'price': 0.35, 'harvest': 0.15, 'location': 0.15}
+HARVEST_HORIZON_DAYS = 90
+CLOSED_STATUSES = {'closed', 'fulfilled', 'cancelled'}
+
+def crop_key(name):
+    """Normalised crop ('rice ', 'Paddy', 'धान' -> 'rice')."""
+    tokens = tokenize(name)
+    return " ".join(tokens) if tokens else str(name or '').strip().lower()
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+def _date(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)[:10]).date()
+    except ValueError:
+        return None
+
+def features(record, kind):
+    """Pre-parsed numbers/keys used for scoring (computed once per record)."""
+    return {
+        'crop': crop_key(record.get('cropName') if kind == 'listing' else record.get('crop')),
+        'quantity': _number(record.get('quantity')),
+        'price': _number(record.get('price')),
+        'location': str(record.get('location') or '').strip().lower(),
+        'date': _date(record.get('harvestDate') if kind == 'listing' else record.get('requiredBy'))
+    }
+
+def score_pair(demand, listing, today=None):
+    """Score a demand/listing feature pair. Returns (score, breakdown)."""
+    today = today or date.today()
+
+    if demand['quantity'] and listing['quantity']:
+        quantity = min(demand['quantity'], listing['quantity']) / max(demand['quantity'], listing['quantity'])
+    else:
+        quantity = 0.5
+
+    if demand['price'] and listing['price']:
+        if listing['price'] <= demand['price']:
+            price = 1.0
+        else:
+            price = max(0.0, 1 - (listing['price'] - demand['price']) / demand['price'])
+    else:
+        price = 0.5
+
+    harvest = 0.5
+    if listing['date']:
+        if demand['date']:
+            harvest = 1.0 if listing['date'] <= demand['date'] else 0.2
+        else:
+            days = (listing['date'] - today).days
+            harvest = 1.0 if days <= 0 else max(0.0, 1 - days / HARVEST_HORIZON_DAYS)
+
+    if not demand['location']:
+        location = 0.5
+    elif demand['location'] in listing['location'] or listing['location'] in demand['location']:
+        location = 1.0 if listing['location'] else 0.5
+    else:
+        location = 0.0
+
+    breakdown = {'quantity': round(quantity, 3), 'price': round(price, 3), 'harvest': round(harvest, 3), 'location': location}
+    score = sum(WEIGHTS[k] * v for k, v in breakdown.items())
+    return round(score, 4), breakdown
+
+class MatchingEngine:
+    def __init__(self, k=TOP_K, today=date.today):
+        self.k = k
+        self.today = today
+        self.scored_on = today() # date the cached rankings were scored on
+        self.lock = threading.Lock()
+        self.listings = {} # id -> features
+        self.demands = {}
+        self.listings_by_crop = {} # crop -> set of listing ids
+        self.demands_by_crop = {}
+        self.demand_matches = {} # demand id -> [(score, listing id, breakdown)] best first
+        self.listing_matches = {} # listing id -> [(score, demand id, breakdown)] best first
+
+    def _top(self, entries):
+        return heapq.nlargest(self.k, entries, key=lambda e: (e[0], e[1]))
+
+    def _offer(self, matches, owner, score, other, breakdown):
+        """Insert a candidate into owner's top-K list if it makes the cut."""
+        current = matches.setdefault(owner, [])
+        if len(current) >= self.k and (score, other) <= (current[-1][0], current[-1][1]):
+            return
+        current.append((score, other, breakdown))
+        current.sort(key=lambda e: (e[0], e[1]), reverse=True)
+        del current[self.k:]
+
+    def _sides(self, side):
+        """(own features, own by-crop, own top-K, other features, other by-crop, other top-K) for a side."""
+        listing = (self.listings, self.listings_by_crop, self.listing_matches)
+        demand = (self.demands, self.demands_by_crop, self.demand_matches)
+        return listing + demand if side == 'listing' else demand + listing
+
+    def _score(self, feats, other_feats, side):
+        today = self.scored_on
+        return score_pair(other_feats, feats, today) if side == 'listing' else score_pair(feats, other_feats, today)
+
+    def _check_day_locked(self):
+        """Forget yesterday's rankings (their harvest scores are out of date)."""
+        today = self.today()
+        if today != self.scored_on:
+            self.scored_on = today
+            self.demand_matches.clear()
+            self.listing_matches.clear()
+
+    def _ranked(self, record_id, side):
+        """A record's top-K, computed on first use and then maintained incrementally."""
+        own, _, own_matches, other, other_by_crop, _ = self._sides(side)
+        if record_id not in own_matches:
+            feats = own[record_id]
+            scored = (
+                self._score(feats, other[other_id], side) + (other_id,)
+                for other_id in other_by_crop.get(feats['crop'], ())
+            )
+            own_matches[record_id] = self._top((score, other_id, breakdown) for score, breakdown, other_id in scored)
+        return own_matches[record_id]
+
+    def _add(self, record, side):
+        own, by_crop, own_matches, other, other_by_crop, other_matches = self._sides(side)
+
+        with self.lock:
+            self._check_day_locked()
+            # Replace any previous version; rankings that included it are recomputed on next read
+            previous = own.pop(record['id'], None)
+            own_matches.pop(record['id'], None)
+            if previous is not None:
+                by_crop.get(previous['crop'], set()).discard(record['id'])
+                for owner in other_by_crop.get(previous['crop'], ()):
+                    if any(e[1] == record['id'] for e in other_matches.get(owner, ())):
+                        del other_matches[owner]
+
+            if side == 'demand' and str(record.get('status', '')).lower() in CLOSED_STATUSES:
+                return
+
+            feats = own[record['id']] = features(record, side)
+            by_crop.setdefault(feats['crop'], set()).add(record['id'])
+
+            # Offer the new record to every already-ranked counterpart of the same crop
+            for other_id in other_by_crop.get(feats['crop'], ()):
+                if other_id in other_matches:
+                    score, breakdown = self._score(feats, other[other_id], side)
+                    self._offer(other_matches, other_id, score, record['id'], breakdown)
+
+    def add_listing(self, record):
+        self._add(record, 'listing')
+
+    def add_demand(self, record):
+        self._add(record, 'demand')
+
+    def on_listing(self, old, new):
+        if new is not None:
+            self.add_listing(new)
+
+    def on_demand(self, old, new):
+        if new is not None:
+            self.add_demand(new)
+
+    def rebuild(self, listings, demands):
+        for record in listings:
+            self.add_listing(record)
+        for record in demands:
+            self.add_demand(record)
+
+    def matches_for_demand(self, demand_id, k=TOP_K):
+        """[(score, listing id, breakdown)] best first, or None for an unknown / closed demand."""
+        with self.lock:
+            self._check_day_locked()
+            if demand_id not in self.demands:
+                return None
+            return list(self._ranked(demand_id, 'demand')[:k])
+
+    def matches_for_listing(self, listing_id, k=TOP_K):
+        with self.lock:
+            self._check_day_locked()
+            if listing_id not in self.listings:
+                return None
+            return list(self._ranked(listing_id, 'listing')[:k])
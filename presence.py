@@ -0,0 +1,175 @@
+"""
+Presence tracker for /community/heartbeat and /community/online.
+
+Users are kept online for PRESENCE_TIMEOUT seconds after their last
+heartbeat. Last-seen times are monotonic floats and each user sits in one
+slot of a timing wheel keyed by its expiry tick, so:
+
+- a heartbeat is O(1) (dict update + move between two slot sets)
+- expiry only visits the slots whose time has passed and the users in them
+- the online list is a cached snapshot, rebuilt only when someone joins or leaves
+
+snapshot() returns that list with a version that changes whenever it does,
+so /community/online can answer a poll with a 304 without touching the list.
+
+With several worker processes the wheel would only see the heartbeats that
+reached its own worker, so SharedPresenceTracker keeps the same interface on
+top of a shared_state backend (one TTL key per user). Its snapshot is
+re-read when a shared join counter moves, or at most once per slot for
+expiries, and versioned by a digest of the list so every worker hands out
+the same ETag for the same users.
+"""
+
+import math
+import time
+import hashlib
+import threading
+
+PRESENCE_TIMEOUT = 300 # seconds
+SLOT_SECONDS = 5
+
+class PresenceTracker:
+    def __init__(self, timeout=PRESENCE_TIMEOUT, slot_seconds=SLOT_SECONDS, clock=time.monotonic, on_change=None):
+        self.timeout = timeout
+        self.slot_seconds = slot_seconds
+        self.clock = clock
+        self.on_change = on_change # on_change(user, online)
+        self.lock = threading.Lock()
+        self.last_seen = {} # user -> monotonic seconds (insertion order = first seen)
+        self.slot_of = {} # user -> wheel slot index
+        self.wheel = [set() for _ in range(math.ceil(timeout / slot_seconds) + 2)]
+        self.cursor = self._tick(clock()) # last tick whose slot has been expired
+        self.users = [] # cached online list
+        self.users_dirty = False
+        self.version = 0 # bumped on every join / expiry
+
+    def _tick(self, t):
+        return int(t // self.slot_seconds)
+
+    def heartbeat(self, user):
+        now = self.clock()
+        slot = math.ceil((now + self.timeout) / self.slot_seconds) % len(self.wheel)
+        with self.lock:
+            expired = self._expire_locked(now)
+            is_new = user not in self.last_seen
+            self.last_seen[user] = now
+            old_slot = self.slot_of.get(user)
+            if old_slot != slot:
+                if old_slot is not None:
+                    self.wheel[old_slot].discard(user)
+                self.wheel[slot].add(user)
+                self.slot_of[user] = slot
+            if is_new:
+                self.users_dirty = True
+                self.version += 1
+        self._notify(expired, user if is_new else None)
+        return is_new
+
+    def snapshot(self):
+        """(cached list of online users in first-seen order, version of that list)."""
+        with self.lock:
+            expired = self._expire_locked(self.clock())
+            if self.users_dirty:
+                self.users = list(self.last_seen)
+                self.users_dirty = False
+            users, version = self.users, self.version
+        self._notify(expired, None)
+        return users, version
+
+    def online(self):
+        return self.snapshot()[0]
+
+    def count(self):
+        return len(self.last_seen)
+
+    def _expire_locked(self, now):
+        """Empty every slot whose tick has passed. Returns the users that went offline."""
+        now_tick = self._tick(now)
+        if now_tick <= self.cursor:
+            return []
+        # After a long idle gap every slot is due once; no need to loop over skipped laps
+        first = max(self.cursor + 1, now_tick - len(self.wheel) + 1)
+        self.cursor = now_tick
+
+        expired = []
+        for tick in range(first, now_tick + 1):
+            bucket = self.wheel[tick % len(self.wheel)]
+            for user in list(bucket):
+                if self.last_seen[user] + self.timeout <= now:
+                    bucket.discard(user)
+                    del self.last_seen[user]
+                    del self.slot_of[user]
+                    expired.append(user)
+        if expired:
+            self.users_dirty = True
+            self.version += 1
+        return expired
+
+    def _notify(self, expired, joined):
+        if not self.on_change:
+            return
+        for user in expired:
+            self.on_change(user, False)
+        if joined is not None:
+            self.on_change(joined, True)
+
+class SharedPresenceTracker:
+    """PresenceTracker interface over a cross-process shared_state backend."""
+
+    def __init__(self, state, timeout=PRESENCE_TIMEOUT, slot_seconds=SLOT_SECONDS, on_change=None):
+        self.state = state
+        self.timeout = timeout
+        self.slot_seconds = slot_seconds
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        self.known = {} # users this process last reported online (dict as an ordered set)
+        self.users = []
+        self.version = None # digest of users
+        self.read_joins = None # shared join counter when users was read
+        self.read_at = None # state clock when users was read
+
+    def heartbeat(self, user):
+        is_new = self.state.touch('presence', user, self.timeout)
+        if is_new:
+            self.state.incr_many('presence_meta', {'joins': 1})
+        with self.lock:
+            joined = user not in self.known
+            self.known[user] = None
+        if joined and self.on_change:
+            self.on_change(user, True)
+        return is_new
+
+    def snapshot(self):
+        """(online users, version); one counter read per call, the full list only when it may have changed."""
+        joins = self.state.counters('presence_meta').get('joins', 0)
+        now = self.state.clock()
+        with self.lock:
+            if joins == self.read_joins and now - self.read_at < self.slot_seconds:
+                return self.users, self.version
+        users = self.state.live('presence')
+        version = hashlib.blake2b("\n".join(users).encode('utf-8'), digest_size=8).hexdigest()
+        current = dict.fromkeys(users)
+        with self.lock:
+            joined = [user for user in users if user not in self.known]
+            left = [user for user in self.known if user not in current]
+            self.known = current
+            self.users, self.version, self.read_joins, self.read_at = users, version, joins, now
+        if self.on_change:
+            # Each worker reports changes it observes to its own event-stream clients
+            for user in left:
+                self.on_change(user, False)
+            for user in joined:
+                self.on_change(user, True)
+        return users, version
+
+    def online(self):
+        return self.snapshot()[0]
+
+    def count(self):
+        return len(self.state.live('presence'))
+
+def create_tracker(state, timeout=PRESENCE_TIMEOUT, on_change=None):
+    """Timing-wheel tracker for a single process, shared tracker when the state backend is cross-process."""
+    if getattr(state, 'shared', False):
+        return SharedPresenceTracker(state, timeout=timeout, on_change=on_change)
+    return PresenceTracker(timeout=timeout, on_change=on_change)
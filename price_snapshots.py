@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Mandi Price Snapshot Store
+Persists every /market-prices result as a dated snapshot keyed by
+(state, district, category, date) in SQLite, so:
+
+1. Same-day requests are served from the snapshot instead of the LLM
+2. A bulk warm-up job can fill today's snapshots before the morning rush
+3. Historical prices can be queried by date range without calling the LLM
+
+CLI:
+    python price_snapshots.py warm [--districts top_districts.json] [--category All]
+    python price_snapshots.py history --state Bihar --district Patna --from 2026-10-01 --to 2026-10-19
+"""
+
+import os
+import json
+import sqlite3
+import asyncio
+import argparse
+import datetime
+import weakref
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_metrics import record_cache
+
+SNAPSHOT_DB_FILE = os.environ.get("PRICE_SNAPSHOT_DB", "market_price_snapshots.db")
+
+# Busiest mandi districts, warmed first thing in the morning
+TOP_DISTRICTS = [
+    ("Bihar", "Patna"), ("Bihar", "Muzaffarpur"), ("Bihar", "Gaya"), ("Bihar", "Bhagalpur"),
+    ("Uttar Pradesh", "Lucknow"), ("Uttar Pradesh", "Agra"), ("Uttar Pradesh", "Varanasi"),
+    ("Punjab", "Ludhiana"), ("Punjab", "Amritsar"), ("Haryana", "Karnal"), ("Haryana", "Hisar"),
+    ("Maharashtra", "Pune"), ("Maharashtra", "Nashik"), ("Maharashtra", "Nagpur"),
+    ("Madhya Pradesh", "Indore"), ("Madhya Pradesh", "Bhopal"), ("Rajasthan", "Jaipur"),
+    ("Gujarat", "Ahmedabad"), ("Gujarat", "Rajkot"), ("Karnataka", "Bengaluru Urban"),
+    ("Tamil Nadu", "Coimbatore"), ("Andhra Pradesh", "Guntur"), ("Telangana", "Hyderabad"),
+    ("West Bengal", "Kolkata"), ("Delhi", "New Delhi")
+]
+
+_open_stores = weakref.WeakSet()
+
+def _reconnect_after_fork():
+    for store in list(_open_stores):
+        store.connect()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reconnect_after_fork)
+
+def parse_districts(value):
+    """[[state, district], ...] (request body or --districts file) as tuples; ValueError if malformed."""
+    if not isinstance(value, list):
+        raise ValueError("districts must be an array of [state, district] pairs")
+    for item in value:
+        if not (isinstance(item, list) and len(item) == 2 and all(isinstance(part, str) and part.strip() for part in item)):
+            raise ValueError(f"Invalid district entry (expected [state, district]): {json.dumps(item)}")
+    return [tuple(item) for item in value]
+
+def normalize_key(state, district, category):
+    category = (category or 'All').strip() or 'All'
+    return (str(state or '').strip().lower(), str(district or '').strip().lower(), category.lower())
+
+class PriceSnapshotStore:
+    def __init__(self, path=SNAPSHOT_DB_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.key_locks = {} # key -> [lock, users]; only keys with a fetch in progress or waiting
+        self.inflight = {} # key -> asyncio.Task of the fetch in progress (get_or_fetch_async)
+        self.stale_connections = []
+        self.connect()
+        _open_stores.add(self)
+        with self.lock:
+            if path != ':memory:':
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_snapshots (
+                    state TEXT NOT NULL,
+                    district TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    snapshot_date TEXT NOT NULL,
+                    prices TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (state, district, category, snapshot_date)
+                )
+            """)
+            self.conn.commit()
+
+    def connect(self):
+        """(Re)open the connection; worker processes get their own after fork."""
+        if getattr(self, 'conn', None) is not None:
+            self.stale_connections.append(self.conn) # inherited from the parent: never used or closed here
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+
+    def get(self, state, district, category, date=None):
+        """Return the snapshot prices for a day, or None."""
+        date = (date or datetime.date.today()).isoformat()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT prices FROM price_snapshots WHERE state=? AND district=? AND category=? AND snapshot_date=?",
+                normalize_key(state, district, category) + (date,)
+            ).fetchone()
+        return json.loads(row['prices']) if row else None
+
+    def put(self, state, district, category, prices, date=None):
+        date = (date or datetime.date.today()).isoformat()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO price_snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                normalize_key(state, district, category) + (date, json.dumps(prices), datetime.datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+    def history(self, state, district, category='All', start=None, end=None):
+        """Snapshots between two dates (inclusive), oldest first."""
+        start = (start or datetime.date.min).isoformat()
+        end = (end or datetime.date.today()).isoformat()
+        with self.lock:
+            rows = self.conn.execute(
+                """SELECT snapshot_date, prices, fetched_at FROM price_snapshots
+                   WHERE state=? AND district=? AND category=? AND snapshot_date BETWEEN ? AND ?
+                   ORDER BY snapshot_date""",
+                normalize_key(state, district, category) + (start, end)
+            ).fetchall()
+        return [{'date': r['snapshot_date'], 'fetchedAt': r['fetched_at'], 'prices': json.loads(r['prices'])} for r in rows]
+
+    @contextlib.contextmanager
+    def _key_lock(self, key):
+        with self.lock:
+            entry = self.key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.key_locks[key]
+
+    def get_or_fetch(self, state, district, market, category, fetch):
+        """
+        Serve today's snapshot, or call `fetch(state, district, market, category)` once
+        (concurrent requests for the same key wait for the first fetch instead of
+        stampeding the LLM). Empty results are not persisted.
+        """
+        prices = self.get(state, district, category)
+        if prices is not None:
+            record_cache('market_prices', 'hit')
+            return prices
+
+        with self._key_lock(normalize_key(state, district, category)):
+            prices = self.get(state, district, category)
+            if prices is not None:
+                record_cache('market_prices', 'hit')
+                return prices
+
+            record_cache('market_prices', 'miss')
+            prices = fetch(state, district, market, category)
+            if prices:
+                self.put(state, district, category, prices)
+            return prices
+
+    async def get_or_fetch_async(self, state, district, market, category, fetch):
+        """
+        get_or_fetch() for the ASGI server: `await fetch(...)` runs once per key
+        while concurrent requests await the same task, and the SQLite reads and
+        writes run in a worker thread instead of blocking the event loop.
+        """
+        prices = await asyncio.to_thread(self.get, state, district, category)
+        if prices is not None:
+            record_cache('market_prices', 'hit')
+            return prices
+
+        key = normalize_key(state, district, category)
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_async(state, district, market, category, fetch))
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self.inflight.pop(key, None) if self.inflight.get(key) is done else None)
+        return await asyncio.shield(task) # a client disconnecting does not cancel the fetch for the others
+
+    async def _fetch_async(self, state, district, market, category, fetch):
+        prices = await asyncio.to_thread(self.get, state, district, category) # stored by a flight that just finished
+        if prices is not None:
+            record_cache('market_prices', 'hit')
+            return prices
+
+        record_cache('market_prices', 'miss')
+        prices = await fetch(state, district, market, category)
+        if prices:
+            await asyncio.to_thread(self.put, state, district, category, prices)
+        return prices
+
+    def warm_up(self, districts=TOP_DISTRICTS, category='All', fetch=None, workers=4):
+        """Fill today's snapshot for every (state, district) that doesn't have one yet."""
+        if fetch is None:
+            import market_engine
+            fetch = market_engine.get_market_prices
+
+        pending = [(state, district) for state, district in districts if self.get(state, district, category) is None]
+        print(f"Warming {len(pending)} of {len(districts)} district price snapshots...")
+
+        def warm(item):
+            state, district = item
+            prices = self.get_or_fetch(state, district, 'General', category, fetch)
+            return state, district, len(prices or [])
+
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for state, district, count in pool.map(warm, pending):
+                print(f"  {district}, {state}: {count} commodities")
+                results.append({'state': state, 'district': district, 'commodities': count})
+        return results
+
+def parse_date(value):
+    return datetime.date.fromisoformat(value) if value else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Mandi price snapshot store")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    warm = sub.add_parser('warm', help="Fetch today's snapshots for the top districts")
+    warm.add_argument('--districts', help="JSON file with [[state, district], ...]")
+    warm.add_argument('--category', default='All')
+    warm.add_argument('--workers', type=int, default=4)
+
+    hist = sub.add_parser('history', help="Print stored snapshots for a date range")
+    hist.add_argument('--state', required=True)
+    hist.add_argument('--district', required=True)
+    hist.add_argument('--category', default='All')
+    hist.add_argument('--from', dest='start')
+    hist.add_argument('--to', dest='end')
+
+    args = parser.parse_args()
+    store = PriceSnapshotStore()
+
+    if args.command == 'warm':
+        districts = TOP_DISTRICTS
+        if args.districts:
+            with open(args.districts, 'r') as f:
+                districts = parse_districts(json.load(f))
+        store.warm_up(districts, category=args.category, workers=args.workers)
+    elif args.command == 'history':
+        snapshots = store.history(args.state, args.district, args.category, parse_date(args.start), parse_date(args.end))
+        print(json.dumps(snapshots, indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""
+Marketplace & Community Search Index
+In-memory inverted index over listings (crop name, location, quality) and
+community posts (title, content), kept up to date from the storage
+listeners on every write.
+
+- Tokeniser handles English and Hindi (Devanagari, including vowel signs),
+  and maps common Hindi crop names onto their English form, so "गेहूं" finds
+  "Wheat" listings and vice versa.
+- Postings are append-only lists of increasing doc numbers, so a query walks
+  the rarest term's postings from the newest end, checks the other terms by
+  binary search, applies price/quantity ranges, and stops once `limit`
+  matches are found: cost depends on the page size, not the corpus size.
+- Listing prices and quantities are also kept in sorted arrays. A range
+  filter is sized by bisection first; when it is narrower than every term's
+  postings, the query is driven from that slice instead (and an empty range
+  answers at once).
+- Deleted and closed records, and the old docs of re-indexed ones, are only
+  marked stale; once stale docs outnumber live ones the index is compacted.
+"""
+
+import re
+import heapq
+import bisect
+import threading
+import unicodedata
+
+# ASCII letters/digits and Devanagari (U+0900-U+097F) minus the danda punctuation marks
+TOKEN_RE = re.compile(r"[0-9a-z\u0900-\u0963\u0966-\u097f]+")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'the', 'of', 'in', 'on', 'for', 'to', 'is', 'are', 'with', 'my', 'what', 'how', 'should', 'i',
+    'का', 'की', 'के', 'में', 'है', 'हैं', 'और', 'को', 'से', 'पर', 'क्या', 'कैसे', 'मेरी', 'मेरा', 'भी'
+}
+
+# Hindi / Hinglish crop names -> English index token
+SYNONYMS = {
+    'गेहूं': 'wheat', 'गेहूँ': 'wheat', 'gehun': 'wheat', 'gehu': 'wheat',
+    'चावल': 'rice', 'धान': 'rice', 'chawal': 'rice', 'dhan': 'rice', 'paddy': 'rice',
+    'टमाटर': 'tomato', 'tamatar': 'tomato',
+    'आलू': 'potato', 'aloo': 'potato', 'alu': 'potato',
+    'प्याज': 'onion', 'pyaz': 'onion', 'pyaj': 'onion',
+    'मक्का': 'maize', 'makka': 'maize', 'corn': 'maize',
+    'कपास': 'cotton', 'kapas': 'cotton',
+    'सरसों': 'mustard', 'sarson': 'mustard',
+    'गन्ना': 'sugarcane', 'ganna': 'sugarcane',
+    'सोयाबीन': 'soybean', 'soyabean': 'soybean',
+    'दाल': 'pulses', 'dal': 'pulses',
+    'मिर्च': 'chilli', 'mirch': 'chilli', 'chili': 'chilli',
+    'केला': 'banana', 'kela': 'banana',
+    'आम': 'mango', 'aam': 'mango',
+    'बिहार': 'bihar', 'पटना': 'patna', 'पंजाब': 'punjab'
+}
+
+LISTING_FIELDS = ('cropName', 'location', 'quality')
+POST_FIELDS = ('title', 'content')
+CLOSED_STATUSES = {'closed', 'sold', 'fulfilled', 'cancelled'} # listings in these states drop out of search
+COMPACT_MIN_STALE = 1000 # compact when stale docs exceed this and the number of live docs
+
+def _stem(token):
+    """Light English plural folding (tomatoes -> tomato, potatoes -> potato, onions -> onion)."""
+    if token.isascii() and len(token) > 4:
+        if token.endswith('oes'):
+            return token[:-2]
+        if token.endswith('s') and not token.endswith('ss'):
+            return token[:-1]
+    return token
+
+def tokenize(text):
+    text = unicodedata.normalize('NFC', str(text or '')).lower()
+    tokens = []
+    for token in TOKEN_RE.findall(text):
+        if token in STOPWORDS:
+            continue
+        token = SYNONYMS.get(token, token)
+        tokens.append(_stem(token))
+    return tokens
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _in_range(value, low, high):
+    if low is None and high is None:
+        return True
+    if value is None:
+        return False
+    return (low is None or value >= low) and (high is None or value <= high)
+
+class RangeIndex:
+    """
+    Docs sorted by a numeric value: parallel (values, docs) arrays searched
+    with bisect. New docs wait in a buffer and are merged in by the next
+    query, so a bulk rebuild is one sort instead of an insert per doc.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.docs = []
+        self.pending = []
+
+    def add(self, value, doc):
+        self.pending.append((value, doc))
+
+    def _merge_pending(self):
+        if len(self.pending) <= 32:
+            for value, doc in self.pending:
+                i = bisect.bisect_right(self.values, value)
+                self.values.insert(i, value)
+                self.docs.insert(i, doc)
+        else:
+            merged = list(heapq.merge(zip(self.values, self.docs), sorted(self.pending)))
+            self.values = [value for value, _ in merged]
+            self.docs = [doc for _, doc in merged]
+        self.pending = []
+
+    def bounds(self, low, high):
+        """(start, end) of the docs with low <= value <= high (None: unbounded)."""
+        if self.pending:
+            self._merge_pending()
+        start = 0 if low is None else bisect.bisect_left(self.values, low)
+        end = len(self.values) if high is None else bisect.bisect_right(self.values, high)
+        return start, max(start, end)
+
+class SearchIndex:
+    def __init__(self, compact_min_stale=COMPACT_MIN_STALE):
+        self.lock = threading.Lock()
+        self.compact_min_stale = compact_min_stale
+        self.scanned = 0 # candidate docs examined by search() (query cost, for tests and metrics)
+        self._reset()
+
+    def _reset(self):
+        self.postings = {} # token -> ascending list of doc numbers
+        self.docs = [] # doc number -> (kind, record id, price, quantity, tokens)
+        self.live = {} # (kind, record id) -> current doc number
+        self.kind_postings = {'listing': [], 'post': []}
+        self.by_price = RangeIndex()
+        self.by_quantity = RangeIndex()
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.live)
+
+    def add(self, kind, record):
+        """Index (or re-index) a listing or post."""
+        fields = LISTING_FIELDS if kind == 'listing' else POST_FIELDS
+        tokens = set()
+        for field in fields:
+            tokens.update(tokenize(record.get(field)))
+        price = _number(record.get('price')) if kind == 'listing' else None
+        quantity = _number(record.get('quantity')) if kind == 'listing' else None
+
+        with self.lock:
+            if (kind, record['id']) in self.live:
+                self.stale += 1 # the older doc for this record
+            self._append_locked(kind, record['id'], price, quantity, tuple(tokens))
+            self._maybe_compact_locked()
+
+    def _append_locked(self, kind, record_id, price, quantity, tokens):
+        doc = len(self.docs)
+        self.docs.append((kind, record_id, price, quantity, tokens))
+        self.live[(kind, record_id)] = doc
+        self.kind_postings[kind].append(doc)
+        for token in tokens:
+            self.postings.setdefault(token, []).append(doc)
+        if price is not None:
+            self.by_price.add(price, doc)
+        if quantity is not None:
+            self.by_quantity.add(quantity, doc)
+
+    def remove(self, kind, record_id):
+        """Drop a deleted or closed record from results."""
+        with self.lock:
+            if self.live.pop((kind, record_id), None) is not None:
+                self.stale += 1
+                self._maybe_compact_locked()
+
+    def _maybe_compact_locked(self):
+        if self.stale > self.compact_min_stale and self.stale > len(self.live):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Renumber the live docs (keeping their order) and drop everything stale."""
+        current = [self.docs[doc] for doc in sorted(self.live.values())]
+        self._reset()
+        for kind, record_id, price, quantity, tokens in current:
+            self._append_locked(kind, record_id, price, quantity, tokens)
+
+    def compact(self):
+        with self.lock:
+            self._compact_locked()
+
+    def on_listing(self, old, new):
+        if new is None:
+            if old is not None:
+                self.remove('listing', old['id'])
+        elif str(new.get('status', '')).lower() in CLOSED_STATUSES:
+            self.remove('listing', new['id'])
+        elif old is None or str(old.get('status', '')).lower() in CLOSED_STATUSES \
+                or any(old.get(f) != new.get(f) for f in LISTING_FIELDS + ('price', 'quantity')):
+            self.add('listing', new)
+
+    def on_post(self, old, new):
+        if new is None:
+            if old is not None:
+                self.remove('post', old['id'])
+        elif old is None or any(old.get(f) != new.get(f) for f in POST_FIELDS):
+            self.add('post', new)
+
+    def rebuild(self, listings, posts):
+        """Index full store contents (records oldest first)."""
+        for record in listings:
+            self.on_listing(None, record)
+        for record in posts:
+            self.add('post', record)
+
+    @staticmethod
+    def _contains(postings, doc):
+        i = bisect.bisect_left(postings, doc)
+        return i < len(postings) and postings[i] == doc
+
+    def search(self, query='', kind=None, min_price=None, max_price=None, min_quantity=None, max_quantity=None, limit=20):
+        """
+        AND-match all query tokens (newest first). Returns [(kind, record id)].
+        Range filters only apply to listings.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        ranged = any(v is not None for v in (min_price, max_price, min_quantity, max_quantity))
+        if ranged and kind is None:
+            kind = 'listing'
+
+        with self.lock:
+            lists = [self.postings.get(token, []) for token in tokens]
+            if kind:
+                lists.append(self.kind_postings.get(kind, []))
+            if not lists:
+                lists = [range(len(self.docs))]
+            if any(len(p) == 0 for p in lists):
+                return []
+            lists.sort(key=len)
+            driver, others = lists[0], lists[1:]
+
+            # A range slice narrower than every postings list drives the query instead
+            slices = []
+            if min_price is not None or max_price is not None:
+                slices.append((self.by_price, self.by_price.bounds(min_price, max_price)))
+            if min_quantity is not None or max_quantity is not None:
+                slices.append((self.by_quantity, self.by_quantity.bounds(min_quantity, max_quantity)))
+            if slices:
+                index, (start, end) = min(slices, key=lambda item: item[1][1] - item[1][0])
+                if start == end:
+                    return []
+                if end - start < len(driver):
+                    driver, others = sorted(index.docs[start:end]), lists
+
+            results = []
+            for i in range(len(driver) - 1, -1, -1):
+                doc = driver[i]
+                self.scanned += 1
+                if not all(self._contains(p, doc) for p in others):
+                    continue
+                doc_kind, record_id, price, quantity, _ = self.docs[doc]
+                if self.live.get((doc_kind, record_id)) != doc:
+                    continue # deleted, closed or superseded by a re-index
+                if ranged and not (_in_range(price, min_price, max_price) and _in_range(quantity, min_quantity, max_quantity)):
+                    continue
+                results.append((doc_kind, record_id))
+                if len(results) >= limit:
+                    break
+        return results
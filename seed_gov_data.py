@@ -1,10 +1,8 @@
-
-import json
 import uuid
 from datetime import datetime
 import random
 
-CROP_LOSS_FILE = "crop_loss_data.json"
+from storage import Database
 
 crops = ["Wheat", "Rice", "Cotton", "Maize", "Potato", "Soybean"]
 causes = ["Pest Attack (Pink Bollworm)", "Unexpected Hailstorm", "Flooding", "Drought", "Fungal Disease (Rust)"]
@@ -33,6 +31,6 @@ def generate_cases():
 
 if __name__ == "__main__":
     data = generate_cases()
-    with open(CROP_LOSS_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
-    print(f"Seeded {len(data)} sample crop loss cases into {CROP_LOSS_FILE}")
+    db = Database()
+    db.collection('crop_loss_cases').insert_many(data)
+    print(f"Seeded {len(data)} sample crop loss cases into {db.path}")
@@ -0,0 +1,127 @@
+"""
+Serialization layer for AgriSphere AI.
+
+- dumps / loads: compact JSON through orjson when it is installed (falls back
+  to the stdlib json module with the same compact output otherwise).
+- FastJSONProvider: Flask JSON provider on top of dumps, so every jsonify()
+  response skips the stdlib encoder, key sorting and ASCII escaping.
+- RECORD_SCHEMAS: typed field schemas for the persisted stores, used to
+  reject malformed records on bulk import (bulk_io.py).
+
+Store rows stay JSON text (not a binary format) because storage.py indexes
+them with SQLite json_extract() expressions; they are written compact, without
+the separator whitespace, and parsed with orjson.
+
+    python bench_serialization.py   # stdlib vs. fast encoder timings
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError: # storage / CLI tools run without Flask
+    DefaultJSONProvider = object
+
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+def _default(obj):
+    """Types orjson / json do not handle natively (numpy scalars, sets, HTML-safe strings)."""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj, indent=False):
+    """Encode to compact UTF-8 JSON bytes (2-space indented when indent is set)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+    if indent:
+        return json.dumps(obj, default=_default, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def dumps_text(obj):
+    """Compact JSON as str (for SQLite TEXT columns and NDJSON lines)."""
+    return dumps(obj).decode('utf-8')
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider: app.json = FastJSONProvider(app)."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(dumps(obj, indent=indent) + b"\n", mimetype=self.mimetype)
+
+# Typed record schemas: field -> accepted types. Required fields must be present
+# and not None; optional fields are only checked when present. Numbers also
+# accept strings because the forms have always posted quantity/price as typed.
+NUMBER = (int, float, str)
+TEXT = (str,)
+
+RECORD_SCHEMAS = {
+    'listings': {
+        'required': {'id': TEXT, 'farmerName': TEXT, 'cropName': TEXT, 'quantity': NUMBER, 'price': NUMBER, 'location': TEXT},
+        'optional': {'contactNumber': NUMBER, 'harvestDate': TEXT, 'quality': TEXT, 'timestamp': TEXT, 'verified': (bool,)}
+    },
+    'crop_loss_cases': {
+        'required': {'id': TEXT, 'crop': TEXT, 'status': TEXT},
+        'optional': {
+            'farmerName': TEXT, 'season': TEXT, 'cause': TEXT, 'location': TEXT, 'timestamp': TEXT,
+            'damagePercentage': NUMBER, 'estimatedLoss': NUMBER, 'suggestedCompensation': NUMBER,
+            'isEligible': (bool,), 'suggestedScheme': TEXT, 'advisoryCompliance': (dict,), 'evidence': (str, list, dict),
+            'verificationRequestedAt': TEXT
+        }
+    },
+    'posts': {
+        'required': {'id': TEXT},
+        'optional': {'title': TEXT, 'content': TEXT, 'author': TEXT, 'timestamp': TEXT, 'likes': (int,), 'comments': (list,), 'tags': (list,)}
+    },
+    'buyer_interactions': {
+        'required': {'id': TEXT, 'buyerId': TEXT, 'listingId': TEXT},
+        'optional': {'farmerName': TEXT, 'crop': TEXT, 'status': TEXT, 'timestamp': TEXT}
+    }
+}
+
+def _type_names(types):
+    return '/'.join(dict.fromkeys('number' if t in (int, float) else t.__name__ for t in types))
+
+def check_record(collection, record):
+    """Validate a record against its store schema. Returns an error message or None."""
+    schema = RECORD_SCHEMAS.get(collection)
+    if schema is None:
+        return None
+    for field, types in schema['required'].items():
+        value = record.get(field)
+        if value is None or value == '':
+            return f"Missing field: {field}"
+        if isinstance(value, bool) and bool not in types or not isinstance(value, types):
+            return f"{field} must be {_type_names(types)}"
+    for field, types in schema['optional'].items():
+        value = record.get(field)
+        if value is None:
+            continue
+        if isinstance(value, bool) and bool not in types or not isinstance(value, types):
+            return f"{field} must be {_type_names(types)}"
+    return None
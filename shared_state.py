@@ -0,0 +1,242 @@
+"""
+Shared state for running the API under several worker processes.
+
+Presence, the digital-twin cache and the LLM metric counters used to live in
+plain dicts, so every gunicorn worker had its own copy. They now go through a
+small namespaced key/value interface with two backends:
+
+- MemoryBackend   dicts in this process (single worker, tests; the default)
+- SQLiteBackend   one WAL-mode SQLite file shared by every worker on the host
+
+    AGRISPHERE_SHARED_STATE=memory               # default
+    AGRISPHERE_SHARED_STATE=sqlite               # agrisphere_state.db
+    AGRISPHERE_SHARED_STATE=sqlite:/run/agri.db  # explicit path
+
+Interface (ns = namespace, key = str):
+    get(ns, key) / set(ns, key, value, ttl=None) / delete(ns, key)
+    touch(ns, key, ttl)      refresh a TTL key; True if it was absent or expired
+    live(ns)                 unexpired keys, in first-set order
+    incr_many(ns, {key: n})  add to counters in one write
+    counters(ns)             {key: value}
+    purge_expired()          drop expired keys in every namespace; returns how many
+
+Writes also purge expired keys, at most every PURGE_INTERVAL seconds, so
+presence entries of users who never come back and expired twin / insight
+cache entries do not pile up.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+from serialization import dumps_text, loads
+
+SHARED_STATE_URL = os.environ.get("AGRISPHERE_SHARED_STATE", "memory")
+SHARED_STATE_FILE = "agrisphere_state.db"
+PURGE_INTERVAL = 60 # seconds
+
+class MemoryBackend:
+    shared = False
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.values = {} # ns -> {key: (value, expires_at or None)}, in first-set order
+        self.counter_values = {} # ns -> {key: number}
+        self.next_purge = clock() + PURGE_INTERVAL
+
+    def _live_entry(self, ns, key, now):
+        entries = self.values.get(ns, {})
+        entry = entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del entries[key]
+            return None
+        return entry
+
+    def _maybe_purge(self, now):
+        if now >= self.next_purge:
+            self.next_purge = now + PURGE_INTERVAL
+            self._purge(now)
+
+    def _purge(self, now):
+        removed = 0
+        for entries in self.values.values():
+            expired = [key for key, (_, expires_at) in entries.items() if expires_at is not None and expires_at <= now]
+            for key in expired:
+                del entries[key]
+            removed += len(expired)
+        return removed
+
+    def purge_expired(self):
+        with self.lock:
+            return self._purge(self.clock())
+
+    def get(self, ns, key):
+        with self.lock:
+            entry = self._live_entry(ns, key, self.clock())
+        return entry[0] if entry else None
+
+    def set(self, ns, key, value, ttl=None):
+        now = self.clock()
+        expires_at = now + ttl if ttl else None
+        with self.lock:
+            entries = self.values.setdefault(ns, {})
+            entries.pop(key, None)
+            entries[key] = (value, expires_at)
+            self._maybe_purge(now)
+
+    def delete(self, ns, key):
+        with self.lock:
+            self.values.get(ns, {}).pop(key, None)
+
+    def touch(self, ns, key, ttl):
+        now = self.clock()
+        with self.lock:
+            self._maybe_purge(now)
+            entry = self._live_entry(ns, key, now)
+            entries = self.values.setdefault(ns, {})
+            if entry is None:
+                entries[key] = (None, now + ttl)
+                return True
+            entries[key] = (entry[0], now + ttl) # keeps first-set position
+            return False
+
+    def live(self, ns):
+        now = self.clock()
+        with self.lock:
+            return [key for key in list(self.values.get(ns, {})) if self._live_entry(ns, key, now) is not None]
+
+    def incr_many(self, ns, amounts):
+        with self.lock:
+            values = self.counter_values.setdefault(ns, {})
+            for key, amount in amounts.items():
+                values[key] = values.get(key, 0) + amount
+
+    def counters(self, ns):
+        with self.lock:
+            return dict(self.counter_values.get(ns, {}))
+
+class SQLiteBackend:
+    """Shared across processes through one SQLite file (WAL, one connection per thread)."""
+    shared = True
+
+    def __init__(self, path=SHARED_STATE_FILE, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.local = threading.local()
+        self.stale_locals = [] # connections inherited across fork are never reused or closed
+        self.next_purge = clock() + PURGE_INTERVAL # per process; any worker's purge serves all
+        conn = self.connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shared_values (
+                    ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT, expires_at REAL,
+                    PRIMARY KEY (ns, key)
+                )
+            """)
+            # live() and the expiry purge are range scans on this instead of walking every key ever set
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_shared_values_expiry ON shared_values(ns, expires_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shared_counters (
+                    ns TEXT NOT NULL, key TEXT NOT NULL, value REAL NOT NULL,
+                    PRIMARY KEY (ns, key)
+                )
+            """)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self.stale_locals.append(self.local)
+        self.local = threading.local()
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, ns, key):
+        row = self.connection().execute(
+            "SELECT value FROM shared_values WHERE ns=? AND key=? AND (expires_at IS NULL OR expires_at > ?)",
+            (ns, key, self.clock())
+        ).fetchone()
+        return loads(row[0]) if row and row[0] is not None else None
+
+    def _maybe_purge(self, conn, now):
+        if now >= self.next_purge:
+            self.next_purge = now + PURGE_INTERVAL
+            self._purge(conn, now)
+
+    def _purge(self, conn, now):
+        return conn.execute("DELETE FROM shared_values WHERE expires_at <= ?", (now,)).rowcount
+
+    def purge_expired(self):
+        with self.connection() as conn:
+            return self._purge(conn, self.clock())
+
+    def set(self, ns, key, value, ttl=None):
+        now = self.clock()
+        expires_at = now + ttl if ttl else None
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO shared_values VALUES (?, ?, ?, ?)",
+                (ns, key, dumps_text(value), expires_at)
+            )
+            self._maybe_purge(conn, now)
+
+    def delete(self, ns, key):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM shared_values WHERE ns=? AND key=?", (ns, key))
+
+    def touch(self, ns, key, ttl):
+        now = self.clock()
+        conn = self.connection()
+        with conn:
+            self._maybe_purge(conn, now)
+            # Expired rows are dropped first so the rowid (first-set order) starts over
+            conn.execute(
+                "DELETE FROM shared_values WHERE ns=? AND key=? AND expires_at IS NOT NULL AND expires_at <= ?",
+                (ns, key, now)
+            )
+            updated = conn.execute(
+                "UPDATE shared_values SET expires_at=? WHERE ns=? AND key=?", (now + ttl, ns, key)
+            ).rowcount
+            if not updated:
+                conn.execute("INSERT INTO shared_values VALUES (?, ?, NULL, ?)", (ns, key, now + ttl))
+        return not updated
+
+    def live(self, ns):
+        # Two index range scans (unexpired TTL keys, keys without a TTL), merged in first-set order
+        rows = self.connection().execute(
+            """SELECT key, rowid FROM shared_values WHERE ns=? AND expires_at > ?
+               UNION ALL
+               SELECT key, rowid FROM shared_values WHERE ns=? AND expires_at IS NULL
+               ORDER BY 2""",
+            (ns, self.clock(), ns)
+        )
+        return [row[0] for row in rows]
+
+    def incr_many(self, ns, amounts):
+        with self.connection() as conn:
+            conn.executemany(
+                """INSERT INTO shared_counters VALUES (?, ?, ?)
+                   ON CONFLICT(ns, key) DO UPDATE SET value = value + excluded.value""",
+                [(ns, key, amount) for key, amount in amounts.items()]
+            )
+
+    def counters(self, ns):
+        rows = self.connection().execute("SELECT key, value FROM shared_counters WHERE ns=?", (ns,))
+        return {key: int(value) if float(value).is_integer() else value for key, value in rows}
+
+def open_shared_state(url=SHARED_STATE_URL):
+    """Backend for an AGRISPHERE_SHARED_STATE value ('memory', 'sqlite' or 'sqlite:<path>')."""
+    kind, _, path = url.partition(':')
+    if kind == 'memory':
+        return MemoryBackend()
+    if kind == 'sqlite':
+        return SQLiteBackend(path or SHARED_STATE_FILE)
+    raise ValueError(f"Unknown shared state backend: {url}")
@@ -73,17 +73,20 @@ const BuyerDashboard = () => {
     const [savedListings, setSavedListings] = useState<Set<string>>(new Set());
 
     useEffect(() => {
-        fetchListings();
-        fetchInteractions();
+        fetchDashboard();
     }, []);
 
-    const fetchListings = async () => {
+    // Listings + this buyer's interactions in one round trip
+    const fetchDashboard = async () => {
         try {
             setLoading(true);
-            const res = await axios.get(`${API_URL}/listings`);
-            setListings(res.data);
+            const params = user ? { buyerId: user.id } : {};
+            const res = await axios.get(`${API_URL}/dashboard/buyer`, { params });
+            const { listings, interactions } = res.data.sections;
+            if (listings.data) setListings(listings.data);
+            if (user && interactions.data) setInteractions(interactions.data);
         } catch (error) {
-            console.error("Error fetching listings", error);
+            console.error("Error fetching buyer dashboard", error);
         } finally {
             setLoading(false);
         }
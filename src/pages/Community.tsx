@@ -1,5 +1,5 @@
 
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 import { Button } from "@/components/ui/button";
@@ -38,6 +38,17 @@ interface ChatMessage {
     timestamp: string;
 }
 
+const CHAT_HISTORY_LIMIT = 100;
+
+// Merge a `since=` delta into the current list: changed items are replaced in place, new ones added
+const mergeById = <T extends { id: string }>(current: T[], changed: T[], newestFirst: boolean): T[] => {
+    const updated = new Map(changed.map(item => [item.id, item]));
+    const existing = new Set(current.map(item => item.id));
+    const merged = current.map(item => updated.get(item.id) ?? item);
+    const added = changed.filter(item => !existing.has(item.id));
+    return newestFirst ? [...added.reverse(), ...merged] : [...merged, ...added];
+};
+
 const Community = () => {
     const { toast } = useToast();
     const [activeTab, setActiveTab] = useState("forum");
@@ -62,14 +73,67 @@ const Community = () => {
 
     const API_URL = 'http://localhost:5000';
 
+    // Sync tokens from X-Sync-Token; polls after the first load only fetch what changed
+    const postsSyncToken = useRef<string | null>(null);
+    const chatSyncToken = useRef<string | null>(null);
+
+    // Live updates over Server-Sent Events; the polling below only runs while the stream is down
+    const [streamConnected, setStreamConnected] = useState(false);
+
+    useEffect(() => {
+        if (typeof EventSource === 'undefined') return;
+
+        const source = new EventSource(`${API_URL}/community/events?username=${encodeURIComponent(username)}`);
+        const onEvent = <T,>(type: string, handler: (data: T) => void) =>
+            source.addEventListener(type, (e) => handler(JSON.parse((e as MessageEvent).data)));
+
+        source.onopen = () => {
+            setStreamConnected(true);
+            // Catch up on anything missed while disconnected
+            fetchPosts();
+            fetchChat();
+            fetchOnlineUsers();
+        };
+        source.onerror = () => setStreamConnected(false); // EventSource reconnects with Last-Event-ID
+
+        onEvent<Post>('post', (post) => setPosts(prev => mergeById(prev, [post], true)));
+        onEvent<{ postId: string; comment: Post['comments'][number] }>('comment', ({ postId, comment }) =>
+            setPosts(prev => prev.map(p => p.id === postId
+                ? { ...p, comments: [...(p.comments || []).filter(c => c.id !== comment.id), comment] }
+                : p))
+        );
+        onEvent<ChatMessage>('chat', (msg) =>
+            setChatMessages(prev => mergeById(prev, [msg], false).slice(-CHAT_HISTORY_LIMIT))
+        );
+        onEvent<{ user: string; online: boolean }>('presence', ({ user, online }) =>
+            setOnlineUsers(prev => online
+                ? (prev.includes(user) ? prev : [...prev, user])
+                : prev.filter(u => u !== user))
+        );
+        onEvent('reset', () => {
+            // Too far behind the server's event history: refetch everything
+            postsSyncToken.current = null;
+            chatSyncToken.current = null;
+            fetchPosts();
+            fetchChat();
+            fetchOnlineUsers();
+        });
+
+        return () => {
+            source.close();
+            setStreamConnected(false);
+        };
+    }, [username]);
+
     useEffect(() => {
         fetchPosts();
-        const interval = setInterval(fetchPosts, 10000); // Polling for updates
+        if (streamConnected) return;
+        const interval = setInterval(fetchPosts, 10000); // Polling fallback
         return () => clearInterval(interval);
-    }, []);
+    }, [streamConnected]);
 
     useEffect(() => {
-        if (activeTab === 'chat') {
+        if (activeTab === 'chat' && !streamConnected) {
             fetchChat();
             fetchOnlineUsers();
             const interval = setInterval(() => {
@@ -77,7 +141,7 @@ const Community = () => {
                 fetchOnlineUsers();
             }, 3000); // Faster polling for chat
 
-            // Heartbeat
+            // Heartbeat (the event stream keeps the user online while connected)
             const heartbeat = setInterval(() => {
                 axios.post(`${API_URL}/community/heartbeat`, { username });
             }, 10000);
@@ -90,7 +154,7 @@ const Community = () => {
                 clearInterval(heartbeat);
             };
         }
-    }, [activeTab, username]);
+    }, [activeTab, username, streamConnected]);
 
     const fetchOnlineUsers = async () => {
         try {
@@ -103,8 +167,15 @@ const Community = () => {
 
     const fetchPosts = async () => {
         try {
-            const res = await axios.get(`${API_URL}/community/posts`);
-            setPosts(res.data);
+            const since = postsSyncToken.current;
+            const res = await axios.get(`${API_URL}/community/posts`, { params: since !== null ? { since } : {} });
+            if (since !== null) {
+                const changed: Post[] = res.data;
+                if (changed.length) setPosts(prev => mergeById(prev, changed, true));
+            } else {
+                setPosts(res.data);
+            }
+            postsSyncToken.current = res.headers['x-sync-token'] ?? null;
             setError("");
         } catch (error) {
             console.error("Error fetching posts:", error);
@@ -116,8 +187,15 @@ const Community = () => {
 
     const fetchChat = async () => {
         try {
-            const res = await axios.get(`${API_URL}/community/chat`);
-            setChatMessages(res.data);
+            const since = chatSyncToken.current;
+            const res = await axios.get(`${API_URL}/community/chat`, { params: since !== null ? { since } : {} });
+            if (since !== null) {
+                const changed: ChatMessage[] = res.data;
+                if (changed.length) setChatMessages(prev => mergeById(prev, changed, false).slice(-CHAT_HISTORY_LIMIT));
+            } else {
+                setChatMessages(res.data);
+            }
+            chatSyncToken.current = res.headers['x-sync-token'] ?? null;
         } catch (error) {
             console.error("Error fetching chat:", error);
         }
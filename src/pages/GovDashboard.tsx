@@ -79,12 +79,11 @@ const GovDashboard = () => {
 
     const fetchData = async () => {
         try {
-            const [statsRes, casesRes] = await Promise.all([
-                axios.get(`${API_URL}/gov/stats`),
-                axios.get(`${API_URL}/gov/crop-loss`)
-            ]);
-            setStats(statsRes.data);
-            setCases(casesRes.data);
+            // Stats + crop-loss cases in one round trip (each section has its own updatedAt)
+            const res = await axios.get(`${API_URL}/dashboard/gov`);
+            const { stats, cropLoss } = res.data.sections;
+            if (stats.data) setStats(stats.data);
+            if (cropLoss.data) setCases(cropLoss.data);
             setLoading(false);
         } catch (error) {
             console.error("Error fetching gov data:", error);
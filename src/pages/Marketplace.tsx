@@ -75,16 +75,18 @@ const Marketplace = () => {
   const [demands, setDemands] = useState<any[]>([]);
 
   useEffect(() => {
-    fetchListings();
-    fetchDemands();
+    fetchMarketplace();
   }, []);
 
-  const fetchDemands = async () => {
+  // Listings + demands in one round trip
+  const fetchMarketplace = async () => {
     try {
-      const res = await axios.get("http://localhost:5000/demands");
-      setDemands(res.data);
+      const res = await axios.get("http://localhost:5000/dashboard/marketplace");
+      const { listings, demands } = res.data.sections;
+      if (listings.data) setListings(listings.data);
+      if (demands.data) setDemands(demands.data);
     } catch (err) {
-      console.error("Failed to fetch demands", err);
+      console.error("Failed to fetch marketplace", err);
     }
   };
 
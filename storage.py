@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite storage engine for AgriSphere AI.
+
+Replaces the whole-file JSON read-modify-write helpers (load_*/save_*) with
+per-row inserts and updates in a WAL-mode SQLite database. Each store is a
+Collection: one table holding the record JSON plus expression indexes on the
+fields the routes look records up by. Route contracts are unchanged: records
+go in and come out as the same dicts the JSON files held, in the same order.
+
+    python storage.py migrate   # one-shot import of the legacy JSON files
+"""
+
+import os
+import json
+import uuid
+import sqlite3
+import threading
+import copy
+import weakref
+import contextlib
+
+from serialization import dumps_text, loads
+
+DATABASE_FILE = os.environ.get("AGRISPHERE_DB", "agrisphere.db")
+
+# Collection name -> legacy JSON source, display order and indexed fields.
+# newest_first mirrors whether the old routes did insert(0, ...) or append(...).
+# memory_indexes (when present) keeps an in-memory id -> record map plus hash
+# indexes on the listed fields, rebuilt from the table on start.
+COLLECTIONS = {
+    'listings': {
+        'json_file': 'marketplace_listings.json', 'json_key': None,
+        'newest_first': True, 'indexes': ('cropName', 'location'), 'memory_indexes': ()
+    },
+    'demands': {
+        'json_file': 'demands.json', 'json_key': None,
+        'newest_first': False, 'indexes': ('buyerId', 'crop')
+    },
+    'posts': {
+        'json_file': 'community_data.json', 'json_key': 'posts',
+        'newest_first': True, 'indexes': (), 'memory_indexes': ()
+    },
+    # Only read to seed the chat log (chat_log.py) on first start
+    'chat': {
+        'json_file': 'community_data.json', 'json_key': 'chat',
+        'newest_first': False, 'indexes': ()
+    },
+    'buyer_interactions': {
+        'json_file': 'buyer_interactions.json', 'json_key': None,
+        'newest_first': True, 'indexes': ('buyerId', 'listingId'), 'memory_indexes': ('buyerId', 'listingId')
+    },
+    'crop_loss_cases': {
+        'json_file': 'crop_loss_data.json', 'json_key': None,
+        'newest_first': True, 'indexes': ('status',), 'memory_indexes': ('status',)
+    },
+}
+
+_open_databases = weakref.WeakSet()
+
+def _reset_after_fork():
+    for db in list(_open_databases):
+        db._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+class Database:
+    """A WAL-mode SQLite file with one connection per thread."""
+
+    def __init__(self, path=DATABASE_FILE):
+        self.path = path
+        self.local = threading.local()
+        self.stale_locals = [] # connections inherited across fork are never reused or closed
+        self.collections = {}
+        _open_databases.add(self)
+        with self.transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, applied_at TEXT NOT NULL)")
+            # Per-collection write counter; every inserted/updated row is stamped with the next value
+            conn.execute("CREATE TABLE IF NOT EXISTS collection_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly by transaction()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self.local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Run a block in one IMMEDIATE transaction (single writer, no lost updates)."""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _after_fork(self):
+        # A SQLite connection must not be used from two processes; the child opens its own
+        self.stale_locals.append(self.local)
+        self.local = threading.local()
+
+    def sync(self):
+        """
+        Catch every open collection up with writes committed by other
+        processes (other workers, the bulk_io CLI). PRAGMA data_version only
+        changes when another connection has committed, so this costs one
+        pragma when nothing happened.
+        """
+        data_version = self.connection().execute("PRAGMA data_version").fetchone()[0]
+        if data_version == getattr(self.local, 'data_version', None):
+            return
+        self.local.data_version = data_version
+        for collection in list(self.collections.values()):
+            collection.sync()
+
+    def collection(self, name):
+        if name not in self.collections:
+            config = COLLECTIONS[name]
+            self.collections[name] = Collection(
+                self, name, config['indexes'], config['newest_first'], config.get('memory_indexes')
+            )
+        return self.collections[name]
+
+    def has_migration(self, name):
+        row = self.connection().execute("SELECT 1 FROM migrations WHERE name=?", (name,)).fetchone()
+        return row is not None
+
+class MemoryIndex:
+    """
+    In-memory hash indexes over one collection: id -> row and, for each
+    indexed field, value -> {id: seq}. Rows are (seq, version, record).
+
+    Readers run outside Collection.write_lock, so every method takes the
+    index's own lock and an update replaces a row in place; a reader never
+    sees a record missing between remove and re-insert.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.by_field = {field: {} for field in self.fields}
+
+    def load(self, rows):
+        """Replace the whole index with rows ((seq, version, record) tuples) in one step."""
+        index = MemoryIndex(self.fields)
+        for seq, version, record in rows:
+            index._put(seq, version, record)
+        with self.lock:
+            self.rows, self.by_field = index.rows, index.by_field
+
+    def add(self, seq, version, record):
+        with self.lock:
+            self._put(seq, version, record)
+
+    def _put(self, seq, version, record):
+        record_id = record['id']
+        old = self.rows.get(record_id)
+        self.rows[record_id] = (seq, version, record)
+        for field in self.fields:
+            value = record.get(field)
+            if old is not None and old[2].get(field) != value:
+                self._unindex(field, old[2].get(field), record_id)
+            self.by_field[field].setdefault(value, {})[record_id] = seq
+
+    def _unindex(self, field, value, record_id):
+        ids = self.by_field[field].get(value)
+        if ids is not None:
+            ids.pop(record_id, None)
+            if not ids:
+                del self.by_field[field][value]
+
+    def remove(self, record_id):
+        with self.lock:
+            row = self.rows.pop(record_id, None)
+            if row is None:
+                return
+            for field in self.fields:
+                self._unindex(field, row[2].get(field), record_id)
+
+    def get(self, record_id):
+        with self.lock:
+            return self.rows.get(record_id)
+
+    def lookup(self, field, value):
+        """Rows whose field equals value, in insertion order."""
+        with self.lock:
+            ids = self.by_field[field].get(value, {})
+            return [self.rows[record_id] for record_id in sorted(ids, key=ids.get)]
+
+    def all_rows(self):
+        with self.lock:
+            rows = list(self.rows.values())
+        return sorted(rows, key=lambda row: row[0])
+
+class Collection:
+    """
+    One table of JSON records addressed by their 'id' field.
+
+    seq orders records by insertion and doubles as the pagination cursor;
+    version is bumped on every write so clients can ask for changes `since`
+    the sync token they last saw.
+
+    With memory_indexes, id and field lookups are served from a MemoryIndex.
+    Writes go through write_lock so the index is updated in commit order.
+    Listeners added with subscribe() are called the same way, as
+    listener(old, new) per record (old is None for inserts, new for deletes).
+
+    Rows written by other processes are applied to the index and passed to
+    the listeners by sync() (and before every local write), in version
+    order, so several workers can share one database. old is only known for
+    memory-indexed collections; deletions by other processes are not seen.
+    """
+
+    def __init__(self, db, name, indexes=(), newest_first=True, memory_indexes=None):
+        self.db = db
+        self.name = name
+        self.indexes = tuple(indexes)
+        self.newest_first = newest_first
+        self.write_lock = threading.RLock()
+        self.memory = MemoryIndex(memory_indexes) if memory_indexes is not None else None
+        self.listeners = []
+        self.synced_version = 0 # highest write version applied to the memory index / listeners
+        with db.transaction() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {name} (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    data TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            # Databases created before write versions existed
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({name})")]
+            if 'version' not in columns:
+                conn.execute(f"ALTER TABLE {name} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_version ON {name}(version)")
+            for field in self.indexes:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{name}_{field} ON {name}(json_extract(data, '$.{field}'))"
+                )
+        self.rebuild_memory_index()
+
+    def rebuild_memory_index(self):
+        """Reload the in-memory indexes from the table (on start, or after out-of-band writes)."""
+        conn = self.db.connection()
+        with self.write_lock:
+            if self.memory is None:
+                self.synced_version = conn.execute(f"SELECT COALESCE(MAX(version), 0) FROM {self.name}").fetchone()[0]
+                return
+            rows = [(seq, version, loads(data)) for seq, version, data in conn.execute(f"SELECT seq, version, data FROM {self.name}")]
+            self.memory.load(rows)
+            self.synced_version = max((row[1] for row in rows), default=0)
+
+    def _catch_up(self, conn):
+        """
+        Apply rows other processes committed after synced_version to the memory
+        index. Returns their (old, new) changes for the listeners. Caller holds write_lock.
+        """
+        if self.memory is None and not self.listeners:
+            return []
+        current = self.version()
+        if current <= self.synced_version:
+            return []
+        rows = conn.execute(
+            f"SELECT seq, version, data FROM {self.name} WHERE version > ? ORDER BY version", (self.synced_version,)
+        ).fetchall()
+        changes = []
+        for seq, version, data in rows:
+            record = loads(data)
+            old = None
+            if self.memory is not None:
+                row = self.memory.get(record['id'])
+                old = row[2] if row else None
+                self.memory.add(seq, version, record)
+            changes.append((old, copy.deepcopy(record) if self.memory is not None else record))
+        self.synced_version = max([current] + [row[1] for row in rows])
+        return changes
+
+    @contextlib.contextmanager
+    def _write_transaction(self):
+        """
+        IMMEDIATE transaction for a local write, caught up with other processes
+        first. The rows caught up are passed to the listeners even when the
+        write itself fails (they are already in the memory index and
+        synced_version, so they would not be seen again). Caller holds write_lock.
+        """
+        missed = []
+        try:
+            with self.db.transaction() as conn:
+                missed = self._catch_up(conn)
+                yield conn
+        finally:
+            self._notify(missed)
+
+    def sync(self):
+        """Catch up with writes committed by other processes (see Database.sync)."""
+        with self.write_lock:
+            changes = self._catch_up(self.db.connection())
+            self._notify(changes)
+
+    def _written_rows(self, conn, first, last):
+        """Rows this transaction wrote (versions first..last), for the memory index once committed."""
+        if self.memory is None:
+            return []
+        return conn.execute(
+            f"SELECT seq, version, data FROM {self.name} WHERE version BETWEEN ? AND ?", (first, last)
+        ).fetchall()
+
+    def _apply_written(self, rows, last):
+        if self.memory is not None:
+            for seq, version, data in rows:
+                self.memory.add(seq, version, loads(data))
+        self.synced_version = max(self.synced_version, last)
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, changes):
+        for old, new in changes:
+            for listener in self.listeners:
+                try:
+                    listener(old, new)
+                except Exception as e:
+                    print(f"{self.name} listener failed: {e}")
+
+    @property
+    def order(self):
+        return "DESC" if self.newest_first else "ASC"
+
+    def _next_versions(self, conn, count):
+        """Reserve `count` consecutive write versions; returns the first one."""
+        row = conn.execute("SELECT version FROM collection_versions WHERE name=?", (self.name,)).fetchone()
+        current = row[0] if row else 0
+        conn.execute("INSERT OR REPLACE INTO collection_versions VALUES (?, ?)", (self.name, current + count))
+        return current + 1
+
+    def _insert_rows(self, conn, records):
+        first = self._next_versions(conn, len(records))
+        conn.executemany(
+            f"INSERT INTO {self.name} (id, data, version) VALUES (?, ?, ?)",
+            [(record['id'], dumps_text(record), first + i) for i, record in enumerate(records)]
+        )
+        return first
+
+    def insert(self, record):
+        return self.insert_many([record])[0]
+
+    def insert_many(self, records):
+        """Insert a batch in a single transaction (all or nothing)."""
+        records = list(records)
+        with self.write_lock:
+            with self._write_transaction() as conn:
+                first = self._insert_rows(conn, records)
+                last = first + len(records) - 1
+                written = self._written_rows(conn, first, last)
+            self._apply_written(written, last)
+            self._notify((None, record) for record in records)
+        return records
+
+    def upsert_many(self, records):
+        """
+        Insert or replace a batch by id in one transaction.
+        Returns (inserted, updated) counts.
+        """
+        records = list({record['id']: record for record in records}.values()) # last write per id wins
+        if not records:
+            return 0, 0
+        with self.write_lock:
+            with self._write_transaction() as conn:
+                ids = [record['id'] for record in records]
+                old = {}
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT id, data FROM {self.name} WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                    old.update((record_id, loads(data)) for record_id, data in rows)
+                first = self._next_versions(conn, len(records))
+                conn.executemany(
+                    f"""INSERT INTO {self.name} (id, data, version) VALUES (?, ?, ?)
+                        ON CONFLICT(id) DO UPDATE SET data=excluded.data, version=excluded.version""",
+                    [(record['id'], dumps_text(record), first + i) for i, record in enumerate(records)]
+                )
+                last = first + len(records) - 1
+                written = self._written_rows(conn, first, last)
+            self._apply_written(written, last)
+            self._notify((old.get(record['id']), record) for record in records)
+        return len(records) - len(old), len(old)
+
+    def get(self, record_id):
+        if self.memory is not None:
+            row = self.memory.get(record_id)
+            return copy.deepcopy(row[2]) if row else None
+        row = self.db.connection().execute(f"SELECT data FROM {self.name} WHERE id=?", (record_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def update(self, record):
+        """Replace a stored record (matched by id). Returns False if it does not exist."""
+        with self.write_lock:
+            with self._write_transaction() as conn:
+                old = conn.execute(f"SELECT data FROM {self.name} WHERE id=?", (record['id'],)).fetchone()
+                if old is None:
+                    return False
+                version = self._next_versions(conn, 1)
+                conn.execute(f"UPDATE {self.name} SET data=?, version=? WHERE id=?", (dumps_text(record), version, record['id']))
+                written = self._written_rows(conn, version, version)
+            self._apply_written(written, version)
+            self._notify([(loads(old[0]), record)])
+        return True
+
+    def modify(self, record_id, mutate):
+        """Read-modify-write one record inside a transaction. Returns the new record or None."""
+        with self.write_lock:
+            with self._write_transaction() as conn: # the memory copy must be current before it is modified
+                if self.memory is not None:
+                    row = self.memory.get(record_id)
+                    record = copy.deepcopy(row[2]) if row else None
+                else:
+                    row = conn.execute(f"SELECT data FROM {self.name} WHERE id=?", (record_id,)).fetchone()
+                    record = loads(row[0]) if row else None
+                if record is None:
+                    return None
+                old = copy.deepcopy(record) if self.listeners else None
+                mutate(record)
+                version = self._next_versions(conn, 1)
+                conn.execute(f"UPDATE {self.name} SET data=?, version=? WHERE id=?", (dumps_text(record), version, record_id))
+                written = self._written_rows(conn, version, version)
+            self._apply_written(written, version)
+            self._notify([(old, record)])
+        return record
+
+    def all(self, limit=None):
+        sql = f"SELECT data FROM {self.name} ORDER BY seq {self.order}"
+        params = ()
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (limit,)
+        return [loads(row[0]) for row in self.db.connection().execute(sql, params)]
+
+    def local_version(self):
+        """
+        Write version this process has applied, without a query (used for ETags).
+        Includes other processes' writes as of the last Database.sync().
+        """
+        if self.memory is None and not self.listeners:
+            return self.version()
+        return self.synced_version
+
+    def version(self):
+        """Current write version (the sync token for a client that has seen everything)."""
+        row = self.db.connection().execute("SELECT version FROM collection_versions WHERE name=?", (self.name,)).fetchone()
+        return row[0] if row else 0
+
+    def page(self, limit=None, after=None, since=None, where=None):
+        """
+        One page of records. Returns (records, next_cursor, sync_token).
+
+        after: next_cursor from the previous page (records continue in display order).
+        since: sync token from an earlier call; only records written after it are
+               returned, oldest change first, and the returned token resumes there.
+        where: optional (field, value) equality filter.
+        """
+        if where and self.memory is not None and where[0] in self.memory.fields:
+            return self._page_from_memory(limit, after, since, where)
+
+        clauses, params = [], []
+        if where:
+            clauses.append(f"json_extract(data, '$.{where[0]}') = ?")
+            params.append(where[1])
+
+        if since is not None:
+            clauses.append("version > ?")
+            params.append(since)
+            order = "version ASC"
+        else:
+            if after is not None:
+                clauses.append("seq < ?" if self.newest_first else "seq > ?")
+                params.append(after)
+            order = f"seq {self.order}"
+
+        # Read the token before the rows so a concurrent write is never skipped
+        sync_token = self.version()
+        sql = f"SELECT seq, version, data FROM {self.name}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        rows = self.db.connection().execute(sql, params).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            if since is not None:
+                sync_token = rows[-1][1]
+            else:
+                next_cursor = rows[-1][0]
+
+        return [loads(row[2]) for row in rows], next_cursor, sync_token
+
+    def _page_from_memory(self, limit, after, since, where):
+        """page() for a filter on a memory-indexed field (hash lookup instead of a query)."""
+        sync_token = self.version()
+        rows = self.memory.lookup(*where)
+        if since is not None:
+            rows = sorted((row for row in rows if row[1] > since), key=lambda row: row[1])
+        else:
+            if self.newest_first:
+                rows = rows[::-1]
+            if after is not None:
+                rows = [row for row in rows if (row[0] < after if self.newest_first else row[0] > after)]
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            if since is not None:
+                sync_token = rows[-1][1]
+            else:
+                next_cursor = rows[-1][0]
+        return [copy.deepcopy(row[2]) for row in rows], next_cursor, sync_token
+
+    def find(self, field, value):
+        """Records whose field equals value (hash index for memory-indexed fields, else the expression index)."""
+        if self.memory is not None and field in self.memory.fields:
+            rows = self.memory.lookup(field, value)
+            if self.newest_first:
+                rows = rows[::-1]
+            return [copy.deepcopy(row[2]) for row in rows]
+        rows = self.db.connection().execute(
+            f"SELECT data FROM {self.name} WHERE json_extract(data, '$.{field}') = ? ORDER BY seq {self.order}",
+            (value,)
+        )
+        return [loads(row[0]) for row in rows]
+
+    def iter_batches(self, batch_size=1000):
+        """Yield all records oldest first in batches (keyset paging, constant memory)."""
+        last_seq = 0
+        while True:
+            rows = self.db.connection().execute(
+                f"SELECT seq, data FROM {self.name} WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1][0]
+            yield [loads(data) for _, data in rows]
+
+    def count(self):
+        return self.db.connection().execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def trim(self, keep):
+        """Delete all but the newest `keep` records."""
+        with self.write_lock:
+            with self._write_transaction() as conn:
+                removed = conn.execute(
+                    f"SELECT seq, id, data FROM {self.name} ORDER BY seq DESC LIMIT -1 OFFSET ?", (keep,)
+                ).fetchall()
+                if removed:
+                    conn.execute(f"DELETE FROM {self.name} WHERE seq <= ?", (removed[0][0],))
+            if self.memory is not None:
+                for _, record_id, _ in removed:
+                    self.memory.remove(record_id)
+            self._notify((loads(data), None) for _, _, data in removed)
+
+def _read_legacy_records(config):
+    path = config['json_file']
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Skipping unreadable {path}: {e}")
+        return []
+    if config['json_key']:
+        data = data.get(config['json_key'], []) if isinstance(data, dict) else []
+    return data if isinstance(data, list) else []
+
+def migrate_json_files(db):
+    """
+    One-shot import of the legacy JSON stores. Runs once per database (tracked in
+    the migrations table); the JSON files are left in place as a backup.
+    """
+    if db.has_migration('json_import'):
+        return {}
+
+    collections = {name: db.collection(name) for name in COLLECTIONS}
+    imported = {}
+    with db.transaction() as conn:
+        if db.has_migration('json_import'):
+            return {} # another worker process got there first
+        for name, config in COLLECTIONS.items():
+            collection = collections[name]
+            records = _read_legacy_records(config)
+
+            # JSON files are newest-first for insert(0) stores; rows must go in oldest-first
+            if config['newest_first']:
+                records = list(reversed(records))
+
+            seen = set()
+            for record in records:
+                record_id = str(record.get('id') or uuid.uuid4())
+                if record_id in seen:
+                    record_id = f"{record_id}_{uuid.uuid4().hex[:6]}"
+                seen.add(record_id)
+                record['id'] = record_id
+
+            collection._insert_rows(conn, records)
+            imported[name] = len(records)
+
+        conn.execute("INSERT INTO migrations VALUES ('json_import', datetime('now'))")
+
+    for collection in collections.values():
+        collection.rebuild_memory_index()
+
+    print(f"Imported legacy JSON stores into {db.path}: {imported}")
+    return imported
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="AgriSphere storage engine")
+    parser.add_argument('command', choices=['migrate', 'stats'])
+    parser.add_argument('--db', default=DATABASE_FILE)
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    if args.command == 'migrate':
+        if not migrate_json_files(db):
+            print("JSON import already applied")
+    for name in COLLECTIONS:
+        print(f"{name}: {db.collection(name).count()} records")
+
+if __name__ == '__main__':
+    main()
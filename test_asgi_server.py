@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from starlette.testclient import TestClient
+
+import api_server
+import asgi_server
+from llm_metrics import LLMMetrics
+from price_snapshots import PriceSnapshotStore
+from shared_state import MemoryBackend
+from twin_store import TwinStore
+
+class TestAsgiServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fetches = []
+        self.generations = []
+        patches = [
+            mock.patch.object(api_server, 'price_snapshots', PriceSnapshotStore(os.path.join(self.tmpdir, 'snapshots.db'))),
+            mock.patch.object(api_server, 'twin_store', TwinStore(path=None)),
+            mock.patch.object(asgi_server.market_engine, 'get_market_prices_async', self.fetch_prices),
+            mock.patch.object(asgi_server, 'generate_twin_with_groq_async', self.generate_twin),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = TestClient(asgi_server.app)
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    async def fetch_prices(self, state, district, market, category):
+        self.fetches.append((state, district, market, category))
+        return [{'commodity': 'Tomato', 'price': 1800}]
+
+    async def generate_twin(self, farm_data):
+        self.generations.append(farm_data)
+        return True, {'location': {'lat': 25.59, 'lng': 85.13}, 'farmBoundary': {'area': 1.0}}
+
+    def test_market_prices_are_fetched_once_per_day(self):
+        body = {'state': 'Bihar', 'district': 'Patna', 'category': 'Vegetables'}
+        for _ in range(2):
+            response = self.client.post('/market-prices', json=body)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), [{'commodity': 'Tomato', 'price': 1800}])
+        self.assertEqual(self.fetches, [('Bihar', 'Patna', 'General', 'Vegetables')])
+        self.assertEqual(self.client.post('/market-prices', json={}).status_code, 400)
+
+    def test_digital_twin_is_generated_once_and_personalized(self):
+        farm = {'latitude': 25.5941, 'longitude': 85.1376, 'size': 8}
+        first = self.client.post('/generate-digital-twin', json=farm)
+        second = self.client.post('/generate-digital-twin', json={**farm, 'size': 9})
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(first.headers['X-Twin-Cache'], 'miss')
+        self.assertEqual(second.headers['X-Twin-Cache'], 'hit')
+        self.assertEqual(second.json()['farmBoundary']['area'], round(9 * 0.404686, 2))
+        self.assertEqual(len(self.generations), 1)
+
+    def test_failed_twin_generation_is_an_error(self):
+        async def failing(farm_data):
+            return False, 'Groq API Key missing'
+        with mock.patch.object(asgi_server, 'generate_twin_with_groq_async', failing):
+            response = self.client.post('/generate-digital-twin', json={'district': 'Patna'})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'Groq API Key missing'})
+
+    def test_llm_routes_need_a_key(self):
+        with mock.patch.object(asgi_server.llm_client, 'get_api_key', return_value=None):
+            response = self.client.post('/predict-pest', json={'crop': 'Rice'})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'GROQ_API_KEY not found'})
+
+    def test_other_routes_fall_through_to_flask(self):
+        response = self.client.get('/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok', 'message': 'API server is running'})
+        self.assertEqual(self.client.get('/no-such-route').status_code, 404)
+
+    def test_buyer_dashboard_insights_record_cache_outcomes(self):
+        metrics = LLMMetrics()
+        with mock.patch.object(api_server, 'shared_state', MemoryBackend()), \
+             mock.patch.object(api_server, 'llm_metrics', metrics), \
+             mock.patch.object(api_server.market_engine, 'get_buyer_insights', return_value={'demand': 'High'}) as fetch:
+            for _ in range(2):
+                response = self.client.get('/dashboard/buyer?crop=Rice&state=Bihar')
+                self.assertEqual(response.json()['sections']['insights']['data'], {'demand': 'High'})
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(metrics.snapshot()['cache'], {'buyer_insights/miss': 1, 'buyer_insights/hit': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import bulk_io
+from storage import Database
+
+class TestBulkIO(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.tmpdir, 'test.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_export_import_round_trip(self):
+        source = self.db.collection('listings')
+        source.insert_many(
+            {'id': f"l{i}", 'farmerName': 'Ram', 'cropName': 'Wheat', 'quantity': i, 'price': 2200, 'location': 'Patna'}
+            for i in range(25)
+        )
+        chunks = list(bulk_io.export_ndjson(source, batch_size=10))
+        self.assertEqual(len(chunks), 3)
+
+        target = Database(os.path.join(self.tmpdir, 'copy.db')).collection('listings')
+        lines = "".join(chunks).splitlines(keepends=True)
+        report = bulk_io.import_ndjson(target, lines, batch_size=7)
+        self.assertEqual(report['inserted'], 25)
+        self.assertEqual(target.all(), source.all())
+
+    def test_insert_rejects_bad_lines_and_duplicates(self):
+        cases = self.db.collection('crop_loss_cases')
+        cases.insert({'id': 'c1', 'crop': 'Rice', 'status': 'Pending'})
+        lines = [
+            json.dumps({'id': 'c1', 'crop': 'Rice', 'status': 'Approved'}),
+            "{not json",
+            "",
+            json.dumps([1, 2]),
+            json.dumps({'crop': 'Wheat', 'status': 'Pending', 'damagePercentage': 'high', 'isEligible': 'yes'}),
+            json.dumps({'status': 'Pending'}),
+            json.dumps({'crop': 'Wheat', 'status': 'Pending'})
+        ]
+        report = bulk_io.import_ndjson(cases, lines)
+        self.assertEqual(report['inserted'], 1)
+        self.assertEqual(report['rejected'], 5)
+        self.assertEqual(sorted(e['line'] for e in report['errors']), [1, 2, 4, 5, 6])
+        self.assertEqual(cases.get('c1')['status'], 'Pending')
+        self.assertEqual(cases.count(), 2)
+
+    def test_upsert_updates_and_notifies(self):
+        cases = self.db.collection('crop_loss_cases')
+        cases.insert({'id': 'c1', 'crop': 'Rice', 'status': 'Pending'})
+        changes = []
+        cases.subscribe(lambda old, new: changes.append((old and old['status'], new['status'])))
+
+        lines = [
+            json.dumps({'id': 'c1', 'crop': 'Rice', 'status': 'Approved'}),
+            json.dumps({'id': 'c2', 'crop': 'Rice', 'status': 'Pending'})
+        ]
+        report = bulk_io.import_ndjson(cases, lines, mode='upsert')
+        self.assertEqual((report['inserted'], report['updated']), (1, 1))
+        self.assertEqual(cases.get('c1')['status'], 'Approved')
+        self.assertEqual(cases.find('status', 'Approved'), [{'id': 'c1', 'crop': 'Rice', 'status': 'Approved'}])
+        self.assertEqual(changes, [('Pending', 'Approved'), (None, 'Pending')])
+
+    def test_chat_goes_through_the_chat_log(self):
+        self.db.collection('chat').insert({'id': 'old', 'text': 'legacy'})
+        chat_path = os.path.join(self.tmpdir, 'chat.ndjson')
+        chat = bulk_io.open_store('chat', self.db, chat_path)
+        report = bulk_io.import_ndjson(chat, [json.dumps({'id': 'm1', 'text': 'hello'})])
+        self.assertEqual(report['inserted'], 1)
+        chat.close()
+
+        reopened = bulk_io.open_store('chat', self.db, chat_path)
+        self.assertEqual([m['id'] for m in reopened.all()], ['old', 'm1'])
+        self.assertEqual(len(self.db.collection('chat').all()), 1) # the legacy table is left alone
+        reopened.close()
+
+    def test_chat_rejects_upsert(self):
+        chat = bulk_io.open_store('chat', self.db, os.path.join(self.tmpdir, 'chat.ndjson'))
+        self.assertFalse(bulk_io.supports_upsert(chat))
+        with self.assertRaises(ValueError):
+            bulk_io.import_ndjson(chat, [json.dumps({'id': 'old', 'text': 'edited'})], mode='upsert')
+        self.assertEqual(chat.all(), []) # nothing appended as a duplicate
+        chat.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from chat_log import ChatLog
+
+class TestChatLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'chat.ndjson')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def line_count(self):
+        with open(self.path) as f:
+            return sum(1 for _ in f)
+
+    def test_ring_buffer_keeps_latest(self):
+        log = ChatLog(self.path, capacity=3, compact_every=100)
+        for i in range(5):
+            log.append({'id': str(i), 'text': f"msg {i}"})
+        self.assertEqual([m['id'] for m in log.all()], ['2', '3', '4'])
+        # Sends are plain appends until compaction
+        self.assertEqual(self.line_count(), 5)
+        log.close()
+
+    def test_compaction_and_reload(self):
+        log = ChatLog(self.path, capacity=3, compact_every=4)
+        for i in range(6):
+            log.append({'id': str(i)})
+        self.assertEqual(self.line_count(), 5) # compacted to 3 at the 4th send, then 2 appends
+        log.close()
+
+        reopened = ChatLog(self.path, capacity=3)
+        self.assertEqual([m['id'] for m in reopened.all()], ['3', '4', '5'])
+        self.assertEqual(self.line_count(), 3)
+        reopened.append({'id': '6'})
+        self.assertEqual(reopened.version(), 7)
+        reopened.close()
+
+    def test_torn_last_line_is_ignored(self):
+        log = ChatLog(self.path)
+        log.append({'id': 'a'})
+        log.close()
+        with open(self.path, 'a') as f:
+            f.write('[2, {"id": "b"')
+        reopened = ChatLog(self.path)
+        self.assertEqual([m['id'] for m in reopened.all()], ['a'])
+        reopened.close()
+
+    def test_page_and_since(self):
+        log = ChatLog(self.path)
+        self.assertEqual(log.import_legacy([{'id': 'old1'}, {'id': 'old2'}]), 2)
+        _, _, token = log.page()
+        log.append({'id': 'new'})
+
+        first, cursor, _ = log.page(limit=2)
+        self.assertEqual([m['id'] for m in first], ['old1', 'old2'])
+        rest, cursor, _ = log.page(limit=2, after=cursor)
+        self.assertEqual([m['id'] for m in rest], ['new'])
+        self.assertIsNone(cursor)
+
+        changed, _, new_token = log.page(since=token)
+        self.assertEqual([m['id'] for m in changed], ['new'])
+        self.assertEqual(new_token, 3)
+        self.assertEqual(log.import_legacy([{'id': 'again'}]), 0)
+        log.close()
+
+    def test_logs_shared_between_processes(self):
+        # Two instances on one file behave like two worker processes
+        seen = []
+        log_a = ChatLog(self.path, capacity=3, compact_every=3, on_message=lambda m: seen.append(m['id']))
+        log_b = ChatLog(self.path, capacity=3, compact_every=3)
+        log_a.append({'id': 'a1'})
+        log_b.append({'id': 'b1'}) # picks up a1 first, so seqs never collide
+        self.assertEqual([m['id'] for m in log_b.all()], ['a1', 'b1'])
+        self.assertEqual(log_b.version(), 2)
+
+        log_a.sync()
+        self.assertEqual([m['id'] for m in log_a.all()], ['a1', 'b1'])
+        log_b.append({'id': 'b2'}) # b compacts (replaces the file)
+        log_b.append({'id': 'b3'})
+        log_a.append({'id': 'a2'})
+        self.assertEqual([m['id'] for m in log_a.all()], ['b2', 'b3', 'a2'])
+        self.assertEqual(log_a.version(), 5)
+        self.assertEqual(seen, ['a1', 'b1', 'b2', 'b3', 'a2'])
+        log_a.close()
+        log_b.close()
+
+if __name__ == '__main__':
+    unittest.main()
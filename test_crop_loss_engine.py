@@ -0,0 +1,84 @@
+import unittest
+
+try:
+    import numpy # noqa: F401
+    import crop_loss_engine
+except ImportError:
+    crop_loss_engine = None
+
+@unittest.skipIf(crop_loss_engine is None, "numpy not installed")
+class TestCropLossEngine(unittest.TestCase):
+
+    def test_assessment_rules(self):
+        claims = [
+            {'cropName': 'Wheat', 'causeOfLoss': 'Flood', 'damagePercentage': 50, 'affectedArea': 2, 'insuranceStatus': 'Yes'},
+            {'cropName': 'Rice', 'causeOfLoss': 'Hailstorm', 'damagePercentage': 40, 'affectedArea': 1},
+            {'cropName': 'Wheat', 'causeOfLoss': 'Flood', 'damagePercentage': 20, 'affectedArea': 2},
+            {'cropName': 'Millet', 'causeOfLoss': 'Theft', 'damagePercentage': 90, 'affectedArea': 1},
+        ]
+        claims = [crop_loss_engine.validate_claim(c)[0] for c in claims]
+        cases = crop_loss_engine.build_cases(claims)
+
+        # 20 Qt/acre * 2 acres * Rs 2275 * 50%
+        self.assertEqual(cases[0]['estimatedLoss'], 45500)
+        # 45500 * 0.7 is 31849.999... in floating point; truncated like the previous int() conversion
+        self.assertEqual(cases[0]['suggestedCompensation'], 31849)
+        self.assertEqual(cases[0]['suggestedScheme'], 'PMFBY')
+        self.assertEqual(cases[1]['suggestedScheme'], 'State Disaster Relief Fund (SDRF)')
+        self.assertFalse(cases[2]['isEligible'])
+        self.assertEqual(cases[2]['suggestedCompensation'], 0)
+        self.assertEqual(cases[3]['estimatedLoss'], 36000) # default yield and price
+        self.assertEqual(len({c['id'] for c in cases}), 4)
+
+    def test_bulk_ndjson_reports_row_errors(self):
+        body = "\n".join([
+            '{"cropName": "Maize", "causeOfLoss": "Drought", "damagePercentage": 60, "affectedArea": 3}',
+            '{"cropName": "Maize", "damagePercentage": "lots"}',
+            'not json',
+            '',
+            '{"cropName": "Potato", "damagePercentage": 140}',
+        ])
+        cases, errors, total = crop_loss_engine.assess_bulk(body, 'ndjson')
+        self.assertEqual(total, 4)
+        self.assertEqual(len(cases), 1)
+        self.assertEqual([e['row'] for e in errors], [2, 3, 5])
+
+    def test_bulk_rejects_non_string_names_per_row(self):
+        body = "\n".join([
+            '{"cropName": "Wheat", "causeOfLoss": "Flood", "damagePercentage": 50, "affectedArea": 2}',
+            '{"cropName": ["a", "b"], "causeOfLoss": "Flood", "damagePercentage": 50, "affectedArea": 2}',
+            '{"cropName": "Rice", "causeOfLoss": {"kind": "Flood"}, "damagePercentage": 50, "affectedArea": 1}',
+            '{"causeOfLoss": "Pest", "damagePercentage": 40, "affectedArea": 1}',
+        ])
+        cases, errors, total = crop_loss_engine.assess_bulk(body, 'ndjson')
+        self.assertEqual(total, 4)
+        self.assertEqual([c['crop'] for c in cases], ['Wheat', 'Unknown Crop'])
+        self.assertEqual(errors, [
+            {'row': 2, 'error': 'cropName must be a string'},
+            {'row': 3, 'error': 'causeOfLoss must be a string'}
+        ])
+
+    def test_single_claims_keep_unbounded_values(self):
+        claim, error = crop_loss_engine.validate_claim({'damagePercentage': 140, 'affectedArea': -1}, check_ranges=False)
+        self.assertIsNone(error)
+        self.assertEqual(claim['damagePercentage'], 140)
+        self.assertIsNotNone(crop_loss_engine.validate_claim({'damagePercentage': 140})[1])
+
+    def test_rejects_non_finite_numbers(self):
+        for field in ('damagePercentage', 'affectedArea'):
+            for value in ('inf', 'nan', float('inf'), float('nan')):
+                claim, error = crop_loss_engine.validate_claim({field: value})
+                self.assertIsNone(claim)
+                self.assertIn('finite', error)
+
+    def test_bulk_csv(self):
+        body = "farmerName,cropName,causeOfLoss,damagePercentage,affectedArea,location\n" \
+               "Ramesh,Cotton,Pest,80,1.5,Maharashtra\n" \
+               "Suresh,Wheat,Flood,,2,Punjab\n"
+        cases, errors, total = crop_loss_engine.assess_bulk(body, 'csv')
+        self.assertEqual((total, len(cases), errors), (2, 2, []))
+        self.assertEqual(cases[0]['estimatedLoss'], 72000)
+        self.assertEqual(cases[1]['damagePercentage'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import random
+import unittest
+
+from crop_loss_rollup import CropLossRollup
+
+def make_case(i, **overrides):
+    case = {
+        'id': f"case_{i}", 'location': 'Punjab', 'crop': 'Wheat', 'cause': 'Flood',
+        'season': 'Rabi', 'status': 'Pending', 'estimatedLoss': 1000, 'suggestedCompensation': 700
+    }
+    case.update(overrides)
+    return case
+
+class TestCropLossRollup(unittest.TestCase):
+
+    def setUp(self):
+        self.cube = CropLossRollup()
+        self.cube.rebuild([
+            make_case(1),
+            make_case(2, crop='Rice', estimatedLoss=3000, suggestedCompensation=2100),
+            make_case(3, location='Bihar', cause='Drought', status='Approved'),
+            make_case(4, season=None)
+        ])
+
+    def test_group_by_and_filters(self):
+        result = self.cube.query(['crop'], {'location': {'Punjab'}})
+        self.assertEqual(result['rows'], [
+            {'crop': 'Rice', 'cases': 1, 'estimatedLoss': 3000.0, 'suggestedCompensation': 2100.0},
+            {'crop': 'Wheat', 'cases': 2, 'estimatedLoss': 2000.0, 'suggestedCompensation': 1400.0},
+        ])
+        self.assertEqual(result['totals']['cases'], 3)
+        self.assertEqual(self.cube.query(['season'])['rows'][-1]['season'], 'Unknown')
+
+    def test_status_change_moves_case_between_cells(self):
+        old = make_case(1)
+        self.cube.on_case(old, dict(old, status='Approved'))
+        by_status = {row['status']: row['cases'] for row in self.cube.query(['status'])['rows']}
+        self.assertEqual(by_status, {'Pending': 2, 'Approved': 2})
+
+    def test_query_cache_invalidated_on_write(self):
+        first = self.cube.query(['location'])
+        self.assertIs(self.cube.query(['location']), first)
+        self.cube.on_case(None, make_case(5, location='Bihar'))
+        bihar = [r for r in self.cube.query(['location'])['rows'] if r['location'] == 'Bihar'][0]
+        self.assertEqual(bihar['cases'], 2)
+
+    def test_unknown_dimension(self):
+        with self.assertRaises(ValueError):
+            self.cube.query(['farmerName'])
+
+    def test_query_cost_depends_on_cells_not_cases(self):
+        rng = random.Random(7)
+        cube = CropLossRollup()
+        for i in range(100000):
+            cube.on_case(None, make_case(
+                i, location=rng.choice(['Punjab', 'Bihar', 'Haryana', 'Gujarat']),
+                crop=rng.choice(['Wheat', 'Rice', 'Cotton', 'Maize', 'Potato']),
+                cause=rng.choice(['Flood', 'Drought', 'Pest', 'Hailstorm']),
+                status=rng.choice(['Pending', 'Approved', 'Rejected'])
+            ))
+        result = cube.query(['location', 'crop'], {'status': {'Pending'}})
+        self.assertEqual(len(result['rows']), 20)
+        stats = cube.stats()
+        self.assertEqual(stats['cellsScanned'], stats['cells']) # one pass over the cuboid, not the 100k cases
+        self.assertLessEqual(stats['cells'], 4 * 5 * 4 * 3)
+
+        self.assertIs(cube.query(['location', 'crop'], {'status': {'Pending'}}), result)
+        self.assertEqual(cube.stats(), dict(stats, hits=1)) # memoised: nothing rescanned
+        self.assertEqual(stats['misses'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import dashboards
+
+class TestGather(unittest.TestCase):
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(max_workers=4)
+
+    def tearDown(self):
+        self.pool.shutdown(wait=False)
+
+    def test_sections_run_concurrently(self):
+        # Each section waits for the other; only completes if both run at once
+        barrier = threading.Barrier(2, timeout=5)
+
+        def build(data):
+            barrier.wait()
+            return dashboards.section(data, version=3)
+
+        payload = dashboards.gather({'a': lambda: build([1]), 'b': lambda: build([2])}, pool=self.pool)
+        self.assertEqual(list(payload['sections']), ['a', 'b'])
+        self.assertEqual(payload['sections']['a']['data'], [1])
+        self.assertEqual(payload['sections']['b']['version'], 3)
+        self.assertIn('updatedAt', payload['sections']['a'])
+        self.assertIn('generatedAt', payload)
+
+    def test_failed_section_does_not_blank_the_rest(self):
+        def broken():
+            raise RuntimeError('store offline')
+
+        sections = dashboards.gather({
+            'stats': broken,
+            'cases': lambda: dashboards.section([], updated_at='2024-10-01T10:00:00')
+        }, pool=self.pool)['sections']
+        self.assertIsNone(sections['stats']['data'])
+        self.assertEqual(sections['stats']['error'], 'store offline')
+        self.assertEqual(sections['cases']['updatedAt'], '2024-10-01T10:00:00')
+
+    def test_slow_section_times_out(self):
+        release = threading.Event()
+        sections = dashboards.gather({
+            'slow': lambda: release.wait(5) and dashboards.section('late'),
+            'fast': lambda: dashboards.section('ok')
+        }, timeout=0.1, pool=self.pool)['sections']
+        release.set()
+        self.assertEqual(sections['slow']['error'], 'Timed out')
+        self.assertEqual(sections['fast']['data'], 'ok')
+
+if __name__ == '__main__':
+    unittest.main()
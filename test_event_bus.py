@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import unittest
+
+from event_bus import EventBus, format_sse
+
+class TestEventBus(unittest.TestCase):
+
+    def test_resume_after_last_event_id(self):
+        bus = EventBus()
+        bus.publish('post', {'id': 'p1'})
+        bus.publish('chat', {'id': 'c1'})
+        self.assertEqual([e[1] for e in bus.since(0)], ['post', 'chat'])
+        self.assertEqual([e[2]['id'] for e in bus.since(1)], ['c1'])
+        self.assertEqual(bus.since(2), [])
+
+    def test_reset_when_history_is_gone(self):
+        bus = EventBus(history=2)
+        for i in range(5):
+            bus.publish('chat', {'id': i})
+        self.assertIsNone(bus.since(1)) # events 2 and 3 were dropped
+        self.assertEqual(len(bus.since(3)), 2)
+        self.assertIsNone(bus.since(99)) # id from before a restart
+        chunk, last_id = format_sse(bus, 1, bus.since(1))
+        self.assertIn("event: reset", chunk)
+        self.assertEqual(last_id, 5)
+
+    def test_wait_wakes_on_publish(self):
+        bus = EventBus()
+        threading.Timer(0.05, bus.publish, args=('chat', {'id': 'x'})).start()
+        events = bus.wait(0, timeout=5)
+        self.assertEqual(events[0][2], {'id': 'x'})
+        self.assertEqual(bus.wait(1, timeout=0.01), [])
+
+    def test_async_wait_wakes_on_publish_from_thread(self):
+        bus = EventBus()
+
+        async def scenario():
+            threading.Timer(0.05, bus.publish, args=('post', {'id': 'p'})).start()
+            return await bus.wait_async(0, timeout=5)
+
+        events = asyncio.run(scenario())
+        self.assertEqual(events[0][1], 'post')
+        self.assertEqual(bus.async_waiters, set())
+
+    def test_sse_format(self):
+        bus = EventBus()
+        bus.publish('comment', {'postId': 'p1', 'comment': {'text': 'नमस्ते'}})
+        chunk, last_id = format_sse(bus, 0, bus.since(0))
+        self.assertEqual(last_id, 1)
+        self.assertTrue(chunk.startswith(f"id: {bus.epoch}-1\nevent: comment\ndata: "))
+        self.assertIn('नमस्ते', chunk)
+        self.assertEqual(format_sse(bus, 1, []), (": keepalive\n\n", 1))
+
+    def test_ids_from_another_process_reset(self):
+        bus, other = EventBus(), EventBus() # e.g. two gunicorn workers
+        for i in range(3):
+            bus.publish('chat', {'id': i})
+        other.publish('chat', {'id': 'elsewhere'})
+        self.assertEqual(bus.resolve_last_id(bus.wire_id(2)), 2)
+        self.assertEqual(bus.resolve_last_id(None), 3)
+        for foreign in (other.wire_id(1), '1', 'garbage', f"{bus.epoch}-x"):
+            self.assertIsNone(bus.resolve_last_id(foreign))
+        self.assertIsNone(bus.wait(None, timeout=5)) # answered at once, not after the timeout
+        payload = bus.poll_payload(None, bus.since(None))
+        self.assertEqual(payload, {'events': [], 'lastEventId': bus.wire_id(3), 'reset': True})
+        chunk, last_id = format_sse(bus, None, None)
+        self.assertEqual((chunk.splitlines()[:2], last_id), ([f"id: {bus.epoch}-3", "event: reset"], 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from storage import Database
+from gov_stats import GovStats
+
+class TestGovStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        db = Database(os.path.join(self.tmpdir, 'test.db'))
+        self.listings = db.collection('listings')
+        self.posts = db.collection('posts')
+        self.cases = db.collection('crop_loss_cases')
+        self.listings.insert({'id': 'l0', 'quantity': '40'})
+        self.stats = GovStats()
+        self.stats.rebuild(self.listings.all(), self.posts.all(), self.cases.all())
+        self.stats.subscribe(self.listings, self.posts, self.cases)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def check(self):
+        return self.stats.check(self.listings.all(), self.posts.all(), self.cases.all())
+
+    def test_totals_follow_writes(self):
+        self.listings.insert({'id': 'l1', 'quantity': 12.5})
+        self.listings.insert({'id': 'l2', 'quantity': 'n/a'})
+        self.posts.insert({'id': 'p1', 'comments': []})
+        self.posts.insert({'id': 'p2', 'comments': []})
+        self.posts.modify('p1', lambda post: post['comments'].append({'text': 'Use neem oil'}))
+        self.cases.insert({'id': 'c1', 'status': 'Pending'})
+        self.cases.insert({'id': 'c2', 'status': 'Pending'})
+        self.cases.modify('c2', lambda case: case.update(status='Approved'))
+
+        totals, recent_listings, recent_posts = self.stats.snapshot()
+        self.assertEqual(totals, {
+            'totalListings': 3, 'totalVolume': 52.5, 'totalIssues': 2, 'resolvedIssues': 1, 'pendingCases': 1
+        })
+        self.assertEqual(recent_listings, ['l2', 'l1', 'l0'])
+        self.assertEqual(recent_posts, ['p2', 'p1'])
+        self.assertTrue(self.check()['consistent'])
+
+    def test_check_reports_and_repairs_drift(self):
+        self.stats.totals['pendingCases'] = 7
+        report = self.check()
+        self.assertFalse(report['consistent'])
+        self.assertEqual(report['mismatches']['pendingCases'], {'incremental': 7, 'recomputed': 0})
+
+        repaired = self.stats.check(self.listings.all(), self.posts.all(), self.cases.all(), repair=True)
+        self.assertTrue(repaired['repaired'])
+        self.assertTrue(self.check()['consistent'])
+
+if __name__ == '__main__':
+    unittest.main()
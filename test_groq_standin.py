@@ -0,0 +1,82 @@
+import os
+import json
+import random
+import shutil
+import tempfile
+import unittest
+
+from groq_standin import ReplayLibrary, build_completion, create_app, sample_latency_ms
+from llm_client import TEMPLATE_HEADER
+
+def write_recordings(directory, template, contents):
+    with open(os.path.join(directory, f"{template}.jsonl"), 'w', encoding='utf-8') as f:
+        for content in contents:
+            f.write(json.dumps({'content': content, 'usage': {'prompt_tokens': 10, 'completion_tokens': 5}}) + "\n")
+
+class TestGroqStandin(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        write_recordings(self.tmpdir, 'market_prices', ['[{"commodity": "Tomato"}]', '[{"commodity": "Onion"}]'])
+        write_recordings(self.tmpdir, 'default', ['{"fallback": true}'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def post(self, client, template=None):
+        headers = {TEMPLATE_HEADER: template} if template else {}
+        return client.post('/openai/v1/chat/completions', headers=headers,
+                           json={'model': 'llama', 'messages': [{'role': 'user', 'content': 'prices?'}]})
+
+    def test_replays_recordings_in_order_per_template(self):
+        client = create_app(ReplayLibrary(self.tmpdir, config={}, seed=1)).test_client()
+        contents = [self.post(client, 'market_prices').json['choices'][0]['message']['content'] for _ in range(3)]
+        self.assertEqual(contents, ['[{"commodity": "Tomato"}]', '[{"commodity": "Onion"}]', '[{"commodity": "Tomato"}]'])
+
+        body = self.post(client, 'digital_twin').json # no recording: the 'default' one
+        self.assertEqual(body['choices'][0]['message']['content'], '{"fallback": true}')
+        self.assertEqual(body['usage'], {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15})
+        self.assertEqual(body['model'], 'llama')
+
+        stats = client.get('/standin/stats').json
+        self.assertEqual((stats['market_prices']['requests'], stats['digital_twin']['requests']), (3, 1))
+        client.post('/standin/reset', json={'seed': 1})
+        self.assertEqual(self.post(client, 'market_prices').json['choices'][0]['message']['content'], '[{"commodity": "Tomato"}]')
+
+    def test_injected_errors_are_reproducible(self):
+        config = {'default': {'error_rate': 0.5, 'error_statuses': [429, 503]}}
+        runs = []
+        for _ in range(2):
+            client = create_app(ReplayLibrary(self.tmpdir, config=config, seed=7)).test_client()
+            runs.append([self.post(client, 'market_prices').status_code for _ in range(20)])
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(set(runs[0]), {200, 429, 503})
+        client = create_app(ReplayLibrary(self.tmpdir, config={'default': {'error_rate': 1.0}}, seed=7)).test_client()
+        response = self.post(client)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json['error']['type'], 'standin_injected_error')
+
+    def test_latency_distributions_and_profiles(self):
+        rng = random.Random(3)
+        self.assertEqual(sample_latency_ms({'distribution': 'constant', 'value': 250}, rng), 250)
+        self.assertTrue(10 <= sample_latency_ms({'distribution': 'uniform', 'min': 10, 'max': 20}, rng) <= 20)
+        self.assertEqual(sample_latency_ms({'distribution': 'normal', 'mean': -50, 'stddev': 1}, rng), 0.0)
+        self.assertEqual(sample_latency_ms({'distribution': 'lognormal', 'median': 800, 'sigma': 2, 'cap': 5}, rng), 5)
+        with self.assertRaises(ValueError):
+            sample_latency_ms({'distribution': 'pareto'}, rng)
+
+        library = ReplayLibrary(self.tmpdir, config={
+            'default': {'error_rate': 0.1},
+            'templates': {'digital_twin': {'latency_ms': {'distribution': 'constant', 'value': 2500}}}
+        })
+        self.assertEqual(library.profile('digital_twin')['latency_ms']['value'], 2500)
+        self.assertEqual(library.profile('digital_twin')['error_rate'], 0.1)
+        self.assertEqual(library.profile('market_prices')['latency_ms'], {'distribution': 'constant', 'value': 0})
+
+    def test_completion_without_recording(self):
+        completion = build_completion(None, 'standin', [{'role': 'user', 'content': 'x' * 40}])
+        self.assertEqual(completion['choices'][0]['message']['content'], '{}')
+        self.assertEqual(completion['usage']['prompt_tokens'], 10) # ~4 characters per token
+
+if __name__ == '__main__':
+    unittest.main()
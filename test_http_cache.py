@@ -0,0 +1,73 @@
+import gzip
+import unittest
+
+from http_cache import ResponseCache, make_etag, etag_matches, choose_encoding
+from gov_stats import GovStats
+
+class TestETags(unittest.TestCase):
+    def test_etag_follows_version_key(self):
+        etag = make_etag('/listings?limit=20', 'store', 7)
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(etag, make_etag('/listings?limit=20', 'store', 7))
+        self.assertNotEqual(etag, make_etag('/listings?limit=20', 'store', 8))
+        self.assertNotEqual(etag, make_etag('/listings?limit=50', 'store', 7))
+
+    def test_if_none_match(self):
+        etag = make_etag('x', 1)
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(f'"other", {etag[2:]}', etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches(None, etag))
+        self.assertFalse(etag_matches(make_etag('x', 2), etag))
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0, deflate'), None)
+        self.assertEqual(choose_encoding('*'), 'gzip')
+        self.assertIsNone(choose_encoding(None))
+
+class TestResponseCache(unittest.TestCase):
+    def test_builds_once_per_version(self):
+        cache = ResponseCache(min_compress=10)
+        calls = []
+
+        def build():
+            calls.append(1)
+            return b'[' + b'{"cropName":"Wheat"},' * 50 + b'{}]', {'X-Sync-Token': '7'}
+
+        body, headers, encoding = cache.get('v7', build)
+        self.assertIsNone(encoding)
+        self.assertEqual(headers, {'X-Sync-Token': '7'})
+        compressed, _, encoding = cache.get('v7', build, 'gzip')
+        self.assertEqual(encoding, 'gzip')
+        self.assertEqual(gzip.decompress(compressed), body)
+        self.assertLess(len(compressed), len(body))
+        self.assertIs(cache.get('v7', build, 'gzip')[0], compressed)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['hits'], 2)
+
+    def test_small_bodies_are_not_compressed(self):
+        cache = ResponseCache()
+        body, _, encoding = cache.get('v1', lambda: (b'[]', {}), 'gzip')
+        self.assertEqual((body, encoding), (b'[]', None))
+
+    def test_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        for version in range(3):
+            cache.get(version, lambda: (b'{}', {}))
+        self.assertEqual(list(cache.entries), [1, 2])
+        cache = ResponseCache(max_bytes=10)
+        cache.get('a', lambda: (b'x' * 6, {}))
+        cache.get('b', lambda: (b'y' * 6, {}))
+        self.assertEqual(list(cache.entries), ['b'])
+        self.assertEqual(cache.stats()['bytes'], 6)
+
+class TestGovStatsVersion(unittest.TestCase):
+    def test_version_changes_on_write(self):
+        stats = GovStats()
+        before = stats.version
+        stats.on_listing(None, {'id': 'l1', 'quantity': 5})
+        self.assertGreater(stats.version, before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import json
+import asyncio
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import groq
+from werkzeug.serving import make_server
+
+import llm_client
+from llm_metrics import LLMMetrics
+from groq_standin import ReplayLibrary, create_app
+
+class StandinServer:
+    """groq_standin on a free local port, in a background thread."""
+
+    def __init__(self, library):
+        self.library = library
+        self.server = make_server('127.0.0.1', 0, create_app(library), threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.thread.join()
+
+class TestLLMClient(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.recordings = os.path.join(self.tmpdir, 'recordings')
+        os.makedirs(self.recordings)
+        with open(os.path.join(self.recordings, 'market_prices.jsonl'), 'w') as f:
+            f.write(json.dumps({'content': '[{"commodity": "Tomato"}]', 'usage': {'prompt_tokens': 12, 'completion_tokens': 8}}) + "\n")
+        self.server = StandinServer(ReplayLibrary(self.recordings, config={}, seed=1))
+        self.metrics = LLMMetrics()
+        self.env = mock.patch.dict(os.environ, {'GROQ_BASE_URL': self.server.url, 'GROQ_MAX_RETRIES': '0',
+                                                'GROQ_API_KEY': '', 'VITE_GROQ_CHATBOT_API_KEY': ''})
+        self.env.start()
+        self.metrics_patch = mock.patch.object(llm_client, 'metrics', self.metrics)
+        self.metrics_patch.start()
+
+    def tearDown(self):
+        self.metrics_patch.stop()
+        self.env.stop()
+        self.server.close()
+        shutil.rmtree(self.tmpdir)
+
+    def call(self, template='market_prices'):
+        return llm_client.chat_completion(llm_client.get_client(), template, model='llama', messages=[{'role': 'user', 'content': 'prices?'}])
+
+    def call_async(self, template='market_prices'):
+        async def run():
+            try:
+                return await llm_client.async_chat_completion(template, model='llama', messages=[{'role': 'user', 'content': 'prices?'}])
+            finally:
+                await llm_client.aclose_async_client()
+        return asyncio.run(run())
+
+    def test_standin_key_fallback(self):
+        self.assertEqual(llm_client.get_api_key(), llm_client.STANDIN_API_KEY)
+        with mock.patch.dict(os.environ, {'GROQ_BASE_URL': ''}):
+            self.assertFalse(llm_client.get_api_key()) # no key and no stand-in: routes report the key missing
+        with mock.patch.dict(os.environ, {'GROQ_API_KEY': 'real-key'}):
+            self.assertEqual(llm_client.get_api_key(), 'real-key')
+
+    def test_sync_and_async_calls_are_tagged_and_measured(self):
+        for completion in (self.call(), self.call_async()):
+            self.assertEqual(llm_client.parse_json('market_prices', completion.choices[0].message.content), [{'commodity': 'Tomato'}])
+        self.assertEqual(self.server.library.stats['market_prices']['requests'], 2) # template header reached the server
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['templates']['market_prices']['requests'], {'ok': 2, 'error': 0})
+        self.assertEqual(snapshot['tokens_total']['market_prices/prompt'], 24)
+
+    def test_recorded_responses_replay(self):
+        record_dir = os.path.join(self.tmpdir, 'recorded')
+        with mock.patch.dict(os.environ, {'GROQ_RECORD_DIR': record_dir}):
+            self.call()
+        replay = StandinServer(ReplayLibrary(record_dir, config={}))
+        try:
+            with mock.patch.dict(os.environ, {'GROQ_BASE_URL': replay.url}):
+                completion = self.call_async()
+        finally:
+            replay.close()
+        self.assertEqual(completion.choices[0].message.content, '[{"commodity": "Tomato"}]')
+        self.assertEqual(completion.usage.prompt_tokens, 12)
+
+    def test_error_statuses_map_to_sdk_errors(self):
+        for status, error in ((429, groq.RateLimitError), (503, groq.InternalServerError)):
+            self.server.library.config = {'default': {'error_rate': 1.0, 'error_statuses': [status]}}
+            with self.assertRaises(error):
+                self.call()
+            with self.assertRaises(error):
+                self.call_async()
+        self.assertEqual(self.metrics.snapshot()['templates']['market_prices']['requests'], {'ok': 0, 'error': 4})
+
+    def test_timeout(self):
+        self.server.library.config = {'default': {'latency_ms': {'distribution': 'constant', 'value': 1000}}}
+        with mock.patch.dict(os.environ, {'GROQ_TIMEOUT': '0.2'}):
+            with self.assertRaises(groq.APITimeoutError):
+                self.call()
+            with self.assertRaises(groq.APITimeoutError):
+                self.call_async()
+        self.assertEqual(self.metrics.requests_total.get('market_prices', 'error'), 2)
+
+    def test_parse_failures_are_counted(self):
+        with self.assertRaises(ValueError):
+            llm_client.parse_json('voice_query', 'not json')
+        self.assertEqual(self.metrics.json_parse_failures.get('voice_query'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from llm_metrics import LLMMetrics, Histogram
+
+class TestLLMMetrics(unittest.TestCase):
+
+    def test_record_call_counts_tokens_per_template(self):
+        metrics = LLMMetrics()
+        metrics.record_call("pest_prediction", 0.8, prompt_tokens=400, completion_tokens=200)
+        metrics.record_call("pest_prediction", 1.2, prompt_tokens=410, completion_tokens=190)
+        metrics.record_call("digital_twin", 3.0, error=RuntimeError("timeout"))
+
+        snapshot = metrics.snapshot()
+        pest = snapshot['templates']['pest_prediction']
+        self.assertEqual(pest['requests'], {'ok': 2, 'error': 0})
+        self.assertEqual(pest['prompt_tokens']['count'], 2)
+        self.assertEqual(snapshot['tokens_total']['pest_prediction/prompt'], 810)
+        self.assertEqual(snapshot['templates']['digital_twin']['requests']['error'], 1)
+
+    def test_parse_failures_and_cache_outcomes(self):
+        metrics = LLMMetrics()
+        metrics.record_parse_failure("voice_query")
+        metrics.record_cache("market_prices", "hit")
+        metrics.record_cache("market_prices", "hit")
+        metrics.record_cache("market_prices", "miss")
+
+        self.assertEqual(metrics.json_parse_failures.get("voice_query"), 1)
+        self.assertEqual(metrics.snapshot()['cache'], {'market_prices/hit': 2, 'market_prices/miss': 1})
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram('latency', 'test', ('template',), buckets=(1, 2, 4, 8))
+        for value in [0.5] * 90 + [3] * 9 + [7]:
+            histogram.observe(value, 'x')
+
+        self.assertLessEqual(histogram.quantile(0.5, 'x'), 1)
+        self.assertTrue(2 <= histogram.quantile(0.95, 'x') <= 4)
+        self.assertIsNone(histogram.quantile(0.5, 'missing'))
+
+    def test_prometheus_rendering(self):
+        metrics = LLMMetrics()
+        metrics.record_call("health_analysis", 0.3, prompt_tokens=250, completion_tokens=90)
+        text = metrics.render_prometheus()
+
+        self.assertIn('# TYPE agrisphere_llm_request_duration_seconds histogram', text)
+        self.assertIn('agrisphere_llm_request_duration_seconds_bucket{template="health_analysis",le="+Inf"} 1', text)
+        self.assertIn('agrisphere_llm_tokens_total{template="health_analysis",kind="completion"} 90', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import random
+import unittest
+from datetime import date, timedelta
+
+from matching_engine import MatchingEngine
+
+class TestMatchingEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = MatchingEngine(k=3)
+        self.engine.rebuild(
+            [
+                {'id': 'l1', 'cropName': 'rice ', 'quantity': '500', 'price': '950', 'location': 'Karnal, Haryana'},
+                {'id': 'l2', 'cropName': 'Paddy', 'quantity': '50', 'price': '1500', 'location': 'Patna'},
+                {'id': 'l3', 'cropName': 'wheat', 'quantity': '600', 'price': '900', 'location': 'Haryana'},
+            ],
+            [
+                {'id': 'd1', 'crop': 'Rice', 'quantity': '566', 'price': '1000', 'location': 'haryana'},
+                {'id': 'd2', 'crop': 'Rice', 'quantity': '30', 'price': '20000', 'location': ''},
+            ]
+        )
+
+    def test_ranks_same_crop_only(self):
+        matches = self.engine.matches_for_demand('d1')
+        self.assertEqual([m[1] for m in matches], ['l1', 'l2'])
+        self.assertEqual(matches[0][2]['price'], 1.0)
+        self.assertEqual(matches[0][2]['location'], 1.0)
+        self.assertEqual([m[1] for m in self.engine.matches_for_listing('l3')], [])
+        self.assertIsNone(self.engine.matches_for_demand('missing'))
+
+    def test_new_listing_updates_ranked_demands(self):
+        self.engine.matches_for_demand('d2')
+        ready = (date.today() - timedelta(days=1)).isoformat()
+        self.engine.add_listing({'id': 'l4', 'cropName': 'चावल', 'quantity': '30', 'price': '900', 'harvestDate': ready})
+        self.assertEqual(self.engine.matches_for_demand('d2')[0][1], 'l4')
+
+    def test_closed_demand_is_dropped(self):
+        self.assertEqual([m[1] for m in self.engine.matches_for_listing('l1')], ['d1', 'd2'])
+        self.engine.add_demand({'id': 'd1', 'crop': 'Rice', 'status': 'Fulfilled'})
+        self.assertEqual([m[1] for m in self.engine.matches_for_listing('l1')], ['d2'])
+        self.assertIsNone(self.engine.matches_for_demand('d1'))
+
+    def test_rankings_are_rescored_when_the_date_changes(self):
+        today = [date(2026, 10, 1)]
+        engine = MatchingEngine(k=3, today=lambda: today[0])
+        engine.add_demand({'id': 'd1', 'crop': 'Rice', 'quantity': '100', 'price': '1000'})
+        engine.add_listing({'id': 'l1', 'cropName': 'Rice', 'quantity': '100', 'price': '1000', 'harvestDate': '2026-11-30'})
+        self.assertEqual(engine.matches_for_demand('d1')[0][2]['harvest'], round(1 - 60 / 90, 3))
+        today[0] = date(2026, 11, 30) # harvest day: produce is ready
+        self.assertEqual(engine.matches_for_demand('d1')[0][2]['harvest'], 1.0)
+
+    def test_reads_are_fast_with_many_demands(self):
+        rng = random.Random(11)
+        engine = MatchingEngine()
+        crops = ['Rice', 'Wheat', 'Maize', 'Cotton', 'Potato', 'Onion', 'Tomato', 'Mustard', 'Soybean', 'Sugarcane']
+        engine.rebuild(
+            [{'id': f"l{i}", 'cropName': rng.choice(crops), 'quantity': rng.randint(1, 1000),
+              'price': rng.randint(500, 5000)} for i in range(2000)],
+            [{'id': f"d{i}", 'crop': rng.choice(crops), 'quantity': rng.randint(1, 1000),
+              'price': rng.randint(500, 5000)} for i in range(100000)]
+        )
+        engine.matches_for_demand('d42')
+        start = time.perf_counter()
+        for _ in range(1000):
+            engine.matches_for_demand('d42')
+        self.assertLess((time.perf_counter() - start), 0.1)
+
+if __name__ == '__main__':
+    unittest.main()
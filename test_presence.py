@@ -0,0 +1,76 @@
+import time
+import unittest
+
+from presence import PresenceTracker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestPresenceTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.changes = []
+        self.tracker = PresenceTracker(timeout=300, slot_seconds=5, clock=self.clock,
+                                       on_change=lambda user, online: self.changes.append((user, online)))
+
+    def test_users_expire_after_timeout(self):
+        self.tracker.heartbeat("Ravi")
+        self.clock.now += 100
+        self.tracker.heartbeat("Sita")
+        self.assertEqual(self.tracker.online(), ["Ravi", "Sita"])
+
+        self.clock.now += 205 # Ravi last seen 305 s ago
+        self.assertEqual(self.tracker.online(), ["Sita"])
+        self.assertEqual(self.changes, [("Ravi", True), ("Sita", True), ("Ravi", False)])
+
+    def test_heartbeat_extends_presence(self):
+        for _ in range(10):
+            self.tracker.heartbeat("Ravi")
+            self.clock.now += 200
+        self.assertEqual(self.tracker.online(), ["Ravi"])
+        self.assertEqual(self.changes, [("Ravi", True)])
+        self.assertEqual(sum(len(slot) for slot in self.tracker.wheel), 1)
+
+    def test_long_idle_gap_expires_everyone(self):
+        for i in range(50):
+            self.tracker.heartbeat(f"user{i}")
+        self.clock.now += 10 * 3600
+        self.assertEqual(self.tracker.online(), [])
+        self.assertEqual(self.tracker.count(), 0)
+
+    def test_snapshot_is_cached_between_changes(self):
+        self.tracker.heartbeat("Ravi")
+        first = self.tracker.online()
+        self.tracker.heartbeat("Ravi")
+        self.assertIs(self.tracker.online(), first)
+
+    def test_version_changes_only_on_join_and_expiry(self):
+        self.tracker.heartbeat("Ravi")
+        users, version = self.tracker.snapshot()
+        self.tracker.heartbeat("Ravi")
+        self.clock.now += 100
+        self.assertEqual(self.tracker.snapshot(), (users, version))
+        self.tracker.heartbeat("Sita")
+        users, joined = self.tracker.snapshot()
+        self.assertNotEqual(joined, version)
+        self.clock.now += 250 # Ravi expires
+        self.assertEqual(self.tracker.snapshot()[0], ["Sita"])
+        self.assertNotEqual(self.tracker.snapshot()[1], joined)
+
+    def test_heartbeat_throughput(self):
+        tracker = PresenceTracker()
+        start = time.perf_counter()
+        for i in range(100000):
+            tracker.heartbeat(f"user{i % 20000}")
+        elapsed = time.perf_counter() - start
+        # 100k heartbeats must fit comfortably inside one minute
+        self.assertLess(elapsed, 10)
+        self.assertEqual(len(tracker.online()), 20000)
+
+if __name__ == '__main__':
+    unittest.main()
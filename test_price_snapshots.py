@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+import datetime
+from price_snapshots import PriceSnapshotStore, parse_districts
+
+PRICES = [{"commodity": "Tomato", "variety": "Hybrid", "min_price": 18, "max_price": 26, "modal_price": 22}]
+
+class TestPriceSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = PriceSnapshotStore(':memory:')
+        self.calls = []
+
+    def fetch(self, state, district, market, category):
+        self.calls.append((state, district, category))
+        return PRICES
+
+    def test_same_day_requests_use_snapshot(self):
+        first = self.store.get_or_fetch("Bihar", "Patna", "General", "All", self.fetch)
+        second = self.store.get_or_fetch(" bihar", "PATNA ", "General", None, self.fetch)
+        self.assertEqual(first, PRICES)
+        self.assertEqual(second, PRICES)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_empty_results_are_not_stored(self):
+        self.store.get_or_fetch("Bihar", "Gaya", "General", "All", lambda *args: [])
+        self.assertIsNone(self.store.get("Bihar", "Gaya", "All"))
+
+    def test_history_by_date_range(self):
+        today = datetime.date.today()
+        for days_ago in range(5):
+            self.store.put("Punjab", "Ludhiana", "All", PRICES, date=today - datetime.timedelta(days=days_ago))
+
+        history = self.store.history("Punjab", "Ludhiana", "All",
+                                     today - datetime.timedelta(days=3), today - datetime.timedelta(days=1))
+        self.assertEqual([h['date'] for h in history],
+                         [(today - datetime.timedelta(days=d)).isoformat() for d in (3, 2, 1)])
+
+    def test_warm_up_skips_districts_already_fetched(self):
+        self.store.put("Bihar", "Patna", "All", PRICES)
+        results = self.store.warm_up([("Bihar", "Patna"), ("Bihar", "Gaya")], fetch=self.fetch, workers=2)
+        self.assertEqual([r['district'] for r in results], ["Gaya"])
+        self.assertEqual(self.calls, [("Bihar", "Gaya", "All")])
+
+    def test_key_locks_are_released(self):
+        for i in range(20):
+            self.store.get_or_fetch("Bihar", f"District {i}", "General", "All", self.fetch)
+        self.assertEqual(self.store.key_locks, {})
+
+    def test_parse_districts(self):
+        self.assertEqual(parse_districts([["Bihar", "Patna"]]), [("Bihar", "Patna")])
+        for bad in ("Patna", [1, 2], [["Bihar"]], [["Bihar", None]], [["Bihar", " "]]):
+            with self.assertRaises(ValueError):
+                parse_districts(bad)
+
+    def test_async_fetch_is_single_flight(self):
+        async def fetch(state, district, market, category):
+            self.calls.append((state, district, category))
+            await asyncio.sleep(0.05)
+            return PRICES
+
+        async def scenario():
+            requests = [self.store.get_or_fetch_async("Bihar", "Patna", "General", "All", fetch) for _ in range(5)]
+            requests.append(self.store.get_or_fetch_async("Bihar", "Gaya", "General", "All", fetch))
+            return await asyncio.gather(*requests)
+
+        self.assertEqual(asyncio.run(scenario()), [PRICES] * 6)
+        self.assertEqual(sorted(self.calls), [("Bihar", "Gaya", "All"), ("Bihar", "Patna", "All")])
+        self.assertEqual(self.store.inflight, {})
+        self.assertEqual(asyncio.run(self.store.get_or_fetch_async("Bihar", "Patna", "General", "All", fetch)), PRICES)
+        self.assertEqual(len(self.calls), 2) # served from the snapshot
+
+if __name__ == '__main__':
+    unittest.main()
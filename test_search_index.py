@@ -0,0 +1,91 @@
+import random
+import unittest
+
+from search_index import SearchIndex, tokenize
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.rebuild(
+            [
+                {'id': 'l1', 'cropName': 'Wheat', 'location': 'Patna, Bihar', 'quality': 'Premium', 'price': 2400, 'quantity': 50},
+                {'id': 'l2', 'cropName': 'Tomato', 'location': 'Nashik', 'quality': 'Standard', 'price': 18, 'quantity': 20},
+                {'id': 'l3', 'cropName': 'गेहूं', 'location': 'पटना', 'quality': 'Standard', 'price': 2200, 'quantity': 'n/a'},
+            ],
+            [
+                {'id': 'p1', 'title': 'Yellow rust on wheat', 'content': 'Leaves turning yellow, what to do?'},
+                {'id': 'p2', 'title': 'टमाटर में कीड़े', 'content': 'पत्तियों पर छेद'},
+            ]
+        )
+
+    def test_tokenize_hindi_and_english(self):
+        self.assertEqual(tokenize('Fresh Tomatoes from पटना'), ['fresh', 'tomato', 'from', 'patna'])
+        self.assertEqual(tokenize('गेहूं की फसल।'), ['wheat', 'फसल'])
+
+    def test_cross_language_match(self):
+        self.assertEqual(self.index.search('wheat patna', kind='listing'), [('listing', 'l3'), ('listing', 'l1')])
+        self.assertEqual(self.index.search('tomatoes'), [('post', 'p2'), ('listing', 'l2')])
+
+    def test_range_filters(self):
+        self.assertEqual(self.index.search('wheat', min_price=2300), [('listing', 'l1')])
+        self.assertEqual(self.index.search('', max_quantity=30), [('listing', 'l2')])
+
+    def test_incremental_updates(self):
+        self.index.on_listing(None, {'id': 'l4', 'cropName': 'Onion', 'location': 'Nashik', 'price': 25, 'quantity': 10})
+        self.assertEqual(self.index.search('nashik')[0], ('listing', 'l4'))
+        # Re-index on a field change; the old tokens no longer match
+        self.index.on_listing({'id': 'l4', 'cropName': 'Onion'}, {'id': 'l4', 'cropName': 'Garlic', 'location': 'Indore'})
+        self.assertEqual(self.index.search('onion'), [])
+        self.assertEqual(self.index.search('garlic'), [('listing', 'l4')])
+
+    def test_deleted_and_closed_records_drop_out(self):
+        self.index.on_listing({'id': 'l1', 'cropName': 'Wheat'}, None)
+        self.index.on_post({'id': 'p1', 'title': 'Yellow rust on wheat'}, None)
+        self.assertEqual(self.index.search('wheat'), [('listing', 'l3')])
+        l3 = {'id': 'l3', 'cropName': 'गेहूं', 'location': 'पटना', 'price': 2200}
+        self.index.on_listing(l3, dict(l3, status='Sold'))
+        self.assertEqual(self.index.search('wheat'), [])
+        self.index.on_listing(dict(l3, status='Sold'), dict(l3, status='Active')) # reopened
+        self.assertEqual(self.index.search('wheat'), [('listing', 'l3')])
+
+    def test_stale_docs_are_compacted(self):
+        index = SearchIndex(compact_min_stale=10)
+        for i in range(30):
+            index.add('listing', {'id': f"l{i % 5}", 'cropName': f"Crop{i}", 'price': i})
+        self.assertLessEqual(len(index.docs), 2 * 5 + 10 + 1)
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.search('', min_price=0), [('listing', f"l{i}") for i in (4, 3, 2, 1, 0)])
+        self.assertEqual(index.search('crop29'), [('listing', 'l4')])
+        self.assertEqual(index.search('crop0'), [])
+
+    def test_range_filters_use_the_sorted_index(self):
+        index = SearchIndex()
+        index.rebuild(
+            ({'id': f"l{i}", 'cropName': 'Wheat', 'location': 'Patna', 'price': 1000 + i % 1000, 'quantity': i % 50}
+             for i in range(200000)),
+            []
+        )
+        self.assertEqual(index.search('', min_price=5000), []) # matches nothing
+        self.assertEqual(index.scanned, 0)
+        self.assertEqual(len(index.search('wheat', min_price=1999)), 20) # common token + selective range
+        self.assertEqual(index.scanned, 20) # driven by the 200-doc price slice, newest first
+        hits = index.search('wheat patna', min_price=1998.5, min_quantity=40)
+        self.assertEqual(hits[0], ('listing', 'l199999'))
+        self.assertTrue(all(int(record_id[1:]) % 1000 == 999 for _, record_id in hits))
+        self.assertLessEqual(index.scanned - 20, 200) # never walks the 200k 'wheat' postings
+
+    def test_query_cost_is_bounded_by_limit(self):
+        rng = random.Random(3)
+        index = SearchIndex()
+        crops = ['Wheat', 'Rice', 'Tomato', 'Onion', 'Potato', 'Maize', 'Cotton', 'Mustard']
+        places = ['Patna', 'Gaya', 'Nashik', 'Pune', 'Indore', 'Karnal', 'Ludhiana', 'Jaipur']
+        for i in range(50000):
+            index.add('listing', {'id': f"l{i}", 'cropName': rng.choice(crops), 'location': rng.choice(places),
+                                  'price': rng.randint(10, 3000), 'quantity': rng.randint(1, 500)})
+        hits = index.search('wheat patna', max_price=2000, limit=20)
+        self.assertEqual(len(hits), 20)
+        self.assertLess(index.scanned, 1000) # stops at the limit instead of scanning every match
+
+if __name__ == '__main__':
+    unittest.main()
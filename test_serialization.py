@@ -0,0 +1,38 @@
+import unittest
+
+import serialization
+from serialization import dumps, dumps_text, loads, check_record
+
+class FakeScalar:
+    """Stands in for a numpy scalar (exposes .item())."""
+    def item(self):
+        return 7
+
+class TestSerialization(unittest.TestCase):
+
+    def test_compact_unicode_round_trip(self):
+        record = {'id': 'p1', 'title': 'गेहूं की फसल', 'likes': 3, 'tags': ['rabi']}
+        text = dumps_text(record)
+        self.assertNotIn(' ', text.replace('गेहूं की फसल', ''))
+        self.assertIn('गेहूं', text)
+        self.assertEqual(loads(text), record)
+        self.assertEqual(loads(dumps(record)), record)
+
+    def test_fallback_types(self):
+        self.assertEqual(loads(dumps({'count': FakeScalar(), 'crops': {'Wheat'}})), {'count': 7, 'crops': ['Wheat']})
+        with self.assertRaises(TypeError):
+            dumps({'bad': object()})
+
+    def test_indent(self):
+        self.assertIn(b'\n  "a"', dumps({'a': 1}, indent=True))
+
+    def test_check_record(self):
+        listing = {'id': 'l1', 'farmerName': 'Ram', 'cropName': 'Wheat', 'quantity': '50', 'price': 2200, 'location': 'Patna'}
+        self.assertIsNone(check_record('listings', listing))
+        self.assertEqual(check_record('listings', dict(listing, cropName='')), "Missing field: cropName")
+        self.assertEqual(check_record('listings', dict(listing, price=True)), "price must be number/str")
+        self.assertEqual(check_record('listings', dict(listing, verified='yes')), "verified must be bool")
+        self.assertIsNone(check_record('demands', {'anything': object()}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from shared_state import MemoryBackend, SQLiteBackend, open_shared_state, PURGE_INTERVAL
+from presence import SharedPresenceTracker, PresenceTracker, create_tracker
+from llm_metrics import LLMMetrics
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class BackendContract:
+    """Behaviour both backends must share; `make()` returns a fresh backend."""
+
+    def test_values_and_ttl(self):
+        state = self.make()
+        state.set('cache', 'a', {'twin': [1, 2]})
+        state.set('cache', 'b', 'short', ttl=10)
+        self.assertEqual(state.get('cache', 'a'), {'twin': [1, 2]})
+        self.clock.now += 11
+        self.assertIsNone(state.get('cache', 'b'))
+        state.delete('cache', 'a')
+        self.assertIsNone(state.get('cache', 'a'))
+
+    def test_touch_and_live(self):
+        state = self.make()
+        self.assertTrue(state.touch('presence', 'ram', 300))
+        self.assertTrue(state.touch('presence', 'sita', 300))
+        self.clock.now += 200
+        self.assertFalse(state.touch('presence', 'ram', 300))
+        self.assertEqual(state.live('presence'), ['ram', 'sita'])
+        self.clock.now += 150
+        self.assertEqual(state.live('presence'), ['ram'])
+        self.assertTrue(state.touch('presence', 'sita', 300))
+
+    def test_expired_keys_are_purged(self):
+        state = self.make()
+        for i in range(5):
+            state.touch('presence', f'user{i}', 10)
+        state.set('twin', 'old', {'v': 1}, ttl=10)
+        state.set('twin', 'kept', {'v': 2})
+        self.clock.now += 11
+        state.touch('presence', 'user0', 10) # expired keys of other users stay until a purge
+        self.assertEqual(state.purge_expired(), 5) # user1-4 and the old twin
+        self.assertEqual(state.purge_expired(), 0)
+        self.assertEqual(state.live('presence'), ['user0'])
+        self.assertEqual(state.get('twin', 'kept'), {'v': 2})
+
+        # Writes purge on their own once PURGE_INTERVAL has passed
+        self.clock.now += PURGE_INTERVAL + 1
+        state.touch('presence', 'user9', 10)
+        self.assertEqual(state.purge_expired(), 0)
+
+    def test_counters(self):
+        state = self.make()
+        state.incr_many('hits', {'a': 1, 'b': 2.5})
+        state.incr_many('hits', {'a': 1})
+        self.assertEqual(state.counters('hits'), {'a': 2, 'b': 2.5})
+        self.assertEqual(state.counters('other'), {})
+
+class TestMemoryBackend(BackendContract, unittest.TestCase):
+    def make(self):
+        self.clock = FakeClock()
+        return MemoryBackend(clock=self.clock)
+
+class TestSQLiteBackend(BackendContract, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make(self):
+        self.clock = FakeClock()
+        return SQLiteBackend(os.path.join(self.tmpdir, 'state.db'), clock=self.clock)
+
+    def test_workers_share_presence_and_metrics(self):
+        # Two backends on one file stand in for two worker processes
+        worker_a, worker_b = self.make(), SQLiteBackend(os.path.join(self.tmpdir, 'state.db'), clock=self.clock)
+        events = []
+        presence_a = SharedPresenceTracker(worker_a, timeout=300, on_change=lambda u, online: events.append((u, online)))
+        presence_b = SharedPresenceTracker(worker_b, timeout=300)
+        presence_a.heartbeat('ram')
+        presence_b.heartbeat('sita')
+        self.assertEqual(presence_a.online(), ['ram', 'sita'])
+        self.clock.now += 301
+        self.assertEqual(presence_b.online(), [])
+        self.assertEqual(presence_a.count(), 0)
+        presence_a.online()
+        self.assertEqual(events, [('ram', True), ('sita', True), ('ram', False), ('sita', False)])
+
+        metrics_a, metrics_b = LLMMetrics(), LLMMetrics()
+        metrics_a.bind(worker_a)
+        metrics_b.bind(worker_b)
+        metrics_a.record_call('market_prices', 0.4, prompt_tokens=100, completion_tokens=50)
+        metrics_b.record_call('market_prices', 1.2, prompt_tokens=120, error=True)
+        snapshot = metrics_a.snapshot()['templates']['market_prices']
+        self.assertEqual(snapshot['requests'], {'ok': 1, 'error': 1})
+        self.assertEqual(snapshot['latency_seconds']['count'], 2)
+        self.assertEqual(metrics_b.tokens_total.get('market_prices', 'prompt'), 220)
+        self.assertIn('agrisphere_llm_request_duration_seconds_count{template="market_prices"} 2', metrics_b.render_prometheus())
+
+    def test_shared_presence_version_is_the_same_on_every_worker(self):
+        worker_a, worker_b = self.make(), SQLiteBackend(os.path.join(self.tmpdir, 'state.db'), clock=self.clock)
+        presence_a, presence_b = SharedPresenceTracker(worker_a, timeout=300), SharedPresenceTracker(worker_b, timeout=300)
+        presence_a.heartbeat('ram')
+        users, version = presence_a.snapshot()
+        self.assertEqual(presence_b.snapshot(), (users, version))
+        presence_b.heartbeat('ram') # not a join
+        self.assertIs(presence_a.snapshot()[0], users) # served without re-reading the list
+        presence_b.heartbeat('sita')
+        self.assertEqual(presence_a.snapshot()[0], ['ram', 'sita']) # a join on another worker shows at once
+        self.clock.now += 301
+        self.assertEqual(presence_a.snapshot(), ([], presence_b.snapshot()[1]))
+
+class TestBackendSelection(unittest.TestCase):
+    def test_open_shared_state(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            self.assertIsInstance(open_shared_state('memory'), MemoryBackend)
+            self.assertIsInstance(open_shared_state(f"sqlite:{tmpdir}/s.db"), SQLiteBackend)
+            with self.assertRaises(ValueError):
+                open_shared_state('redis')
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertIsInstance(create_tracker(MemoryBackend()), PresenceTracker)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import os
+import sqlite3
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import storage
+from storage import Database, migrate_json_files
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = Database(os.path.join(self.tmpdir, 'test.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_listings_read_newest_first(self):
+        listings = self.db.collection('listings')
+        listings.insert({'id': 'a', 'cropName': 'Wheat'})
+        listings.insert({'id': 'b', 'cropName': 'Rice'})
+        self.assertEqual([l['id'] for l in listings.all()], ['b', 'a'])
+        self.assertEqual(listings.find('cropName', 'Rice'), [{'id': 'b', 'cropName': 'Rice'}])
+
+    def test_chat_trim_keeps_latest(self):
+        chat = self.db.collection('chat')
+        chat.insert_many({'id': str(i), 'text': f"msg {i}"} for i in range(120))
+        chat.trim(100)
+        messages = chat.all()
+        self.assertEqual(len(messages), 100)
+        self.assertEqual(messages[0]['id'], '20')
+        self.assertEqual(messages[-1]['id'], '119')
+
+    def test_modify_is_atomic_across_threads(self):
+        posts = self.db.collection('posts')
+        posts.insert({'id': 'p1', 'comments': []})
+
+        def add_comments(worker):
+            for i in range(20):
+                posts.modify('p1', lambda post: post['comments'].append(f"{worker}-{i}"))
+
+        threads = [threading.Thread(target=add_comments, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(posts.get('p1')['comments']), 80)
+        self.assertIsNone(posts.modify('missing', lambda post: None))
+
+    def test_cursor_pagination(self):
+        listings = self.db.collection('listings')
+        listings.insert_many({'id': f"l{i}", 'cropName': 'Wheat'} for i in range(5))
+
+        first, cursor, _ = listings.page(limit=2)
+        self.assertEqual([l['id'] for l in first], ['l4', 'l3'])
+        second, cursor, _ = listings.page(limit=2, after=cursor)
+        self.assertEqual([l['id'] for l in second], ['l2', 'l1'])
+        last, cursor, _ = listings.page(limit=2, after=cursor)
+        self.assertEqual([l['id'] for l in last], ['l0'])
+        self.assertIsNone(cursor)
+
+    def test_since_returns_only_changes(self):
+        posts = self.db.collection('posts')
+        posts.insert({'id': 'p1', 'comments': []})
+        posts.insert({'id': 'p2', 'comments': []})
+        _, _, token = posts.page()
+
+        unchanged, _, same_token = posts.page(since=token)
+        self.assertEqual(unchanged, [])
+        self.assertEqual(same_token, token)
+
+        posts.modify('p1', lambda post: post['comments'].append('hi'))
+        posts.insert({'id': 'p3', 'comments': []})
+        changed, _, new_token = posts.page(since=token)
+        self.assertEqual([p['id'] for p in changed], ['p1', 'p3'])
+        self.assertGreater(new_token, token)
+
+        # A limited delta resumes from the last change it returned
+        partial, _, partial_token = posts.page(since=token, limit=1)
+        self.assertEqual([p['id'] for p in partial], ['p1'])
+        rest, _, _ = posts.page(since=partial_token)
+        self.assertEqual([p['id'] for p in rest], ['p3'])
+
+    def test_memory_indexes_follow_writes(self):
+        cases = self.db.collection('crop_loss_cases')
+        cases.insert({'id': 'c1', 'status': 'Pending'})
+        cases.insert({'id': 'c2', 'status': 'Pending'})
+        cases.modify('c1', lambda case: case.update(status='Approved'))
+
+        self.assertEqual([c['id'] for c in cases.find('status', 'Pending')], ['c2'])
+        self.assertEqual([c['id'] for c in cases.find('status', 'Approved')], ['c1'])
+        self.assertEqual(cases.get('c1')['status'], 'Approved')
+
+        # Returned records are copies; mutating them must not leak into the index
+        cases.get('c2')['status'] = 'Tampered'
+        self.assertEqual(cases.get('c2')['status'], 'Pending')
+
+    def test_memory_index_readers_never_miss_an_updated_record(self):
+        cases = self.db.collection('crop_loss_cases')
+        cases.insert({'id': 'c1', 'status': 'Pending', 'n': 0})
+        misses, done = [], threading.Event()
+
+        def read():
+            while not done.is_set():
+                try:
+                    if cases.get('c1') is None:
+                        misses.append('get')
+                    cases.find('status', 'Pending')
+                    cases.page(limit=5, where=('status', 'Approved'))
+                except KeyError as e:
+                    misses.append(e)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for i in range(300):
+                cases.modify('c1', lambda case: case.update(n=i, status='Pending' if i % 2 else 'Approved'))
+        finally:
+            done.set()
+            reader.join()
+        self.assertEqual(misses, [])
+        self.assertEqual(cases.get('c1')['n'], 299)
+        self.assertEqual(cases.memory.by_field['status'], {'Pending': {'c1': 1}})
+
+    def test_memory_indexes_rebuild_on_restart(self):
+        interactions = self.db.collection('buyer_interactions')
+        interactions.insert({'id': 'i1', 'buyerId': 'b1', 'listingId': 'l1'})
+        interactions.insert({'id': 'i2', 'buyerId': 'b2', 'listingId': 'l1'})
+        interactions.insert({'id': 'i3', 'buyerId': 'b1', 'listingId': 'l2'})
+
+        reopened = Database(self.db.path).collection('buyer_interactions')
+        self.assertEqual(len(reopened.memory.rows), 3)
+        self.assertEqual([i['id'] for i in reopened.find('listingId', 'l1')], ['i2', 'i1'])
+
+        page, cursor, _ = reopened.page(limit=1, where=('buyerId', 'b1'))
+        self.assertEqual([i['id'] for i in page], ['i3'])
+        page, cursor, _ = reopened.page(limit=1, after=cursor, where=('buyerId', 'b1'))
+        self.assertEqual([i['id'] for i in page], ['i1'])
+        self.assertIsNone(cursor)
+
+    def test_json_migration_runs_once_and_preserves_order(self):
+        files = {
+            'marketplace_listings.json': [{'id': 'new'}, {'id': 'old'}],
+            'demands.json': [{'id': 'd1'}, {'id': 'd2'}],
+            'community_data.json': {'posts': [{'id': 'p1', 'comments': []}], 'chat': [{'id': 'c1'}, {'id': 'c2'}]},
+            'crop_loss_data.json': [{'id': 'case_1', 'status': 'Pending'}],
+        }
+        configs = {}
+        for name, config in storage.COLLECTIONS.items():
+            config = dict(config, json_file=os.path.join(self.tmpdir, config['json_file']))
+            configs[name] = config
+        for filename, content in files.items():
+            with open(os.path.join(self.tmpdir, filename), 'w') as f:
+                json.dump(content, f)
+
+        with mock.patch.dict(storage.COLLECTIONS, configs):
+            imported = migrate_json_files(self.db)
+            self.assertEqual(imported['listings'], 2)
+            self.assertEqual(imported['buyer_interactions'], 0)
+            self.assertEqual(migrate_json_files(self.db), {})
+
+        self.assertEqual([l['id'] for l in self.db.collection('listings').all()], ['new', 'old'])
+        self.assertEqual([d['id'] for d in self.db.collection('demands').all()], ['d1', 'd2'])
+        self.assertEqual([c['id'] for c in self.db.collection('chat').all()], ['c1', 'c2'])
+        self.assertEqual(self.db.collection('crop_loss_cases').find('status', 'Pending')[0]['id'], 'case_1')
+
+    def test_sync_applies_writes_from_other_processes(self):
+        # A second Database on the same file stands in for another worker process
+        other = Database(self.db.path).collection('crop_loss_cases')
+        cases = self.db.collection('crop_loss_cases')
+        changes = []
+        cases.subscribe(lambda old, new: changes.append((old and old['status'], new['status'])))
+
+        other.insert({'id': 'c1', 'status': 'Pending'})
+        self.assertIsNone(cases.get('c1'))
+        self.db.sync()
+        self.assertEqual(cases.get('c1')['status'], 'Pending')
+        self.db.sync() # nothing new: no repeat notifications
+
+        other.modify('c1', lambda case: case.update(status='Approved'))
+        other.insert({'id': 'c2', 'status': 'Pending'})
+        # A local write first applies what it missed, in version order
+        cases.insert({'id': 'c3', 'status': 'Pending'})
+        self.assertEqual(changes, [(None, 'Pending'), ('Pending', 'Approved'), (None, 'Pending'), (None, 'Pending')])
+        self.assertEqual([c['id'] for c in cases.find('status', 'Pending')], ['c3', 'c2'])
+
+        # modify() never works from a stale memory copy
+        other.modify('c3', lambda case: case.update(note='from other'))
+        cases.modify('c3', lambda case: case.update(status='Rejected'))
+        self.assertEqual(other.page(since=0)[0][-1], {'id': 'c3', 'status': 'Rejected', 'note': 'from other'})
+
+    def test_failed_write_still_delivers_caught_up_changes(self):
+        other = Database(self.db.path).collection('crop_loss_cases')
+        cases = self.db.collection('crop_loss_cases')
+        cases.insert({'id': 'c1', 'status': 'Pending'})
+        changes = []
+        cases.subscribe(lambda old, new: changes.append(new['id']))
+
+        other.insert({'id': 'c2', 'status': 'Pending'})
+        # Duplicate id: the write rolls back, but c2 was caught up inside it
+        with self.assertRaises(sqlite3.IntegrityError):
+            cases.insert_many([{'id': 'c3', 'status': 'Pending'}, {'id': 'c1', 'status': 'Pending'}])
+        self.assertEqual(changes, ['c2'])
+        self.assertIsNone(cases.get('c3'))
+        self.db.sync()
+        self.assertEqual(changes, ['c2'])
+
+if __name__ == '__main__':
+    unittest.main()
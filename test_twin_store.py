@@ -0,0 +1,138 @@
+import os
+import json
+import asyncio
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from shared_state import SQLiteBackend
+from twin_store import TwinStore, geohash_encode, twin_key
+
+def fake_twin():
+    return {'location': {'lat': 25.59, 'lng': 85.13}, 'farmBoundary': {'area': 1.0}, 'soilZones': []}
+
+class TestTwinStore(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+    def generate(self, farm_data):
+        self.calls += 1
+        return True, fake_twin()
+
+    def test_geohash_matches_reference(self):
+        # Reference value from the original geohash.org implementation
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_nearby_farms_share_a_key(self):
+        a = twin_key({'latitude': 25.5941, 'longitude': 85.1376, 'size': 8})
+        b = twin_key({'latitude': 25.5952, 'longitude': 85.1381, 'size': 9})
+        c = twin_key({'latitude': 25.5941, 'longitude': 85.1376, 'size': 80})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_location_name_fallback(self):
+        key = twin_key({'town': 'Danapur ', 'district': 'Patna', 'state': 'Bihar', 'size': 3})
+        self.assertEqual(key, "loc:bihar|patna|danapur:s1")
+        self.assertIsNone(twin_key({'size': 3}))
+
+    def test_repeat_request_is_served_from_store(self):
+        store = TwinStore(path=None)
+        farm = {'latitude': 25.59, 'longitude': 85.13, 'size': 10}
+
+        _, first, outcome = store.get_or_generate(farm, self.generate)
+        self.assertEqual(outcome, 'miss')
+        _, second, outcome = store.get_or_generate(dict(farm, size=9), self.generate)
+        self.assertEqual(outcome, 'hit')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second['farmBoundary']['area'], round(9 * 0.404686, 2))
+
+    def test_workers_share_twins_through_shared_state(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'state.db')
+            worker_a = TwinStore(state=SQLiteBackend(path))
+            worker_b = TwinStore(state=SQLiteBackend(path))
+            farm = {'latitude': 25.59, 'longitude': 85.13, 'size': 10}
+            worker_a.get_or_generate(farm, self.generate)
+            _, twin, outcome = worker_b.get_or_generate(farm, self.generate)
+            self.assertEqual(outcome, 'hit')
+            self.assertEqual(twin['farmBoundary']['area'], 4.05)
+            self.assertEqual(self.calls, 1)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self):
+        store = TwinStore(path=None, fresh_seconds=0)
+        farm = {'district': 'Patna', 'state': 'Bihar', 'size': 4}
+        store.get_or_generate(farm, self.generate)
+
+        success, twin, outcome = store.get_or_generate(farm, self.generate)
+        self.assertTrue(success)
+        self.assertEqual(outcome, 'stale')
+        store.executor.shutdown(wait=True)
+        self.assertEqual(self.calls, 2)
+
+    def test_file_store_writes_one_row_per_twin_and_imports_legacy_json(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            legacy = os.path.join(tmpdir, 'twins.json')
+            with open(legacy, 'w') as f:
+                json.dump({
+                    'loc:bihar|patna|:s1': {'twin': fake_twin(), 'generated_at': time.time()},
+                    'loc:bihar|gaya|:s1': {'twin': fake_twin(), 'generated_at': 0} # past max stale
+                }, f)
+            path = os.path.join(tmpdir, 'twins.db')
+            store = TwinStore(path=path, legacy_path=legacy)
+            _, twin, outcome = store.get_or_generate({'district': 'Patna', 'state': 'Bihar', 'size': 4}, self.generate)
+            self.assertEqual((outcome, self.calls), ('hit', 0))
+            store.get_or_generate({'district': 'Nalanda', 'state': 'Bihar', 'size': 4}, self.generate)
+
+            reopened = TwinStore(path=path, legacy_path=legacy) # import runs once
+            self.assertEqual(len(reopened.state.live('digital_twin')), 2) # Patna (imported) and Nalanda
+            self.assertIsNone(reopened.lookup({'district': 'Gaya', 'state': 'Bihar', 'size': 4})[1])
+            self.assertEqual(reopened.lookup({'district': 'Nalanda', 'state': 'Bihar', 'size': 4})[2], 'hit')
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_concurrent_misses_generate_once(self):
+        store = TwinStore(path=None)
+        farm = {'district': 'Patna', 'state': 'Bihar', 'size': 4}
+        started = threading.Event()
+
+        def slow_generate(farm_data):
+            started.set()
+            time.sleep(0.05)
+            return self.generate(farm_data)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(store.get_or_generate(farm, slow_generate))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(success for success, _, _ in results))
+        self.assertEqual(store.key_locks, {})
+
+    def test_async_misses_share_one_generation(self):
+        store = TwinStore(path=None)
+
+        async def generate_async(farm_data):
+            await asyncio.sleep(0.05)
+            return self.generate(farm_data)
+
+        async def scenario():
+            farms = [{'district': 'Patna', 'state': 'Bihar', 'size': size} for size in (1, 2, 1.5)]
+            return await asyncio.gather(*(store.get_or_generate_async(farm, generate_async, self.generate) for farm in farms))
+
+        results = asyncio.run(scenario())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([twin['farmBoundary']['area'] for _, twin, _ in results], [0.4, 0.81, 0.61])
+        self.assertEqual(store.inflight, {})
+        success, _, outcome = asyncio.run(store.get_or_generate_async({'district': 'Patna', 'state': 'Bihar', 'size': 1}, generate_async, self.generate))
+        self.assertEqual((success, outcome, self.calls), (True, 'hit', 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from yield_history import YieldHistory, build_index, save_index
+
+def row(crop, district, season, year, yield_kg, area=100.0):
+    return {
+        'crop': crop, 'district': district, 'season': season, 'year': year,
+        'yield_kg_per_hectare': yield_kg, 'area_hectares': area,
+        'production_tonnes': area * yield_kg / 1000
+    }
+
+RECORDS = [row('rice', 'Patna', 'Kharif', year, 2000 + 100 * i) for i, year in enumerate(range(2016, 2022))] + [
+    row('rice', 'Gaya', 'Kharif', 2021, 1500),
+    row('wheat', 'Patna', 'Rabi', 2021, 3000),
+]
+
+class TestYieldHistory(unittest.TestCase):
+    def setUp(self):
+        self.history = YieldHistory(build_index(RECORDS))
+
+    def test_exact_entry(self):
+        stats, level = self.history.lookup('Rice', ' patna ', 'KHARIF')
+        self.assertEqual(level, 'crop_district_season')
+        self.assertEqual(stats['mean_yield'], 2250.0)
+        self.assertEqual(stats['trend_3yr'], 2400.0) # 2019-2021
+        self.assertEqual(stats['trend_5yr'], 2300.0) # 2017-2021
+        self.assertEqual(stats['latest_year'], 2021)
+        self.assertEqual(stats['latest_production_tonnes'], 250.0)
+        self.assertEqual(stats['records'], 6)
+        self.assertEqual(self.history.years, [2016, 2021])
+
+    def test_fallbacks(self):
+        self.assertEqual(self.history.lookup('rice', 'Patna', 'Rabi')[1], 'crop_district')
+        self.assertEqual(self.history.lookup('rice', 'Patna')[1], 'crop_district')
+        stats, level = self.history.lookup('rice', 'Nalanda', 'Kharif')
+        self.assertEqual(level, 'crop')
+        self.assertEqual(stats['records'], 7)
+        self.assertEqual(self.history.lookup('maize', 'Gaya', 'Kharif')[1], 'district')
+        self.assertEqual(self.history.get_historical_average('maize', 'Gaya'), 1500.0)
+        self.assertIsNone(self.history.get_historical_average('maize', 'Nalanda'))
+
+    def test_round_trip(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'index.json')
+            save_index(build_index(RECORDS), path)
+            loaded = YieldHistory.load(path)
+            self.assertEqual(loaded.get_historical_average('wheat', 'Patna', 'Rabi'), 3000.0)
+            with open(path) as f:
+                index = json.load(f)
+            index['version'] = 99
+            with self.assertRaises(ValueError):
+                YieldHistory(index)
+        finally:
+            shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import random
+import unittest
+import warnings
+
+try:
+    import pandas as pd
+    from sklearn.preprocessing import LabelEncoder
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.linear_model import LinearRegression
+    from yield_inference import FastYieldModel, numeric_features, reference_predict, stream_predictions
+except ImportError:
+    pd = None
+
+FEATURE_COLUMNS = [
+    'year_normalized', 'crop_encoded', 'district_encoded', 'season_encoded',
+    'area_hectares', 'production_tonnes', 'area_log', 'production_log',
+    'yield_trend_3yr', 'yield_trend_5yr'
+]
+
+def sample_request(rng):
+    area = rng.uniform(1, 5000)
+    hist_avg = rng.uniform(1500, 4000)
+    return (
+        rng.choice(['rice', 'wheat', 'maize']),
+        rng.choice(['Patna', 'Gaya', 'Nalanda', 'Purnia']),
+        rng.choice(['Kharif', 'Rabi']),
+        numeric_features(rng.randint(2010, 2023), area, area * hist_avg / 1000, hist_avg, hist_avg * 0.98)
+    )
+
+@unittest.skipIf(pd is None, "pandas / scikit-learn not installed")
+class TestYieldInferenceParity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(7)
+        cls.encoders = {name: LabelEncoder().fit(values) for name, values in (
+            ('crop', ['rice', 'wheat', 'maize']),
+            ('district', ['Patna', 'Gaya', 'Nalanda', 'Purnia']),
+            ('season', ['Kharif', 'Rabi'])
+        )}
+        rows, target = [], []
+        for _ in range(400):
+            crop, district, season, numeric = sample_request(rng)
+            row = dict(numeric, crop_encoded=cls.encoders['crop'].transform([crop])[0],
+                       district_encoded=cls.encoders['district'].transform([district])[0],
+                       season_encoded=cls.encoders['season'].transform([season])[0])
+            rows.append(row)
+            target.append(numeric['yield_trend_3yr'] * (1.1 if crop == 'rice' else 0.9) + rng.gauss(0, 50))
+        cls.X = pd.DataFrame(rows)[FEATURE_COLUMNS]
+        cls.y = target
+        cls.requests = [sample_request(random.Random(i)) for i in range(50)]
+
+    def assert_parity(self, model, places):
+        model.fit(self.X, self.y)
+        fast = FastYieldModel(model, self.encoders, FEATURE_COLUMNS)
+        for request in self.requests:
+            expected = reference_predict(model, self.encoders, FEATURE_COLUMNS, *request)
+            self.assertAlmostEqual(fast.predict(*request), expected, places=places)
+
+    def test_tree_model_is_identical(self):
+        self.assert_parity(GradientBoostingRegressor(n_estimators=30, random_state=0), places=6)
+
+    def test_linear_model_within_float32(self):
+        self.assert_parity(LinearRegression(), places=0)
+
+    def test_batch_matches_single_row(self):
+        model = GradientBoostingRegressor(n_estimators=30, random_state=0).fit(self.X, self.y)
+        fast = FastYieldModel(model, self.encoders, FEATURE_COLUMNS)
+
+        def resolve(request):
+            if request is None:
+                return None, 'bad row'
+            crop, district, season, numeric = request
+            return {
+                'crop': crop, 'district': district, 'season': season,
+                'year': 2010 + numeric['year_normalized'] * 13,
+                'area_hectares': numeric['area_hectares'], 'production_tonnes': numeric['production_tonnes'],
+                'yield_trend_3yr': numeric['yield_trend_3yr'], 'yield_trend_5yr': numeric['yield_trend_5yr']
+            }, None
+
+        rows = self.requests[:7] + [None] + self.requests[7:]
+        results = list(stream_predictions(fast, rows, resolve, chunk_size=8))
+        self.assertEqual([r['index'] for r in results], list(range(len(rows))))
+        self.assertEqual(results[7], {'index': 7, 'error': 'bad row'})
+        for result, request in zip(results[:7] + results[8:], self.requests):
+            self.assertAlmostEqual(result['predicted_yield'], fast.predict(*request), places=3)
+            self.assertAlmostEqual(result['confidence_interval']['upper'], result['predicted_yield'] * 1.15)
+
+    def test_no_feature_name_warning_and_model_left_untouched(self):
+        model = LinearRegression().fit(self.X, self.y)
+        fast = FastYieldModel(model, self.encoders, FEATURE_COLUMNS)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            fast.predict(*self.requests[0])
+            self.assertEqual(caught, [])
+            model.predict(self.X.to_numpy()[:1]) # the loaded model still warns; nothing global was changed
+            self.assertIn('valid feature names', str(caught[-1].message))
+        with self.assertRaisesRegex(ValueError, 'fitted on columns'):
+            FastYieldModel(model, self.encoders, list(reversed(FEATURE_COLUMNS)))
+
+    def test_unknown_label(self):
+        fast = FastYieldModel(LinearRegression().fit(self.X, self.y), self.encoders, FEATURE_COLUMNS)
+        with self.assertRaisesRegex(ValueError, 'Unknown district: Atlantis'):
+            fast.predict('rice', 'Atlantis', 'Kharif', self.requests[0][3])
+
+if __name__ == '__main__':
+    unittest.main()
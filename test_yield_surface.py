@@ -0,0 +1,71 @@
+import unittest
+from datetime import datetime
+
+try:
+    import numpy # noqa: F401
+    from yield_inference import FastYieldModel
+    from yield_surface import YieldSurface, surface_years, uses_defaults
+except ImportError:
+    YieldSurface = None
+
+FEATURE_COLUMNS = [
+    'year_normalized', 'crop_encoded', 'district_encoded', 'season_encoded',
+    'area_hectares', 'production_tonnes', 'area_log', 'production_log',
+    'yield_trend_3yr', 'yield_trend_5yr'
+]
+
+class Labels:
+    def __init__(self, classes):
+        self.classes_ = classes
+
+class TrendModel:
+    """Predicts the 3-year trend plus 10 per crop code; counts predict calls."""
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return X[:, 8] + 10 * X[:, 1]
+
+def resolve(row):
+    if row['district'] == 'Gaya':
+        return None, 'No historical yield data'
+    return dict(row, area_hectares=10.0, production_tonnes=25.0, yield_trend_3yr=2500.0, yield_trend_5yr=2400.0,
+                historical_average=2450.0, history_level='crop_district_season'), None
+
+@unittest.skipIf(YieldSurface is None, "numpy not installed")
+class TestYieldSurface(unittest.TestCase):
+    def setUp(self):
+        self.model = TrendModel()
+        encoders = {
+            'crop': Labels(['rice', 'wheat']),
+            'district': Labels(['Gaya', 'Patna']),
+            'season': Labels(['Kharif', 'Rabi'])
+        }
+        self.fast = FastYieldModel(self.model, encoders, FEATURE_COLUMNS)
+        self.surface = YieldSurface()
+
+    def test_grid_built_in_one_batch(self):
+        built = self.surface.build(self.fast, resolve, generation=1, years=[2025, 2026])
+        self.assertEqual(built, 8) # Gaya rows have no history
+        self.assertEqual(self.model.calls, 1)
+        result = self.surface.get('wheat', 'Patna', 'Rabi', 2026, generation=1)
+        self.assertEqual(result['predicted_yield'], 2510.0)
+        self.assertEqual(result['history_level'], 'crop_district_season')
+        self.assertIsNone(self.surface.get('wheat', 'Gaya', 'Rabi', 2026, generation=1))
+        self.assertIsNone(self.surface.get('wheat', 'Patna', 'Rabi', 2030, generation=1))
+
+    def test_reload_invalidates(self):
+        self.surface.build(self.fast, resolve, generation=1, years=[2025])
+        self.assertIsNone(self.surface.get('rice', 'Patna', 'Kharif', 2025, generation=2))
+        self.surface.build(self.fast, resolve, generation=2, years=[2025])
+        self.assertIsNotNone(self.surface.get('rice', 'Patna', 'Kharif', 2025, generation=2))
+        self.assertEqual(self.surface.stats()['hits'], 1)
+
+    def test_helpers(self):
+        self.assertEqual(surface_years(datetime(2025, 6, 1)), [2025, 2026])
+        self.assertTrue(uses_defaults({'crop': 'rice', 'area_hectares': None}))
+        self.assertFalse(uses_defaults({'crop': 'rice', 'yield_trend_3yr': 2000}))
+
+if __name__ == '__main__':
+    unittest.main()
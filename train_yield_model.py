@@ -27,6 +27,7 @@ import joblib
 import warnings
 import os
 from datetime import datetime
+import yield_history
 
 warnings.filterwarnings('ignore')
 
@@ -293,6 +294,19 @@ class YieldPredictor:
         
         print("Models saved successfully!")
     
+    def save_history_index(self, df):
+        """Save the (crop, district, season) historical-yield lookup used by /predict"""
+        print("Saving historical yield index...")
+        os.makedirs('models', exist_ok=True)
+        
+        columns = ['crop', 'district', 'season', 'year', 'yield_kg_per_hectare', 'area_hectares', 'production_tonnes']
+        records = df[columns].dropna().to_dict('records')
+        index = yield_history.build_index(records)
+        yield_history.save_index(index, yield_history.YIELD_HISTORY_FILE)
+        
+        print(f"Historical yield index saved ({len(index['levels']['crop_district_season'])} crop/district/season entries)")
+        return index
+    
     def create_model_summary(self, model_results, df):
         """Create a summary report"""
         print("Creating model summary...")
@@ -359,6 +373,9 @@ def main():
     # Save models
     predictor.save_models()
     
+    # Save historical yield lookup
+    predictor.save_history_index(df)
+    
     # Create summary
     summary = predictor.create_model_summary(model_results, df)
     
@@ -372,7 +389,7 @@ def main():
         print(f"  Test RMSE: {metrics['test_rmse']:.2f} kg/ha")
         print(f"  Test MAE: {metrics['test_mae']:.2f} kg/ha")
     
-    print(f"\nModels saved in 'models/' directory")
+    print(f"\nModels and historical yield index saved in 'models/' directory")
     print(f"Plots saved as 'feature_importance.png' and 'prediction_plots.png'")
 
 if __name__ == "__main__":
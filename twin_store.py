@@ -0,0 +1,274 @@
+"""
+Digital Twin Store
+Caches LLM-generated digital twins so repeat and nearby farms are served
+without a new 2500-token Groq call.
+
+Key: geohash prefix of the farm coordinates + farm size bucket, or the
+normalised town/district/state when coordinates are missing. Entries older
+than the fresh TTL are still served, and a background refresh is started
+(stale-while-revalidate), so a store hit never waits on the LLM.
+
+Entries are stored one row per key: in a SQLite file of their own, or in
+the shared_state backend when the API runs as several worker processes (so
+one worker's twin serves them all). Writing a twin is a single-row upsert,
+and entries past MAX_STALE_SECONDS expire. Concurrent misses for the same
+key generate once; the other requests wait for that twin.
+"""
+
+import os
+import copy
+import json
+import time
+import asyncio
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_metrics import record_cache
+from shared_state import MemoryBackend, SQLiteBackend
+
+TWIN_STORE_FILE = "digital_twin_store.db"
+LEGACY_TWIN_STORE_FILE = "digital_twin_store.json"
+
+GEOHASH_PRECISION = int(os.environ.get("TWIN_GEOHASH_PRECISION", 5)) # ~4.9 km x 4.9 km cells
+FRESH_SECONDS = int(os.environ.get("TWIN_FRESH_SECONDS", 24 * 3600))
+MAX_STALE_SECONDS = int(os.environ.get("TWIN_MAX_STALE_SECONDS", 30 * 24 * 3600))
+
+# Upper bounds (acres) of the size buckets; farms above the last bound share one bucket
+SIZE_BUCKETS = (2, 5, 10, 25, 50, 100)
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat, lng, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a coordinate."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+def size_bucket(acres):
+    for index, bound in enumerate(SIZE_BUCKETS):
+        if acres <= bound:
+            return f"s{index}"
+    return f"s{len(SIZE_BUCKETS)}"
+
+def _coordinate(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
+def twin_key(farm_data):
+    """Store key for a farm request, or None when there is nothing to locate it by."""
+    try:
+        acres = float(farm_data.get('size', 10))
+    except (TypeError, ValueError):
+        acres = 10.0
+    bucket = size_bucket(acres)
+
+    lat = _coordinate(farm_data.get('latitude'))
+    lng = _coordinate(farm_data.get('longitude'))
+    if lat is not None and lng is not None and (lat, lng) != (0.0, 0.0):
+        return f"gh:{geohash_encode(lat, lng)}:{bucket}"
+
+    parts = [str(farm_data.get(field) or '').strip().lower() for field in ('state', 'district', 'town')]
+    if parts[1]:
+        return f"loc:{'|'.join(parts)}:{bucket}"
+
+    return None
+
+class TwinStore:
+    def __init__(self, path=TWIN_STORE_FILE, fresh_seconds=FRESH_SECONDS, max_stale_seconds=MAX_STALE_SECONDS, state=None, legacy_path=LEGACY_TWIN_STORE_FILE):
+        self.fresh_seconds = fresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        if getattr(state, 'shared', False):
+            self.state = state
+        elif path:
+            self.state = SQLiteBackend(path)
+            self.import_legacy(legacy_path)
+        else:
+            self.state = MemoryBackend()
+        self.lock = threading.Lock()
+        self.key_locks = {} # key -> [lock, users] while a miss for that key is being generated
+        self.refreshing = set()
+        self.inflight = {} # key -> asyncio.Task generating that twin (get_or_generate_async)
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="twin-refresh")
+
+    def import_legacy(self, legacy_path):
+        """One-shot import of the previous whole-file JSON store; the file is left in place as a backup."""
+        if not legacy_path or not os.path.exists(legacy_path) or self.state.get('digital_twin_meta', 'json_import'):
+            return 0
+        try:
+            with open(legacy_path, 'r') as f:
+                entries = json.load(f) # { key: {"twin": {...}, "generated_at": epoch_seconds} }
+        except Exception as e:
+            print(f"Could not load legacy twin store: {e}")
+            return 0
+        now = time.time()
+        imported = 0
+        for key, entry in entries.items():
+            remaining = self.max_stale_seconds - (now - entry['generated_at'])
+            if remaining > 0:
+                self.state.set('digital_twin', key, entry, ttl=remaining)
+                imported += 1
+        self.state.set('digital_twin_meta', 'json_import', {'imported': imported, 'at': now})
+        return imported
+
+    def _lookup_key(self, key, farm_data):
+        """(twin, outcome) for a store key; outcome is 'hit', 'stale' or 'miss'."""
+        entry = self.state.get('digital_twin', key)
+        if entry is None:
+            return None, 'miss'
+        age = time.time() - entry['generated_at']
+        if age > self.max_stale_seconds:
+            return None, 'miss'
+        outcome = 'hit' if age <= self.fresh_seconds else 'stale'
+        return personalize(entry['twin'], farm_data), outcome
+
+    def lookup(self, farm_data):
+        """
+        Returns (key, twin, outcome) where outcome is 'hit', 'stale' or 'miss'.
+        A stale twin is still returned; the caller decides whether to refresh it.
+        """
+        key = twin_key(farm_data)
+        if key is None:
+            return None, None, 'miss'
+        twin, outcome = self._lookup_key(key, farm_data)
+        return key, twin, outcome
+
+    def put(self, key, twin):
+        if key is None:
+            return
+        self.state.set('digital_twin', key, {'twin': twin, 'generated_at': time.time()}, ttl=self.max_stale_seconds)
+
+    @contextlib.contextmanager
+    def _key_lock(self, key):
+        with self.lock:
+            entry = self.key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.key_locks[key]
+
+    def schedule_refresh(self, key, farm_data, generate):
+        """Regenerate a stale entry in the background (at most one refresh per key)."""
+        with self.lock:
+            if key in self.refreshing:
+                return False
+            self.refreshing.add(key)
+
+        def refresh():
+            try:
+                success, result = generate(farm_data)
+                if success:
+                    self.put(key, result)
+            except Exception as e:
+                print(f"Background twin refresh failed for {key}: {e}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        self.executor.submit(refresh)
+        return True
+
+    def get_cached(self, farm_data, generate):
+        """
+        Store lookup used by both the Flask and ASGI routes: records the cache
+        outcome and kicks off a background refresh for stale entries.
+        `generate(farm_data)` returns (success, twin_or_error) like generate_digital_twin_with_groq.
+        Returns (key, twin_or_None, outcome).
+        """
+        key, twin, outcome = self.lookup(farm_data)
+        record_cache('digital_twin', outcome)
+        if outcome == 'stale':
+            self.schedule_refresh(key, farm_data, generate)
+        return key, twin, outcome
+
+    def get_or_generate(self, farm_data, generate):
+        """
+        Serve a twin from the store, generating it inline only on a miss.
+        Returns (success, twin_or_error, outcome).
+        """
+        key, twin, outcome = self.get_cached(farm_data, generate)
+        if twin is not None:
+            return True, twin, outcome
+
+        # Concurrent misses for one key generate once; the rest find that twin when they get the lock
+        with self._key_lock(key) if key is not None else contextlib.nullcontext():
+            twin = self._lookup_key(key, farm_data)[0] if key is not None else None
+            if twin is not None:
+                return True, twin, outcome
+            success, result = generate(farm_data)
+            if success:
+                self.put(key, result)
+                result = personalize(result, farm_data)
+        return success, result, outcome
+
+    async def get_or_generate_async(self, farm_data, generate_async, generate):
+        """
+        get_or_generate() for the ASGI server: store reads and writes run in a
+        worker thread, and concurrent misses for one key await a single
+        `generate_async(farm_data)` task. `generate` is the blocking variant used
+        for background refreshes of stale entries.
+        """
+        key, twin, outcome = await asyncio.to_thread(self.get_cached, farm_data, generate)
+        if twin is not None:
+            return True, twin, outcome
+
+        if key is None:
+            success, result = await generate_async(farm_data)
+        else:
+            task = self.inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._generate_async(key, farm_data, generate_async))
+                self.inflight[key] = task
+                task.add_done_callback(lambda done: self.inflight.pop(key, None) if self.inflight.get(key) is done else None)
+            success, result = await asyncio.shield(task) # a client disconnecting does not cancel it for the others
+        if success:
+            result = personalize(result, farm_data)
+        return success, result, outcome
+
+    async def _generate_async(self, key, farm_data, generate_async):
+        twin, _ = await asyncio.to_thread(self._lookup_key, key, farm_data) # stored by a task that just finished
+        if twin is not None:
+            return True, twin
+        success, result = await generate_async(farm_data)
+        if success:
+            await asyncio.to_thread(self.put, key, result)
+        return success, result
+
+def personalize(twin, farm_data):
+    """Copy a shared twin and stamp it with this farm's own area."""
+    twin = copy.deepcopy(twin)
+    try:
+        hectares = round(float(farm_data.get('size', 10)) * 0.404686, 2)
+        twin.setdefault('farmBoundary', {})['area'] = hectares
+    except (TypeError, ValueError, AttributeError):
+        pass
+    return twin
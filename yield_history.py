@@ -0,0 +1,122 @@
+"""
+Historical-yield lookup for /predict.
+
+train_yield_model.py summarises bihar_agricultural_data.csv into
+models/yield_history_index.json, so the server never touches the raw data:
+
+    {
+      "version": 1,
+      "years": [2010, 2023],
+      "levels": {
+        "crop_district_season": {"rice|patna|kharif": stats, ...},
+        "crop_district":        {"rice|patna": stats, ...},
+        "crop":                 {"rice": stats, ...},
+        "district":             {"patna": stats, ...}
+      }
+    }
+
+stats = {mean_yield, trend_3yr, trend_5yr, area_hectares, production_tonnes,
+latest_production_tonnes, latest_year, records}; yields are kg/ha, the
+trends are the mean yield over the latest 3 / 5 years on record.
+
+Lookups are dict hits on normalised keys, falling back from the most specific
+level to crop-only and then district-only averages.
+"""
+
+import json
+from collections import defaultdict
+
+INDEX_VERSION = 1
+YIELD_HISTORY_FILE = 'models/yield_history_index.json'
+
+# Most specific first; crop-only comes before district-only because yields differ far more between crops
+LEVELS = ('crop_district_season', 'crop_district', 'crop', 'district')
+
+def normalize(value):
+    return str(value or '').strip().lower()
+
+def level_key(level, crop, district, season=None):
+    parts = {
+        'crop_district_season': (crop, district, season),
+        'crop_district': (crop, district),
+        'crop': (crop,),
+        'district': (district,)
+    }[level]
+    return '|'.join(normalize(p) for p in parts)
+
+def summarize(rows):
+    """Stats for one group of rows (dicts with year, yield_kg_per_hectare, area_hectares, production_tonnes)."""
+    by_year = defaultdict(list)
+    for row in rows:
+        by_year[int(row['year'])].append(row)
+    years = sorted(by_year)
+
+    def mean(values):
+        values = list(values)
+        return round(sum(values) / len(values), 2) if values else None
+
+    def recent_mean(n):
+        return mean(row['yield_kg_per_hectare'] for year in years[-n:] for row in by_year[year])
+
+    latest = by_year[years[-1]]
+    return {
+        'mean_yield': mean(row['yield_kg_per_hectare'] for row in rows),
+        'trend_3yr': recent_mean(3),
+        'trend_5yr': recent_mean(5),
+        'area_hectares': mean(row['area_hectares'] for row in rows),
+        'production_tonnes': mean(row['production_tonnes'] for row in rows),
+        'latest_production_tonnes': round(sum(row['production_tonnes'] for row in latest), 2),
+        'latest_year': years[-1],
+        'records': len(rows)
+    }
+
+def build_index(records):
+    """Index dict from the training records (iterable of row dicts, e.g. df.to_dict('records'))."""
+    groups = {level: defaultdict(list) for level in LEVELS}
+    years = []
+    for row in records:
+        if row.get('yield_kg_per_hectare') is None:
+            continue
+        years.append(int(row['year']))
+        for level in LEVELS:
+            groups[level][level_key(level, row['crop'], row['district'], row['season'])].append(row)
+
+    return {
+        'version': INDEX_VERSION,
+        'years': [min(years), max(years)] if years else None,
+        'levels': {
+            level: {key: summarize(rows) for key, rows in sorted(grouped.items())}
+            for level, grouped in groups.items()
+        }
+    }
+
+def save_index(index, path=YIELD_HISTORY_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+class YieldHistory:
+    def __init__(self, index):
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported yield history index version: {index.get('version')}")
+        self.years = index.get('years')
+        self.levels = index['levels']
+
+    @classmethod
+    def load(cls, path=YIELD_HISTORY_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def lookup(self, crop, district, season=None):
+        """(stats, level) for the most specific level on record, or (None, None)."""
+        for level in LEVELS:
+            if level == 'crop_district_season' and not season:
+                continue
+            stats = self.levels[level].get(level_key(level, crop, district, season))
+            if stats is not None:
+                return stats, level
+        return None, None
+
+    def get_historical_average(self, crop, district, season=None):
+        """Mean yield (kg/ha) with fallbacks, or None when neither crop nor district is known."""
+        stats, _ = self.lookup(crop, district, season)
+        return stats['mean_yield'] if stats else None
@@ -0,0 +1,167 @@
+"""
+Pandas-free yield inference.
+
+/predict used to build a one-row DataFrame and call LabelEncoder.transform
+three times per request (an array search plus input validation each). Here
+the encoders from encoders.pkl are turned into {label: code} dicts once, and
+a request becomes a float32 feature vector in feature_columns.pkl order that
+goes straight to model.predict.
+
+float32 is what the tree models compare against internally (sklearn casts
+their input to float32), so their predictions are unchanged; a linear model
+agrees to float32 precision. reference_predict() keeps the old DataFrame path
+for the benchmark (bench_yield_inference.py) and the parity test.
+
+Batches (/predict/batch, /predict/sweep) go through stream_predictions():
+rows are resolved and encoded a chunk at a time into one float32 matrix
+(numeric features computed column-wise) and scored with a single
+model.predict call per chunk.
+"""
+
+import copy
+import math
+from itertools import islice
+
+import numpy as np
+
+DEFAULT_YEAR_RANGE = (2010, 2023)
+BATCH_CHUNK_SIZE = 2048
+CONFIDENCE_BAND = 0.15 # ±15% around the prediction
+
+# Model input -> encoder name in encoders.pkl
+CATEGORICAL_FEATURES = {'crop_encoded': 'crop', 'district_encoded': 'district', 'season_encoded': 'season'}
+
+def without_feature_names(model, feature_columns):
+    """
+    A shallow copy of a DataFrame-fitted model that accepts ndarrays silently.
+    sklearn warns on every ndarray predict when the model has feature_names_in_;
+    the names are checked against feature_columns once here instead.
+    """
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        return model
+    if list(names) != list(feature_columns):
+        raise ValueError(f"Model was fitted on columns {list(names)}, feature_columns.pkl has {list(feature_columns)}")
+    model = copy.copy(model)
+    del model.feature_names_in_
+    return model
+
+def numeric_features(year, area_hectares, production_tonnes, trend_3yr, trend_5yr, year_range=DEFAULT_YEAR_RANGE):
+    """Non-categorical model inputs, derived as in train_yield_model.feature_engineering."""
+    year_min, year_max = year_range
+    return {
+        'year_normalized': (year - year_min) / (year_max - year_min),
+        'area_hectares': area_hectares,
+        'production_tonnes': production_tonnes,
+        'area_log': math.log1p(area_hectares),
+        'production_log': math.log1p(production_tonnes),
+        'yield_trend_3yr': trend_3yr,
+        'yield_trend_5yr': trend_5yr
+    }
+
+class FastYieldModel:
+    def __init__(self, model, encoders, feature_columns):
+        self.feature_columns = list(feature_columns)
+        self.model = without_feature_names(model, self.feature_columns)
+        self.codes = {
+            name: {str(label): code for code, label in enumerate(encoder.classes_)}
+            for name, encoder in encoders.items()
+        }
+        missing = [name for name in CATEGORICAL_FEATURES.values() if name not in self.codes]
+        if missing:
+            raise ValueError(f"Encoders missing for: {', '.join(missing)}")
+
+    def code(self, name, label):
+        try:
+            return self.codes[name][label]
+        except KeyError:
+            raise ValueError(f"Unknown {name}: {label}")
+
+    def encode(self, crop, district, season, numeric):
+        """(1, n_features) float32 row for one request; numeric comes from numeric_features()."""
+        values = dict(numeric)
+        values['crop_encoded'] = self.code('crop', crop)
+        values['district_encoded'] = self.code('district', district)
+        values['season_encoded'] = self.code('season', season)
+        return np.array([[values[column] for column in self.feature_columns]], dtype=np.float32)
+
+    def predict(self, crop, district, season, numeric):
+        return float(self.model.predict(self.encode(crop, district, season, numeric))[0])
+
+    def encode_batch(self, inputs, year_range=DEFAULT_YEAR_RANGE):
+        """(n, n_features) float32 matrix for resolved inputs (dicts with crop, district, season, year, area_hectares, production_tonnes, yield_trend_3yr, yield_trend_5yr)."""
+        def column(key, codes=None):
+            if codes is not None:
+                return np.fromiter((codes[row[key]] for row in inputs), dtype=np.float64, count=len(inputs))
+            return np.fromiter((row[key] for row in inputs), dtype=np.float64, count=len(inputs))
+
+        year_min, year_max = year_range
+        area = column('area_hectares')
+        production = column('production_tonnes')
+        columns = {
+            'year_normalized': (column('year') - year_min) / (year_max - year_min),
+            'crop_encoded': column('crop', self.codes['crop']),
+            'district_encoded': column('district', self.codes['district']),
+            'season_encoded': column('season', self.codes['season']),
+            'area_hectares': area,
+            'production_tonnes': production,
+            'area_log': np.log1p(area),
+            'production_log': np.log1p(production),
+            'yield_trend_3yr': column('yield_trend_3yr'),
+            'yield_trend_5yr': column('yield_trend_5yr')
+        }
+        matrix = np.empty((len(inputs), len(self.feature_columns)), dtype=np.float32)
+        for j, name in enumerate(self.feature_columns):
+            matrix[:, j] = columns[name]
+        return matrix
+
+    def predict_batch(self, inputs, year_range=DEFAULT_YEAR_RANGE):
+        if not inputs:
+            return np.empty(0)
+        return self.model.predict(self.encode_batch(inputs, year_range))
+
+def prediction_result(prediction):
+    return {
+        'predicted_yield': float(prediction),
+        'confidence_interval': {
+            'lower': float(prediction * (1 - CONFIDENCE_BAND)),
+            'upper': float(prediction * (1 + CONFIDENCE_BAND))
+        }
+    }
+
+def stream_predictions(fast_model, rows, resolve, year_range=DEFAULT_YEAR_RANGE, chunk_size=BATCH_CHUNK_SIZE, lookup=None):
+    """
+    Yields one result dict per input row, in order. resolve(row) returns
+    (inputs, error) as for a single /predict; rows that fail come back as
+    {'index', 'error'} and the rest of their chunk is still scored.
+    lookup(row), if given, returns a precomputed result (yield_surface.py)
+    or None; hits skip resolving and scoring.
+    """
+    rows = iter(rows)
+    index = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        cached = [lookup(row) for row in chunk] if lookup else [None] * len(chunk)
+        resolved = [(hit, None) if hit is not None else resolve(row) for row, hit in zip(chunk, cached)]
+        valid = [inputs for (inputs, error), hit in zip(resolved, cached) if hit is None and error is None]
+        predictions = iter(fast_model.predict_batch(valid, year_range))
+        for (inputs, error), hit in zip(resolved, cached):
+            if hit is not None:
+                yield {'index': index, **hit}
+            elif error is not None:
+                yield {'index': index, 'error': error}
+            else:
+                yield {'index': index, **inputs, **prediction_result(next(predictions))}
+            index += 1
+
+def reference_predict(model, encoders, feature_columns, crop, district, season, numeric):
+    """The previous /predict path (one-row DataFrame + LabelEncoder.transform), for benchmarks and parity tests."""
+    import pandas as pd
+    values = dict(numeric)
+    values['crop_encoded'] = encoders['crop'].transform([crop])[0]
+    values['district_encoded'] = encoders['district'].transform([district])[0]
+    values['season_encoded'] = encoders['season'].transform([season])[0]
+    input_data = pd.DataFrame([values])[list(feature_columns)]
+    return float(model.predict(input_data)[0])
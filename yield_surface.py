@@ -0,0 +1,68 @@
+"""
+Precomputed yield surface.
+
+The yield model's input space is small and mostly categorical (5 crops x 38
+districts x a few seasons x year), and most /predict calls leave area,
+production and the yield trends to their historical defaults. For those
+requests the answer only depends on (crop, district, season, year), so the
+whole grid is scored for the current and next year in one batch when the
+models are loaded and served from a dict afterwards.
+
+Entries are tagged with the model generation they were built from; after a
+reload the old table is ignored (every lookup misses) until it is rebuilt.
+"""
+
+import time
+import threading
+from datetime import datetime
+from itertools import product
+
+from yield_inference import stream_predictions, DEFAULT_YEAR_RANGE
+
+# Inputs that must be left to their historical defaults for a request to use the surface
+DEFAULTED_FIELDS = ('area_hectares', 'production_tonnes', 'yield_trend_3yr', 'yield_trend_5yr')
+
+def surface_years(now=None):
+    year = (now or datetime.now()).year
+    return [year, year + 1]
+
+def uses_defaults(data):
+    return all(data.get(field) is None for field in DEFAULTED_FIELDS)
+
+class YieldSurface:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.table = {} # (crop, district, season, year) -> resolved inputs + prediction (a batch result without its index)
+        self.hits = 0
+        self.misses = 0
+
+    def build(self, fast_model, resolve, generation, years=None, year_range=DEFAULT_YEAR_RANGE):
+        """Score every crop x district x season x year with default inputs; replaces the table."""
+        start = time.perf_counter()
+        keys = list(product(fast_model.codes['crop'], fast_model.codes['district'], fast_model.codes['season'], years or surface_years()))
+        rows = [{'crop': crop, 'district': district, 'season': season, 'year': year} for crop, district, season, year in keys]
+        table = {}
+        for key, result in zip(keys, stream_predictions(fast_model, rows, resolve, year_range)):
+            if 'error' not in result:
+                del result['index']
+                table[key] = result
+        with self.lock:
+            self.table = table
+            self.generation = generation
+        print(f"Yield surface built: {len(table)} of {len(keys)} grid points in {time.perf_counter() - start:.2f}s")
+        return len(table)
+
+    def get(self, crop, district, season, year, generation):
+        """Precomputed result for a default-input request, or None (other year, unknown key, stale generation)."""
+        with self.lock:
+            result = self.table.get((crop, district, season, year)) if generation == self.generation else None
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.table), 'generation': self.generation, 'hits': self.hits, 'misses': self.misses}